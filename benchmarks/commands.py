@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Command benchmark: runs every obs-cli subcommand against the local mock
+# OBS server (mock_obs.py) with a synthetic scene collection, and reports
+# per command the wall time, the websocket round trips and requests it
+# needed, and the peak memory (max RSS) of the process. Request counts
+# that grow with the size of the collection show up as N+1 patterns.
+# Commands run with --json unless they are marked as table runs, and those
+# starting with DAEMON go through a daemon started for the benchmark.
+#
+#   python benchmarks/commands.py [--scenes N] [--items N] [--groups N]
+#       [--latency MS] [--no-batch] [--runs N] [--json] [PATTERN ...]
+
+import argparse
+import fnmatch
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from mock_obs import MockObsServer, ObsState
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = "benchmark"
+DAEMON = "@daemon"
+
+
+def make_commands(state, tmpdir):
+    # Command lines to run, with names picked from the synthetic collection
+    scene = state.scenes[-1]
+    items = [it for it in state.items[scene] if not it["isGroup"]]
+    groups = [it for it in state.items[scene] if it["isGroup"]]
+    item = items[-1]["sourceName"]
+    filtered = next(name for name, f in state.filters.items() if f)
+    filter_ = state.filters[filtered][0]["filterName"]
+    audio = next(
+        name
+        for name, info in state.inputs.items()
+        if info and info["inputKind"] == "ffmpeg_source"
+    )
+    screenshot = os.path.join(tmpdir, "screenshot.png")
+    batch = os.path.join(tmpdir, "batch.txt")
+    with open(batch, "w", encoding="utf-8") as f:
+        f.writelines(
+            f"item -s '{scene}' toggle '{it['sourceName']}'\n"
+            for it in items[:10]
+        )
+        f.write(f"input toggle-mute '{audio}'\n")
+    state_file = os.path.join(tmpdir, "state.json")
+    with open(state_file, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "scenes": {
+                    scene: {
+                        "items": {it["sourceName"]: True for it in items[:10]}
+                    }
+                },
+                "inputs": {audio: {"muted": False}},
+            },
+            f,
+        )
+    commands = [
+        ["info"],
+        ["scene", "list"],
+        ["scene", "current"],
+        ["scene", "switch", scene],
+        ["scene", "screenshot", "-o", screenshot],
+        ["item", "-s", scene, "list"],
+        ["item", "-s", scene, "list", "--table"],
+        ["item", "-s", scene, "show", item],
+        ["item", "-s", scene, "toggle", item],
+        ["item", "-s", scene, "hide", "*"],
+        ["item", "-s", scene, "screenshot", item, "-o", screenshot],
+        ["group", "-s", scene, "list"],
+        ["input", "list"],
+        # Mute states are looked up for the table only
+        ["input", "list", "--table"],
+        ["input", "show", audio],
+        ["input", "get", audio, "name"],
+        ["input", "toggle-mute", audio],
+        ["input", "meter", "-n", "1"],
+        ["filter", "list", filtered],
+        ["filter", "list", "-a"],
+        ["filter", "toggle", filtered, filter_],
+        ["filter", "status", filtered, filter_],
+        ["hotkey", "list"],
+        ["source", "list"],
+        ["source", "active", item],
+        ["source", "screenshot", item, "-o", screenshot],
+        ["source", "screenshot", "-a", "-o", os.path.join(tmpdir, "all")],
+        ["stream", "status"],
+        ["stream", "status", "-w", "-n", "2", "-i", "10ms"],
+        ["record", "status"],
+        ["replay", "status"],
+        ["virtualcam", "status"],
+        ["stats", "-n", "2", "-i", "10ms"],
+        ["batch", batch],
+        ["apply", state_file],
+        ["snapshot", "-o", os.path.join(tmpdir, "snapshot.json")],
+        [DAEMON, "scene", "current"],
+        [DAEMON, "item", "-s", scene, "toggle", item],
+        [DAEMON, "input", "list", "--table"],
+    ]
+    if groups:
+        group = groups[0]["sourceName"]
+        commands.insert(12, ["group", "-s", scene, "toggle", group])
+    return commands
+
+
+def connection_args(server):
+    return ["-H", server.host, "-P", str(server.port), "-p", PASSWORD]
+
+
+def start_daemon(server, socket_path):
+    daemon = subprocess.Popen(
+        [
+            sys.executable,
+            os.path.join(REPO, "obs_cli.py"),
+            *connection_args(server),
+            "--socket",
+            socket_path,
+            "daemon",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 10
+    while not os.path.exists(socket_path):
+        if daemon.poll() is not None or time.monotonic() > deadline:
+            raise RuntimeError("the daemon did not start")
+        time.sleep(0.01)
+    return daemon
+
+
+def run(server, argv, socket_path):
+    # Returns (seconds, max RSS in KiB, exit status)
+    if argv[0] == DAEMON:
+        options = ["--socket", socket_path]
+        argv = argv[1:]
+    else:
+        options = ["--no-daemon"]
+    if "--table" not in argv:
+        options.append("--json")
+    command = [
+        sys.executable,
+        os.path.join(REPO, "obs_cli.py"),
+        *options,
+        *connection_args(server),
+        *argv,
+    ]
+    start = time.monotonic()
+    proc = subprocess.Popen(
+        command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    _, status, usage = os.wait4(proc.pid, 0)
+    elapsed = time.monotonic() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return elapsed, usage.ru_maxrss, proc.returncode
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "patterns",
+        nargs="*",
+        metavar="PATTERN",
+        help="Only run commands matching these globs, e.g. 'item *'",
+    )
+    parser.add_argument(
+        "--scenes", type=int, default=20, help="Scenes (default: 20)"
+    )
+    parser.add_argument(
+        "--items",
+        type=int,
+        default=50,
+        help="Items per scene (default: 50)",
+    )
+    parser.add_argument(
+        "--groups",
+        type=int,
+        default=5,
+        help="Groups per scene (default: 5)",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=2.0,
+        help="Latency of every response in ms (default: 2)",
+    )
+    parser.add_argument(
+        "--no-batch",
+        dest="batch_support",
+        action="store_false",
+        default=True,
+        help="Reject RequestBatch like an old server would",
+    )
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=3,
+        help="Runs per command, the median time counts (default: 3)",
+    )
+    parser.add_argument(
+        "-j", "--json", action="store_true", help="NDJSON output"
+    )
+    args = parser.parse_args()
+
+    state = ObsState.synthetic(args.scenes, args.items, args.groups)
+    server = MockObsServer(
+        state,
+        password=PASSWORD,
+        latency=args.latency / 1000,
+        batch_support=args.batch_support,
+    ).start_in_thread()
+
+    failed = False
+    daemon = None
+    with tempfile.TemporaryDirectory() as tmpdir:
+        socket_path = os.path.join(tmpdir, "daemon.sock")
+        commands = [
+            argv
+            for argv in make_commands(state, tmpdir)
+            if not args.patterns
+            or any(
+                fnmatch.fnmatchcase(" ".join(argv), pattern)
+                for pattern in args.patterns
+            )
+        ]
+        if any(argv[0] == DAEMON for argv in commands):
+            daemon = start_daemon(server, socket_path)
+        if not args.json:
+            print(
+                f"{'COMMAND':40} {'WALL':>9} {'TRIPS':>5} {'REQS':>5} "
+                f"{'RSS':>8}"
+            )
+        for argv in commands:
+            times = []
+            for _ in range(args.runs):
+                server.reset_counters()
+                elapsed, rss, rc = run(server, argv, socket_path)
+                times.append(elapsed)
+            failed = failed or rc != 0
+            result = {
+                "command": " ".join(argv),
+                "wall_ms": round(statistics.median(times) * 1000, 1),
+                "round_trips": server.round_trips,
+                "requests": server.requests,
+                "connections": server.connections,
+                "max_rss_kib": rss,
+                "rc": rc,
+            }
+            if args.json:
+                print(json.dumps(result), flush=True)
+            else:
+                print(
+                    f"{result['command'][:40]:40} "
+                    f"{result['wall_ms']:>6.1f} ms "
+                    f"{result['round_trips']:>5} {result['requests']:>5} "
+                    f"{rss / 1024:>5.1f} MB"
+                    f"{'' if rc == 0 else f'  (exit {rc})'}",
+                    flush=True,
+                )
+
+        if daemon is not None:
+            daemon.terminate()
+            daemon.wait()
+    server.stop_thread()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
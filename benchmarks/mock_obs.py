@@ -0,0 +1,1201 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Local stand-in for an OBS websocket v5 server, for benchmarking obs-cli.
+#
+# Implements the Hello/Identify handshake (with password auth), the request
+# types obs-cli sends, RequestBatch, and events according to each session's
+# subscriptions. Responses can be delayed by a fixed latency to emulate a
+# remote OBS, and the scene collection can be generated at any size.
+# Only the standard library is used.
+#
+#   python benchmarks/mock_obs.py [--port 4455] [--password PW]
+#       [--latency SECONDS] [--no-batch] [--scenes N --items N --groups N]
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import itertools
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+
+LOGGER = logging.getLogger("mock_obs")
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# Event subscription bits, see obs-websocket's EventSubscription enum
+_SUB_GENERAL = 1 << 0
+_SUB_CONFIG = 1 << 1
+_SUB_SCENES = 1 << 2
+_SUB_INPUTS = 1 << 3
+_SUB_FILTERS = 1 << 5
+_SUB_OUTPUTS = 1 << 6
+_SUB_SCENEITEMS = 1 << 7
+_SUB_INPUTVOLUMEMETERS = 1 << 16
+
+# Request status codes used by the mock
+_OK = 100
+_MISSING_REQUEST_TYPE = 203
+_UNKNOWN_REQUEST_TYPE = 204
+_MISSING_FIELD = 300
+_OUTPUT_RUNNING = 500
+_OUTPUT_NOT_RUNNING = 501
+_RESOURCE_NOT_FOUND = 600
+_RESOURCE_ALREADY_EXISTS = 601
+_INVALID_RESOURCE_STATE = 604
+
+_AUDIO_KINDS = {
+    "ffmpeg_source",
+    "browser_source",
+    "pulse_input_capture",
+    "pulse_output_capture",
+    "wasapi_input_capture",
+    "coreaudio_input_capture",
+}
+
+# Default settings per input kind. Like OBS, GetInputSettings leaves out
+# settings that are at their default.
+_DEFAULT_SETTINGS = {
+    "ffmpeg_source": {"looping": False, "restart_on_activate": True},
+    "v4l2_input": {"auto_reset": False, "buffering": True},
+    "pulse_input_capture": {"device_id": "default"},
+    "pulse_output_capture": {"device_id": "default"},
+    "text_ft2_source_v2": {"outline": False},
+}
+
+_SYNTHETIC_KINDS = (
+    "ffmpeg_source",
+    "v4l2_input",
+    "browser_source",
+    "text_ft2_source_v2",
+    "pulse_input_capture",
+    "image_source",
+    "color_source_v3",
+    "xcomposite_input",
+)
+
+
+class RequestError(Exception):
+    def __init__(self, code, comment=None):
+        super().__init__(comment)
+        self.code = code
+        self.comment = comment
+
+
+def make_png(width, height):
+    # Uncompressed noise, so the payload size is realistic for a busy frame
+    row = width * 3
+    raw = bytearray()
+    noise = os.urandom(row)
+    for _ in range(height):
+        raw += b"\x00" + noise
+    idat = zlib.compress(bytes(raw), 0)
+
+    def chunk(kind, data):
+        crc = zlib.crc32(kind + data) & 0xFFFFFFFF
+        return (
+            struct.pack(">I", len(data)) + kind + data + struct.pack(">I", crc)
+        )
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", idat)
+        + chunk(b"IEND", b"")
+    )
+
+
+def make_transform(index):
+    return {
+        "positionX": float(index * 10),
+        "positionY": float(index * 5),
+        "rotation": 0.0,
+        "scaleX": 1.0,
+        "scaleY": 1.0,
+        "width": 1920.0,
+        "height": 1080.0,
+        "sourceWidth": 1920.0,
+        "sourceHeight": 1080.0,
+        "alignment": 5,
+        "boundsType": "OBS_BOUNDS_NONE",
+        "boundsAlignment": 0,
+        "boundsWidth": 0.0,
+        "boundsHeight": 0.0,
+        "cropTop": 0,
+        "cropBottom": 0,
+        "cropLeft": 0,
+        "cropRight": 0,
+    }
+
+
+# In-memory scene collection and outputs
+class ObsState:
+    def __init__(self):
+        self.scenes = []
+        self.current_scene = None
+        self.items = {}
+        self.inputs = {}
+        self.filters = {}
+        self.hotkeys = [
+            "OBSBasic.StartStreaming",
+            "OBSBasic.StopStreaming",
+            "OBSBasic.StartRecording",
+            "OBSBasic.StopRecording",
+            "OBSBasic.Screenshot",
+        ]
+        self.outputs = {
+            "stream": False,
+            "record": False,
+            "replay": False,
+            "virtualcam": False,
+        }
+        self.output_started = {}
+        self.studio_mode = False
+        self.collection = "Untitled"
+        self._item_ids = itertools.count(1)
+        self._started = time.monotonic()
+        self._screenshots = {}
+
+    @classmethod
+    def default(cls):
+        state = cls()
+        state.add_input("Camera", "v4l2_input")
+        state.add_input("Camera 2", "v4l2_input")
+        state.add_input("Mic/Aux", "pulse_input_capture")
+        state.add_input("Desktop Audio", "pulse_output_capture")
+        state.add_input("Intro Video", "ffmpeg_source")
+        state.add_input("Logo", "image_source")
+        state.add_input("Clock", "text_ft2_source_v2")
+        state.add_input("Screen", "xcomposite_input")
+        state.add_scene("Scene 1")
+        state.add_scene("Scene 2")
+        state.add_scene("Live")
+        state.add_group("Overlay", ["Logo", "Clock"])
+        for source in ("Camera", "Camera 2", "Mic/Aux", "Overlay"):
+            state.add_item("Live", source)
+        for source in ("Screen", "Camera", "Desktop Audio"):
+            state.add_item("Scene 1", source)
+        state.add_item("Scene 2", "Intro Video")
+        state.add_filter(
+            "Mic/Aux", "Noise Suppression", "noise_suppress_filter"
+        )
+        state.add_filter("Mic/Aux", "Gain", "gain_filter", enabled=False)
+        state.add_filter("Camera", "Color Correction", "color_filter")
+        state.add_filter("Live", "Sharpen", "sharpness_filter")
+        state.current_scene = "Live"
+        return state
+
+    @classmethod
+    def synthetic(cls, scenes, items_per_scene, groups_per_scene=0):
+        state = cls()
+        n_inputs = max(items_per_scene * 2, 1)
+        for i in range(n_inputs):
+            kind = _SYNTHETIC_KINDS[i % len(_SYNTHETIC_KINDS)]
+            state.add_input(f"Input {i:04d}", kind)
+            if i % 3 == 0:
+                state.add_filter(f"Input {i:04d}", "Gain", "gain_filter")
+        for s in range(scenes):
+            scene = f"Scene {s:04d}"
+            state.add_scene(scene)
+            for g in range(groups_per_scene):
+                group = f"Group {s:04d}-{g:02d}"
+                members = [
+                    f"Input {(s + g * 7 + k) % n_inputs:04d}" for k in range(3)
+                ]
+                state.add_group(group, members)
+                state.add_item(scene, group)
+            for i in range(items_per_scene):
+                state.add_item(scene, f"Input {(s + i) % n_inputs:04d}")
+        state.current_scene = state.scenes[0] if state.scenes else None
+        return state
+
+    def add_input(self, name, kind, settings=None):
+        self.inputs[name] = {
+            "inputKind": kind,
+            "unversionedInputKind": kind,
+            "settings": dict(settings or {"name": name}),
+            "muted": False,
+        }
+        self.filters.setdefault(name, [])
+
+    def add_scene(self, name):
+        self.scenes.append(name)
+        self.items[name] = []
+        self.filters.setdefault(name, [])
+
+    def add_group(self, name, members):
+        self.items[name] = []
+        self.inputs.setdefault(name, None)
+        for member in members:
+            self.add_item(name, member)
+
+    def add_item(self, container, source):
+        is_group = source in self.items and source not in self.scenes
+        items = self.items[container]
+        kind = None if is_group else self.inputs[source]["inputKind"]
+        item = {
+            "sceneItemId": next(self._item_ids),
+            "sceneItemIndex": len(items),
+            "sourceName": source,
+            "sourceType": (
+                "OBS_SOURCE_TYPE_SCENE"
+                if is_group
+                else ("OBS_SOURCE_TYPE_INPUT")
+            ),
+            "inputKind": kind,
+            "isGroup": is_group,
+            "sceneItemEnabled": True,
+            "sceneItemLocked": False,
+            "sceneItemBlendMode": "OBS_BLEND_NORMAL",
+            "sceneItemTransform": make_transform(len(items)),
+        }
+        items.append(item)
+        return item
+
+    def add_filter(self, source, name, kind, enabled=True):
+        filters = self.filters.setdefault(source, [])
+        filters.append(
+            {
+                "filterName": name,
+                "filterKind": kind,
+                "filterIndex": len(filters),
+                "filterEnabled": enabled,
+                "filterSettings": {"db": 0.0} if kind == "gain_filter" else {},
+            }
+        )
+
+    def uptime(self):
+        return time.monotonic() - self._started
+
+    def screenshot(self, width, height, image_format):
+        key = (width, height)
+        if key not in self._screenshots:
+            self._screenshots[key] = base64.b64encode(
+                make_png(width, height)
+            ).decode()
+        return f"data:image/{image_format};base64,{self._screenshots[key]}"
+
+
+class Session:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.identified = False
+        self.subscriptions = 0
+        # Requests received and not answered yet
+        self.outstanding = 0
+        self.lock = asyncio.Lock()
+
+    async def recv(self):
+        message = bytearray()
+        while True:
+            head = await self.reader.readexactly(2)
+            fin = head[0] & 0x80
+            opcode = head[0] & 0x0F
+            length = head[1] & 0x7F
+            if length == 126:
+                (length,) = struct.unpack(
+                    ">H", await self.reader.readexactly(2)
+                )
+            elif length == 127:
+                (length,) = struct.unpack(
+                    ">Q", await self.reader.readexactly(8)
+                )
+            mask = await self.reader.readexactly(4) if head[1] & 0x80 else None
+            payload = await self.reader.readexactly(length)
+            if mask:
+                payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+            if opcode == 0x8:
+                return None
+            if opcode == 0x9:
+                await self._send_frame(0xA, payload)
+                continue
+            if opcode == 0xA:
+                continue
+            message += payload
+            if fin:
+                return message.decode()
+
+    async def send(self, op, data):
+        payload = json.dumps({"op": op, "d": data}).encode()
+        await self._send_frame(0x1, payload)
+
+    async def _send_frame(self, opcode, payload):
+        length = len(payload)
+        if length < 126:
+            header = struct.pack(">BB", 0x80 | opcode, length)
+        elif length < 1 << 16:
+            header = struct.pack(">BBH", 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack(">BBQ", 0x80 | opcode, 127, length)
+        async with self.lock:
+            self.writer.write(header + payload)
+            await self.writer.drain()
+
+
+# OBS websocket v5 server backed by an ObsState. Counts connections,
+# round trips and individual requests, for benchmarks to report per
+# command. A round trip starts with a request message that arrives while
+# nothing else of the session is outstanding, so requests sent together
+# count once.
+class MockObsServer:
+    def __init__(
+        self,
+        state=None,
+        host="127.0.0.1",
+        port=0,
+        password=None,
+        latency=0.0,
+        batch_support=True,
+        meter_interval=0.05,
+    ):
+        self.state = state or ObsState.default()
+        self.host = host
+        self.port = port
+        self.password = password
+        self.latency = latency
+        self.batch_support = batch_support
+        self.meter_interval = meter_interval
+        self.sessions = set()
+        self.connections = 0
+        self.round_trips = 0
+        self.requests = 0
+        self.request_types = {}
+        # (executionType, [requestType, ...]) of every RequestBatch
+        self.batches = []
+        self._server = None
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    # Lifecycle
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._meter_task = asyncio.ensure_future(self._emit_meters())
+        return self
+
+    async def stop(self):
+        self._meter_task.cancel()
+        self._server.close()
+        for session in list(self.sessions):
+            session.writer.close()
+        await self._server.wait_closed()
+
+    def start_in_thread(self):
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.start())
+            self._ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop_thread(self):
+        future = asyncio.run_coroutine_threadsafe(self.stop(), self._loop)
+        future.result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def reset_counters(self):
+        self.connections = 0
+        self.round_trips = 0
+        self.requests = 0
+        self.request_types = {}
+        self.batches = []
+
+    def call(self, fn, *args):
+        # Runs fn(*args) on the server loop, e.g. to change the state
+        async def wrapper():
+            return fn(*args)
+
+        return asyncio.run_coroutine_threadsafe(wrapper(), self._loop).result()
+
+    # Connection handling
+
+    async def _handle(self, reader, writer):
+        session = Session(reader, writer)
+        try:
+            if not await self._upgrade(reader, writer):
+                return
+            self.connections += 1
+            salt = challenge = None
+            hello = {"obsWebSocketVersion": "5.5.0", "rpcVersion": 1}
+            if self.password:
+                salt = base64.b64encode(os.urandom(16)).decode()
+                challenge = base64.b64encode(os.urandom(16)).decode()
+                hello["authentication"] = {
+                    "challenge": challenge,
+                    "salt": salt,
+                }
+            await session.send(0, hello)
+            self.sessions.add(session)
+            while True:
+                message = await session.recv()
+                if message is None:
+                    break
+                await self._dispatch(
+                    session, json.loads(message), salt, challenge
+                )
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.sessions.discard(session)
+            writer.close()
+
+    async def _upgrade(self, reader, writer):
+        request = await reader.readuntil(b"\r\n\r\n")
+        headers = {}
+        for line in request.decode().split("\r\n")[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+        key = headers.get("sec-websocket-key")
+        # An IPv6 address in the Host header has to be bracketed
+        host = headers.get("host", "")
+        if not key or (host.count(":") > 1 and not host.startswith("[")):
+            writer.write(b"HTTP/1.1 400 Bad Request\r\n\r\n")
+            await writer.drain()
+            return False
+        accept = base64.b64encode(
+            hashlib.sha1((key + _WS_GUID).encode()).digest()
+        ).decode()
+        writer.write(
+            (
+                "HTTP/1.1 101 Switching Protocols\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+            ).encode()
+        )
+        await writer.drain()
+        return True
+
+    def _check_auth(self, data, salt, challenge):
+        if not self.password:
+            return True
+        secret = base64.b64encode(
+            hashlib.sha256((self.password + salt).encode()).digest()
+        )
+        expected = base64.b64encode(
+            hashlib.sha256(secret + challenge.encode()).digest()
+        ).decode()
+        return data.get("authentication") == expected
+
+    async def _dispatch(self, session, message, salt, challenge):
+        op = message.get("op")
+        data = message.get("d", {})
+        if op == 1:
+            if not self._check_auth(data, salt, challenge):
+                await self._close(session, 4009)
+                return
+            session.identified = True
+            session.subscriptions = data.get("eventSubscriptions", 0) or 0
+            await session.send(2, {"negotiatedRpcVersion": 1})
+        elif not session.identified:
+            await self._close(session, 4007)
+        elif op == 3:
+            session.subscriptions = data.get("eventSubscriptions", 0) or 0
+            await session.send(2, {"negotiatedRpcVersion": 1})
+        elif op == 6:
+            self._start_request(session)
+            asyncio.ensure_future(self._respond(session, data))
+        elif op == 8 and self.batch_support:
+            self._start_request(session)
+            asyncio.ensure_future(self._respond_batch(session, data))
+        else:
+            await self._close(session, 4004)
+
+    def _start_request(self, session):
+        if not session.outstanding:
+            self.round_trips += 1
+        session.outstanding += 1
+
+    async def _close(self, session, code):
+        await session._send_frame(0x8, struct.pack(">H", code))
+        session.writer.close()
+
+    async def _respond(self, session, data):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        session.outstanding -= 1
+        await session.send(7, self._execute(data))
+
+    async def _respond_batch(self, session, data):
+        self.batches.append(
+            (
+                data.get("executionType", 0),
+                [r.get("requestType") for r in data.get("requests", [])],
+            )
+        )
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        results = []
+        for request in data.get("requests", []):
+            if request.get("requestType") == "Sleep":
+                frames = request.get("requestData", {}).get("sleepFrames", 0)
+                millis = request.get("requestData", {}).get("sleepMillis", 0)
+                await asyncio.sleep(millis / 1000 or frames / 60)
+            result = self._execute(request)
+            results.append(result)
+            if data.get("haltOnFailure") and not (
+                result["requestStatus"]["result"]
+            ):
+                break
+        session.outstanding -= 1
+        await session.send(
+            9, {"requestId": data.get("requestId"), "results": results}
+        )
+
+    def _execute(self, request):
+        request_type = request.get("requestType")
+        self.requests += 1
+        self.request_types[request_type] = (
+            self.request_types.get(request_type, 0) + 1
+        )
+        response = {
+            "requestType": request_type,
+            "requestId": request.get("requestId"),
+        }
+        handler = getattr(self, f"_req_{request_type}", None)
+        try:
+            if not request_type:
+                raise RequestError(_MISSING_REQUEST_TYPE)
+            if handler is None:
+                raise RequestError(
+                    _UNKNOWN_REQUEST_TYPE,
+                    f"Your request type is not valid: {request_type}",
+                )
+            result = handler(request.get("requestData") or {})
+        except RequestError as exc:
+            response["requestStatus"] = {"result": False, "code": exc.code}
+            if exc.comment:
+                response["requestStatus"]["comment"] = exc.comment
+            return response
+        response["requestStatus"] = {"result": True, "code": _OK}
+        if result is not None:
+            response["responseData"] = result
+        return response
+
+    # Events
+
+    def emit(self, event_type, category, data=None):
+        for session in list(self.sessions):
+            if session.identified and session.subscriptions & category:
+                asyncio.ensure_future(
+                    session.send(
+                        5,
+                        {
+                            "eventType": event_type,
+                            "eventIntent": category,
+                            "eventData": data or {},
+                        },
+                    )
+                )
+
+    async def _emit_meters(self):
+        while True:
+            await asyncio.sleep(self.meter_interval)
+            if not any(
+                s.subscriptions & _SUB_INPUTVOLUMEMETERS for s in self.sessions
+            ):
+                continue
+            t = time.monotonic()
+            inputs = []
+            for index, (name, info) in enumerate(self.state.inputs.items()):
+                if not info or info["inputKind"] not in _AUDIO_KINDS:
+                    continue
+                level = (
+                    0.0
+                    if info["muted"]
+                    else 0.3 + 0.25 * (((t * (index + 1)) % 1.0))
+                )
+                inputs.append(
+                    {
+                        "inputName": name,
+                        "inputLevelsMul": [
+                            [level, min(level * 1.5, 1.0), level * 1.5]
+                            for _ in range(2)
+                        ],
+                    }
+                )
+            self.emit(
+                "InputVolumeMeters", _SUB_INPUTVOLUMEMETERS, {"inputs": inputs}
+            )
+
+    # Helpers
+
+    def _require(self, data, *fields):
+        for field in fields:
+            if field not in data:
+                raise RequestError(
+                    _MISSING_FIELD, f"Your request is missing `{field}`"
+                )
+        return [data[field] for field in fields]
+
+    def _container(self, name, group=False):
+        state = self.state
+        if name not in state.items or (group and name in state.scenes):
+            raise RequestError(
+                _RESOURCE_NOT_FOUND,
+                f"No source was found by the name of `{name}`",
+            )
+        return state.items[name]
+
+    def _input(self, name, audio=False):
+        info = self.state.inputs.get(name)
+        if not info:
+            raise RequestError(
+                _RESOURCE_NOT_FOUND,
+                f"No source was found by the name of `{name}`",
+            )
+        if audio and info["inputKind"] not in _AUDIO_KINDS:
+            raise RequestError(
+                _INVALID_RESOURCE_STATE,
+                "The specified input does not support audio.",
+            )
+        return info
+
+    def _item(self, data):
+        container, item_id = self._require(data, "sceneName", "sceneItemId")
+        for item in self._container(container):
+            if item["sceneItemId"] == item_id:
+                return container, item
+        raise RequestError(_RESOURCE_NOT_FOUND, "No scene items were found")
+
+    def _filter(self, data):
+        source, name = self._require(data, "sourceName", "filterName")
+        for filter_ in self._filters(source):
+            if filter_["filterName"] == name:
+                return filter_
+        raise RequestError(
+            _RESOURCE_NOT_FOUND, f"No filter was found by the name of `{name}`"
+        )
+
+    def _filters(self, source):
+        if source not in self.state.filters:
+            raise RequestError(
+                _RESOURCE_NOT_FOUND,
+                f"No source was found by the name of `{source}`",
+            )
+        return self.state.filters[source]
+
+    # General
+
+    def _req_GetVersion(self, data):
+        return {
+            "obsVersion": "30.2.0",
+            "obsWebSocketVersion": "5.5.0",
+            "rpcVersion": 1,
+            "availableRequests": sorted(
+                name[5:] for name in dir(self) if name.startswith("_req_")
+            ),
+            "supportedImageFormats": ["png", "jpg", "bmp"],
+            "platform": "mock",
+            "platformDescription": "obs-cli benchmark mock",
+        }
+
+    def _req_GetStats(self, data):
+        uptime = self.state.uptime()
+        frames = int(uptime * 60)
+        return {
+            "cpuUsage": 3.5,
+            "memoryUsage": 512.25,
+            "availableDiskSpace": 102400.0,
+            "activeFps": 60.0,
+            "averageFrameRenderTime": 1.2 + (uptime % 1.0),
+            "renderSkippedFrames": frames // 500,
+            "renderTotalFrames": frames,
+            "outputSkippedFrames": frames // 1000,
+            "outputTotalFrames": frames,
+            "webSocketSessionIncomingMessages": self.round_trips,
+            "webSocketSessionOutgoingMessages": self.round_trips,
+        }
+
+    def _req_GetVideoSettings(self, data):
+        return {
+            "fpsNumerator": 60,
+            "fpsDenominator": 1,
+            "baseWidth": 1920,
+            "baseHeight": 1080,
+            "outputWidth": 1280,
+            "outputHeight": 720,
+        }
+
+    def _req_GetStudioModeEnabled(self, data):
+        return {"studioModeEnabled": self.state.studio_mode}
+
+    def _req_GetHotkeyList(self, data):
+        return {"hotkeys": list(self.state.hotkeys)}
+
+    def _req_TriggerHotkeyByName(self, data):
+        (name,) = self._require(data, "hotkeyName")
+        if name not in self.state.hotkeys:
+            raise RequestError(_RESOURCE_NOT_FOUND, "No hotkeys were found")
+
+    def _req_Sleep(self, data):
+        return None
+
+    def _req_GetSceneCollectionList(self, data):
+        return {
+            "currentSceneCollectionName": self.state.collection,
+            "sceneCollections": [self.state.collection],
+        }
+
+    # Scenes
+
+    def _req_GetSceneList(self, data):
+        count = len(self.state.scenes)
+        return {
+            "currentProgramSceneName": self.state.current_scene,
+            "currentPreviewSceneName": None,
+            "scenes": [
+                {"sceneIndex": count - 1 - i, "sceneName": name}
+                for i, name in enumerate(self.state.scenes)
+            ],
+        }
+
+    def _req_GetCurrentProgramScene(self, data):
+        return {
+            "currentProgramSceneName": self.state.current_scene,
+            "sceneName": self.state.current_scene,
+        }
+
+    def _req_SetCurrentProgramScene(self, data):
+        (scene,) = self._require(data, "sceneName")
+        if scene not in self.state.scenes:
+            raise RequestError(_RESOURCE_NOT_FOUND, "No scene was found")
+        self.state.current_scene = scene
+        self.emit(
+            "CurrentProgramSceneChanged", _SUB_SCENES, {"sceneName": scene}
+        )
+
+    def _req_CreateScene(self, data):
+        (scene,) = self._require(data, "sceneName")
+        if scene in self.state.items:
+            raise RequestError(_RESOURCE_ALREADY_EXISTS)
+        self.state.add_scene(scene)
+        self.emit("SceneCreated", _SUB_SCENES, {"sceneName": scene})
+        self.emit("SceneListChanged", _SUB_SCENES, self._req_GetSceneList({}))
+
+    def _req_RemoveScene(self, data):
+        (scene,) = self._require(data, "sceneName")
+        self._container(scene)
+        self.state.scenes.remove(scene)
+        del self.state.items[scene]
+        self.emit("SceneRemoved", _SUB_SCENES, {"sceneName": scene})
+        self.emit("SceneListChanged", _SUB_SCENES, self._req_GetSceneList({}))
+
+    # Scene items
+
+    def _req_GetSceneItemList(self, data):
+        (scene,) = self._require(data, "sceneName")
+        return {"sceneItems": [dict(it) for it in self._container(scene)]}
+
+    def _req_GetGroupSceneItemList(self, data):
+        (group,) = self._require(data, "sceneName")
+        return {
+            "sceneItems": [dict(it) for it in self._container(group, True)]
+        }
+
+    def _req_GetSceneItemEnabled(self, data):
+        _, item = self._item(data)
+        return {"sceneItemEnabled": item["sceneItemEnabled"]}
+
+    def _req_SetSceneItemEnabled(self, data):
+        container, item = self._item(data)
+        (enabled,) = self._require(data, "sceneItemEnabled")
+        item["sceneItemEnabled"] = enabled
+        self.emit(
+            "SceneItemEnableStateChanged",
+            _SUB_SCENEITEMS,
+            {
+                "sceneName": container,
+                "sceneItemId": item["sceneItemId"],
+                "sceneItemEnabled": enabled,
+            },
+        )
+
+    def _req_GetSceneItemTransform(self, data):
+        _, item = self._item(data)
+        return {"sceneItemTransform": item["sceneItemTransform"]}
+
+    def _req_CreateSceneItem(self, data):
+        scene, source = self._require(data, "sceneName", "sourceName")
+        self._container(scene)
+        self._input(source)
+        item = self.state.add_item(scene, source)
+        self.emit(
+            "SceneItemCreated",
+            _SUB_SCENEITEMS,
+            {
+                "sceneName": scene,
+                "sourceName": source,
+                "sceneItemId": item["sceneItemId"],
+                "sceneItemIndex": item["sceneItemIndex"],
+            },
+        )
+        return {"sceneItemId": item["sceneItemId"]}
+
+    def _req_RemoveSceneItem(self, data):
+        container, item = self._item(data)
+        self.state.items[container].remove(item)
+        self.emit(
+            "SceneItemRemoved",
+            _SUB_SCENEITEMS,
+            {
+                "sceneName": container,
+                "sourceName": item["sourceName"],
+                "sceneItemId": item["sceneItemId"],
+            },
+        )
+
+    # Inputs
+
+    def _req_GetInputList(self, data):
+        kind = data.get("inputKind")
+        return {
+            "inputs": [
+                {
+                    "inputName": name,
+                    "inputKind": info["inputKind"],
+                    "unversionedInputKind": info["unversionedInputKind"],
+                }
+                for name, info in self.state.inputs.items()
+                if info and (kind is None or info["inputKind"] == kind)
+            ]
+        }
+
+    def _req_GetInputSettings(self, data):
+        (name,) = self._require(data, "inputName")
+        info = self._input(name)
+        defaults = _DEFAULT_SETTINGS.get(info["inputKind"], {})
+        return {
+            "inputKind": info["inputKind"],
+            "inputSettings": {
+                key: value
+                for key, value in info["settings"].items()
+                if key not in defaults or defaults[key] != value
+            },
+        }
+
+    def _req_GetInputDefaultSettings(self, data):
+        (kind,) = self._require(data, "inputKind")
+        return {"defaultInputSettings": dict(_DEFAULT_SETTINGS.get(kind, {}))}
+
+    def _req_SetInputSettings(self, data):
+        name, settings = self._require(data, "inputName", "inputSettings")
+        info = self._input(name)
+        if data.get("overlay", True):
+            info["settings"].update(settings)
+        else:
+            info["settings"] = dict(settings)
+        self.emit(
+            "InputSettingsChanged",
+            _SUB_INPUTS,
+            {"inputName": name, "inputSettings": dict(info["settings"])},
+        )
+
+    def _req_GetInputMute(self, data):
+        (name,) = self._require(data, "inputName")
+        return {"inputMuted": self._input(name, audio=True)["muted"]}
+
+    def _req_SetInputMute(self, data):
+        name, muted = self._require(data, "inputName", "inputMuted")
+        self._input(name, audio=True)["muted"] = muted
+        self.emit(
+            "InputMuteStateChanged",
+            _SUB_INPUTS,
+            {"inputName": name, "inputMuted": muted},
+        )
+
+    def _req_ToggleInputMute(self, data):
+        (name,) = self._require(data, "inputName")
+        info = self._input(name, audio=True)
+        self._req_SetInputMute(
+            {"inputName": name, "inputMuted": not info["muted"]}
+        )
+        return {"inputMuted": info["muted"]}
+
+    def _req_SetInputName(self, data):
+        name, new_name = self._require(data, "inputName", "newInputName")
+        self._input(name)
+        state = self.state
+        state.inputs = {
+            (new_name if key == name else key): value
+            for key, value in state.inputs.items()
+        }
+        state.filters[new_name] = state.filters.pop(name, [])
+        for items in state.items.values():
+            for item in items:
+                if item["sourceName"] == name:
+                    item["sourceName"] = new_name
+        self.emit(
+            "InputNameChanged",
+            _SUB_INPUTS,
+            {"oldInputName": name, "inputName": new_name},
+        )
+
+    def _req_GetSourceActive(self, data):
+        (name,) = self._require(data, "sourceName")
+        if name not in self.state.inputs and name not in self.state.items:
+            raise RequestError(_RESOURCE_NOT_FOUND)
+        showing = any(
+            it["sourceName"] == name and it["sceneItemEnabled"]
+            for it in self.state.items.get(self.state.current_scene, [])
+        )
+        return {"videoActive": showing, "videoShowing": showing}
+
+    def _req_GetSourceScreenshot(self, data):
+        name, image_format = self._require(data, "sourceName", "imageFormat")
+        if name not in self.state.inputs and name not in self.state.items:
+            raise RequestError(_RESOURCE_NOT_FOUND)
+        width = data.get("imageWidth") or 320
+        height = data.get("imageHeight") or 180
+        return {
+            "imageData": self.state.screenshot(width, height, image_format)
+        }
+
+    # Filters
+
+    def _req_GetSourceFilterList(self, data):
+        (source,) = self._require(data, "sourceName")
+        return {"filters": [dict(f) for f in self._filters(source)]}
+
+    def _req_GetSourceFilter(self, data):
+        filter_ = self._filter(data)
+        return {
+            "filterEnabled": filter_["filterEnabled"],
+            "filterIndex": filter_["filterIndex"],
+            "filterKind": filter_["filterKind"],
+            "filterSettings": filter_["filterSettings"],
+        }
+
+    def _req_SetSourceFilterEnabled(self, data):
+        filter_ = self._filter(data)
+        (enabled,) = self._require(data, "filterEnabled")
+        filter_["filterEnabled"] = enabled
+        self.emit(
+            "SourceFilterEnableStateChanged",
+            _SUB_FILTERS,
+            {
+                "sourceName": data["sourceName"],
+                "filterName": data["filterName"],
+                "filterEnabled": enabled,
+            },
+        )
+
+    def _req_SetSourceFilterSettings(self, data):
+        filter_ = self._filter(data)
+        (settings,) = self._require(data, "filterSettings")
+        if data.get("overlay", True):
+            filter_["filterSettings"].update(settings)
+        else:
+            filter_["filterSettings"] = dict(settings)
+
+    def _req_CreateSourceFilter(self, data):
+        source, name, kind = self._require(
+            data, "sourceName", "filterName", "filterKind"
+        )
+        self._filters(source)
+        self.state.add_filter(source, name, kind)
+        self.emit(
+            "SourceFilterCreated",
+            _SUB_FILTERS,
+            {"sourceName": source, "filterName": name, "filterKind": kind},
+        )
+
+    def _req_RemoveSourceFilter(self, data):
+        filter_ = self._filter(data)
+        self.state.filters[data["sourceName"]].remove(filter_)
+        self.emit(
+            "SourceFilterRemoved",
+            _SUB_FILTERS,
+            {
+                "sourceName": data["sourceName"],
+                "filterName": data["filterName"],
+            },
+        )
+
+    # Outputs
+
+    def _output_status(self, output):
+        active = self.state.outputs[output]
+        status = {"outputActive": active}
+        if output in ("stream", "record"):
+            started = self.state.output_started.get(output)
+            duration = time.monotonic() - started if active and started else 0
+            status.update(
+                {
+                    "outputDuration": int(duration * 1000),
+                    "outputBytes": int(duration * 750_000),
+                    "outputTimecode": time.strftime(
+                        "%H:%M:%S.000", time.gmtime(duration)
+                    ),
+                }
+            )
+        if output == "stream":
+            status.update(
+                {
+                    "outputReconnecting": False,
+                    "outputCongestion": 0.0,
+                    "outputSkippedFrames": int(duration * 0.1),
+                    "outputTotalFrames": int(duration * 60),
+                }
+            )
+        if output == "record":
+            status["outputPaused"] = False
+        return status
+
+    def _set_output(self, output, active):
+        if self.state.outputs[output] == active:
+            raise RequestError(
+                _OUTPUT_RUNNING if active else _OUTPUT_NOT_RUNNING
+            )
+        self.state.outputs[output] = active
+        self.state.output_started[output] = time.monotonic()
+        event = {
+            "stream": "StreamStateChanged",
+            "record": "RecordStateChanged",
+            "replay": "ReplayBufferStateChanged",
+            "virtualcam": "VirtualcamStateChanged",
+        }[output]
+        self.emit(
+            event,
+            _SUB_OUTPUTS,
+            {
+                "outputActive": active,
+                "outputState": (
+                    "OBS_WEBSOCKET_OUTPUT_STARTED"
+                    if active
+                    else "OBS_WEBSOCKET_OUTPUT_STOPPED"
+                ),
+            },
+        )
+
+    def _toggle_output(self, output):
+        self._set_output(output, not self.state.outputs[output])
+        return {"outputActive": self.state.outputs[output]}
+
+    def _req_GetStreamStatus(self, data):
+        return self._output_status("stream")
+
+    def _req_StartStream(self, data):
+        self._set_output("stream", True)
+
+    def _req_StopStream(self, data):
+        self._set_output("stream", False)
+
+    def _req_ToggleStream(self, data):
+        return self._toggle_output("stream")
+
+    def _req_GetRecordStatus(self, data):
+        return self._output_status("record")
+
+    def _req_StartRecord(self, data):
+        self._set_output("record", True)
+
+    def _req_StopRecord(self, data):
+        self._set_output("record", False)
+        return {"outputPath": "/tmp/mock-recording.mkv"}
+
+    def _req_ToggleRecord(self, data):
+        return self._toggle_output("record")
+
+    def _req_GetReplayBufferStatus(self, data):
+        return self._output_status("replay")
+
+    def _req_StartReplayBuffer(self, data):
+        self._set_output("replay", True)
+
+    def _req_StopReplayBuffer(self, data):
+        self._set_output("replay", False)
+
+    def _req_ToggleReplayBuffer(self, data):
+        return self._toggle_output("replay")
+
+    def _req_SaveReplayBuffer(self, data):
+        if not self.state.outputs["replay"]:
+            raise RequestError(_OUTPUT_NOT_RUNNING)
+
+    def _req_GetVirtualCamStatus(self, data):
+        return self._output_status("virtualcam")
+
+    def _req_StartVirtualCam(self, data):
+        self._set_output("virtualcam", True)
+
+    def _req_StopVirtualCam(self, data):
+        self._set_output("virtualcam", False)
+
+    def _req_ToggleVirtualCam(self, data):
+        return self._toggle_output("virtualcam")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Mock OBS websocket server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4455)
+    parser.add_argument("--password", default=None)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Delay in seconds before answering each message",
+    )
+    parser.add_argument(
+        "--no-batch",
+        dest="batch_support",
+        action="store_false",
+        default=True,
+        help="Reject RequestBatch messages like an old server would",
+    )
+    parser.add_argument("--scenes", type=int, default=0)
+    parser.add_argument("--items", type=int, default=10)
+    parser.add_argument("--groups", type=int, default=0)
+    return parser.parse_args()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args()
+    state = (
+        ObsState.synthetic(args.scenes, args.items, args.groups)
+        if args.scenes
+        else ObsState.default()
+    )
+    server = MockObsServer(
+        state,
+        host=args.host,
+        port=args.port,
+        password=args.password,
+        latency=args.latency,
+        batch_support=args.batch_support,
+    )
+
+    async def run():
+        await server.start()
+        LOGGER.info(f"Listening on ws://{server.host}:{server.port}")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Start-up benchmark: imports obs_cli under `python -X importtime` and
+# parses a few command lines that do not need OBS, then checks the total
+# import time against a budget and that modules meant to be loaded lazily
+# were not. A few commands are also run against the mock OBS server
+# (mock_obs.py), to check that output which does not need rich does not
+# load it. Exits non-zero on regression.
+#
+#   python benchmarks/startup.py [--budget MS] [--runs N]
+
+import argparse
+import os
+import subprocess
+import sys
+
+from mock_obs import MockObsServer, ObsState
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Command line -> modules that must not be imported while handling it
+SCENARIOS = (
+    (["-V"], ("rich", "asyncio", "obsws_python", "websocket")),
+    (["-q", "stream", "status"], ("rich",)),
+    (["stream", "status"], ("rich",)),
+    (["scene", "list", "--json"], ("rich",)),
+    (["item", "list", "--json"], ("rich",)),
+    (["input", "list", "--json"], ("rich",)),
+)
+
+# Only parse the arguments: connecting is what loads obsws_python, and
+# rendering happens after that.
+SNIPPET = """
+import sys
+import obs_cli
+try:
+    obs_cli.parse_args(sys.argv[1:])
+except SystemExit:
+    pass
+"""
+
+# Commands run against the mock server -> modules they must not import
+COMMANDS = (
+    (["scene", "current"], ("rich",)),
+    (["scene", "list", "--json"], ("rich",)),
+    (["input", "list", "--json"], ("rich",)),
+    (["-q", "stream", "status"], ("rich",)),
+)
+
+# Runs the command, then lists the loaded modules as the last line of
+# stderr
+COMMAND_SNIPPET = """
+import sys
+import obs_cli
+try:
+    rc = obs_cli.main(sys.argv[1:])
+except SystemExit as exc:
+    rc = exc.code
+sys.stderr.write("\\n" + " ".join(sys.modules) + "\\n")
+sys.exit(rc)
+"""
+
+
+def parse_importtime(stderr):
+    # Lines look like "import time: self [us] | cumulative | module", with
+    # the module name indented by nesting depth
+    total = 0
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        modules.add(name.strip())
+        if not name.startswith("  "):
+            total += int(cumulative)
+    return total / 1000, modules
+
+
+def run(argv):
+    env = dict(os.environ)
+    # Byte code caching is part of a normal start-up
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SNIPPET, *argv],
+        cwd=REPO,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(proc.stderr)
+
+
+def run_command(server, argv):
+    # Returns the loaded modules
+    proc = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            COMMAND_SNIPPET,
+            "--no-daemon",
+            "-H",
+            server.host,
+            "-P",
+            str(server.port),
+            *argv,
+        ],
+        cwd=REPO,
+        capture_output=True,
+        text=True,
+    )
+    # -q commands exit 1 for "no"
+    if proc.returncode not in (0, 1):
+        raise RuntimeError(f"obs-cli {' '.join(argv)}: {proc.stderr}")
+    return set(proc.stderr.splitlines()[-1].split())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=float(os.environ.get("OBS_CLI_STARTUP_BUDGET", 60)),
+        help="Maximum total import time in ms ($OBS_CLI_STARTUP_BUDGET, "
+        "default: 60)",
+    )
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=5,
+        help="Runs per command line, the fastest one counts (default: 5)",
+    )
+    args = parser.parse_args()
+
+    # Warm up the byte code cache
+    run(["-V"])
+
+    failed = False
+    for argv, forbidden in SCENARIOS:
+        results = [run(argv) for _ in range(args.runs)]
+        best = min(total for total, _ in results)
+        loaded = sorted(
+            module
+            for module in set.union(*(modules for _, modules in results))
+            if module.split(".")[0] in forbidden
+        )
+        ok = best <= args.budget and not loaded
+        failed = failed or not ok
+        print(
+            f"{'ok' if ok else 'FAIL':4}  {best:7.1f} ms  "
+            f"obs-cli {' '.join(argv)}"
+        )
+        if loaded:
+            print(f"      unexpected imports: {', '.join(loaded)}")
+
+    server = MockObsServer(ObsState.default()).start_in_thread()
+    try:
+        for argv, forbidden in COMMANDS:
+            loaded = sorted(
+                {
+                    module.split(".")[0]
+                    for module in run_command(server, argv)
+                }.intersection(forbidden)
+            )
+            failed = failed or bool(loaded)
+            print(f"{'FAIL' if loaded else 'ok':4}  {'':>10}  ", end="")
+            print(f"obs-cli {' '.join(argv)} (run)")
+            if loaded:
+                print(f"      unexpected imports: {', '.join(loaded)}")
+    finally:
+        server.stop_thread()
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
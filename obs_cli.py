@@ -3,23 +3,248 @@
 
 import argparse
 import base64
+import contextlib
+import fnmatch
+import functools
+import importlib.util
+import io
+import itertools
 import json
 import logging
+import math
 import os
 import re
+import shlex
 import sys
-from importlib import metadata
-
-import obsws_python as obs
-from rich import print, print_json
-from rich.columns import Columns
-from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
-from rich.text import Text
+import threading
+import time
+
 from rich_argparse import RichHelpFormatter
 
 
+def lazy_import(name):
+    # The module is only executed on first attribute access. Commands
+    # forwarded to the daemon never touch asyncio and obsws_python.
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+asyncio = lazy_import("asyncio")
+obs = lazy_import("obsws_python")
+
+
+# --trace: spans of time spent connecting, waiting for requests and
+# rendering output, collected from every thread. They are summed up on
+# stderr at exit and can be written as Chrome trace events (chrome://tracing,
+# Perfetto). Spans of one category may overlap, e.g. requests sent
+# together, and are merged for the totals.
+class Tracer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.start = time.monotonic()
+        # (category, name, start, end, thread, info)
+        self.spans = []
+        # request type -> [count, sent, received, total time, max time]
+        self.requests = {}
+
+    def add(self, category, name, start, end, **info):
+        with self.lock:
+            self.spans.append(
+                (category, name, start, end, threading.get_native_id(), info)
+            )
+
+    @contextlib.contextmanager
+    def span(self, category, name=None, **info):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(
+                category, name or category, start, time.monotonic(), **info
+            )
+
+    def add_request(
+        self, request_type, start, data, response, sent_size, received_size
+    ):
+        end = time.monotonic()
+        info = {"sent": sent_size, "received": received_size}
+        if request_type == "RequestBatch":
+            info["requests"] = [
+                request["requestType"] for request in data["requests"]
+            ]
+        elif response is not None:
+            info["status"] = response["requestStatus"]["code"]
+        else:
+            info["status"] = "no response"
+        self.add("request", request_type, start, end, **info)
+        with self.lock:
+            stats = self.requests.setdefault(request_type, [0, 0, 0, 0, 0])
+            stats[0] += len(info.get("requests", ())) or 1
+            stats[1] += sent_size or 0
+            stats[2] += received_size or 0
+            stats[3] += end - start
+            stats[4] = max(stats[4], end - start)
+
+    def merged(self, *categories):
+        # Total time covered by spans of these categories, and the number
+        # of separate stretches, i.e. round trips for requests
+        total = 0
+        count = 0
+        until = None
+        for _, _, start, end, _, _ in sorted(
+            (span for span in self.spans if span[0] in categories),
+            key=lambda span: span[2],
+        ):
+            if until is None or start > until:
+                count += 1
+                total += end - start
+                until = end
+            elif end > until:
+                total += end - until
+                until = end
+        return total, count
+
+    def report(self, stream):
+        elapsed = time.monotonic() - self.start
+        loading, _ = self.merged("import")
+        connect, connections = self.merged("connect")
+        waiting, round_trips = self.merged("request")
+        rendering, _ = self.merged("render")
+        busy, _ = self.merged("import", "connect", "request", "render")
+        stats = self.requests.values()
+        requests = sum(stat[0] for stat in stats)
+        sent = sum(stat[1] for stat in stats)
+        received = sum(stat[2] for stat in stats)
+
+        def ms(seconds):
+            return f"{seconds * 1000:7.1f} ms"
+
+        def plural(count, word):
+            return f"{count} {word}{'' if count == 1 else 's'}"
+
+        lines = [
+            f"trace: {plural(requests, 'request')} in "
+            f"{plural(round_trips, 'round trip')}, "
+            f"{format_size(sent)} sent, {format_size(received)} received",
+            f"  loading modules {ms(loading)}",
+            f"  connect/auth    {ms(connect)}  "
+            f"({plural(connections, 'connection')})",
+            f"  waiting on OBS  {ms(waiting)}",
+            f"  rendering       {ms(rendering)}",
+            f"  other           {ms(elapsed - busy)}",
+            f"  total           {ms(elapsed)}",
+        ]
+        if self.requests:
+            lines.append(
+                f"  {'REQUEST':26} {'COUNT':>5} {'SENT':>9} "
+                f"{'RECEIVED':>9} {'TOTAL':>10} {'MAX':>10}"
+            )
+            for request_type, stat in sorted(
+                self.requests.items(), key=lambda item: -item[1][3]
+            ):
+                count, sent, received, total, longest = stat
+                lines.append(
+                    f"  {request_type[:26]:26} {count:>5} "
+                    f"{format_size(sent):>9} {format_size(received):>9} "
+                    f"{ms(total)} {ms(longest)}"
+                )
+        stream.write("".join(f"{line}\n" for line in lines))
+        stream.flush()
+
+    def write_chrome_trace(self, path):
+        pid = os.getpid()
+        events = [
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": round((start - self.start) * 1e6, 1),
+                "dur": round((end - start) * 1e6, 1),
+                "pid": pid,
+                "tid": thread,
+                "args": info,
+            }
+            for category, name, start, end, thread, info in self.spans
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+# Set by main() with --trace
+TRACER = None
+
+
+def trace_span(category, name=None, **info):
+    if TRACER is None:
+        return contextlib.nullcontext()
+    return TRACER.span(category, name, **info)
+
+
+def traced(category, name=None):
+    # Decorator recording calls as spans when tracing
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if TRACER is None:
+                return fn(*args, **kwargs)
+            with TRACER.span(category, name or fn.__name__):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def format_size(size):
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024 or unit == "MiB":
+            break
+        size /= 1024
+    return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+
+
+# rich is imported when something is actually rendered with it. Output that
+# would come out the same without it (JSON and fixed words to a pipe,
+# --quiet) skips it, as importing rich takes longer than most commands.
+def rich_output():
+    if "rich" in sys.modules:
+        # The daemon reconfigures rich to match each client's terminal
+        import rich
+
+        return rich.get_console().is_terminal
+    return sys.stdout.isatty() or bool(os.environ.get("FORCE_COLOR"))
+
+
+@traced("render")
+def print(*objects, **kwargs):
+    from rich import print as rich_print
+
+    rich_print(*objects, **kwargs)
+
+
+@traced("render")
+def print_json(json_str=None, *, data=None):
+    if rich_output():
+        from rich import print_json as rich_print_json
+
+        rich_print_json(json_str, data=data)
+        return
+    if json_str is not None:
+        data = json.loads(json_str)
+    sys.stdout.write(json.dumps(data, indent=2, ensure_ascii=False) + "\n")
+
+
+@traced("render")
+def print_word(word):
+    # Plain words look the same with rich, no need to load it
+    sys.stdout.write(f"{word}\n")
+
+
 def get_version():
     pyproject = os.path.join(
         os.path.dirname(os.path.abspath(__file__)),
@@ -38,6 +263,8 @@ def get_version():
     except FileNotFoundError:
         pass
 
+    from importlib import metadata
+
     try:
         return metadata.version("obs-cli")
     except metadata.PackageNotFoundError as exc:
@@ -63,17 +290,24 @@ def format_fps(video):
     denominator = video.get("fps_denominator")
 
     if numerator is None or denominator in (None, 0):
-        return _NA
+        return na()
 
     fps = numerator / denominator
     return f"{fps:.3f}".rstrip("0").rstrip(".")
 
 
 def get_obs_info(cl):
-    version = response_to_dict(cl.get_version())
-    stats = response_to_dict(cl.get_stats())
-    video = response_to_dict(cl.get_video_settings())
-    studio_mode = response_to_dict(cl.get_studio_mode_enabled())
+    version, stats, video, studio_mode = (
+        response_to_dict(res)
+        for res in cl.send_many(
+            (
+                "GetVersion",
+                "GetStats",
+                "GetVideoSettings",
+                "GetStudioModeEnabled",
+            )
+        )
+    )
 
     return {
         "obs": {
@@ -117,21 +351,76 @@ def get_obs_info(cl):
     }
 
 
-def parse_args():
+def parse_duration(value):
+    # "250ms", "1.5s", "2m" or plain seconds
+    match = re.fullmatch(r"(\d+(?:\.\d*)?|\.\d+)\s*(ms|s|m)?", value.strip())
+    if not match or float(match.group(1)) <= 0:
+        raise argparse.ArgumentTypeError(f"invalid duration: '{value}'")
+    number, unit = match.groups()
+    return float(number) * {"ms": 0.001, "s": 1, "m": 60, None: 1}[unit]
+
+
+# argparse's version action, but only looking the version up when asked
+class VersionAction(argparse.Action):
+    def __init__(self, option_strings, dest=argparse.SUPPRESS, **kwargs):
+        super().__init__(
+            option_strings,
+            dest,
+            nargs=0,
+            default=argparse.SUPPRESS,
+            help="show program's version number and exit",
+            **kwargs,
+        )
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        sys.stdout.write(f"{get_version()}\n")
+        parser.exit()
+
+
+def build_parser():
     parser = argparse.ArgumentParser(formatter_class=RichHelpFormatter)
     parser.add_argument("-D", "--debug", action="store_true", default=False)
     parser.add_argument("-q", "--quiet", action="store_true", default=False)
+    parser.add_argument("-V", "--version", action=VersionAction)
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        default=False,
+        help="Print a timing report of requests, connecting and rendering "
+        "to stderr",
+    )
     parser.add_argument(
-        "-V",
-        "--version",
-        action="version",
-        version=get_version(),
+        "--trace-file",
+        help="Also write the trace as Chrome trace JSON to this file "
+        "(implies --trace)",
     )
     parser.add_argument(
         "-H",
         "--host",
-        default=os.environ.get("OBS_API_HOST", "localhost"),
-        help="host name default: localhost ($OBS_API_HOST)",
+        action="append",
+        default=None,
+        help="host name, or host:port, default: localhost ($OBS_API_HOST). "
+        "Repeat to run the command on several hosts",
+    )
+    parser.add_argument(
+        "--hosts",
+        dest="hosts_file",
+        default=os.environ.get("OBS_CLI_HOSTS"),
+        help="File listing hosts to run the command on, one "
+        "'host[:port] [password]' per line ($OBS_CLI_HOSTS)",
+    )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=16,
+        help="Hosts to run the command on at once (default: 16)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=parse_duration,
+        default=None,
+        help="Timeout for connecting and for each request, e.g. 5s "
+        "(default: none, 10s with several hosts)",
     )
     parser.add_argument(
         "-P",
@@ -147,6 +436,19 @@ def parse_args():
         default=os.environ.get("OBS_API_PASSWORD"),
         help="password ($OBS_API_PASSWORD)",
     )
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        default=bool(os.environ.get("OBS_CLI_NO_DAEMON")),
+        help="Connect directly even if a daemon is running "
+        "($OBS_CLI_NO_DAEMON)",
+    )
+    parser.add_argument(
+        "--socket",
+        default=os.environ.get("OBS_CLI_SOCKET"),
+        help="Daemon socket path ($OBS_CLI_SOCKET, default: per host/port "
+        "in $XDG_RUNTIME_DIR)",
+    )
     parser.add_argument("-j", "--json", action="store_true", default=False)
     output_group = parser.add_mutually_exclusive_group()
     output_group.add_argument(
@@ -164,7 +466,11 @@ def parse_args():
         help="Force the existing table output",
     )
 
-    subparsers = parser.add_subparsers(dest="command", required=True)
+    # Passing prog saves argparse formatting a usage string (and rich_argparse
+    # importing rich) just to derive it
+    subparsers = parser.add_subparsers(
+        dest="command", required=True, prog=parser.prog
+    )
 
     # Shared parent so subcommands also accept -j/--json after their name.
     # argument_default=SUPPRESS means the subparser never writes a default
@@ -242,6 +548,20 @@ def parse_args():
         default=-1,
         help="Compression quality -1 to 100 (-1 = OBS default)",
     )
+    scene_parser.add_argument(
+        "--every",
+        type=parse_duration,
+        default=None,
+        help="Take a screenshot at this interval, e.g. 500ms, writing "
+        "numbered files (-o frame-%%04d.png)",
+    )
+    scene_parser.add_argument(
+        "--count",
+        type=int,
+        default=None,
+        help="Number of screenshots to take (default with --every: until "
+        "interrupted)",
+    )
 
     group_parser = subparsers.add_parser(
         "group",
@@ -260,7 +580,11 @@ def parse_args():
         help="list/show/hide/toggle",
     )
     group_parser.add_argument(
-        "group", nargs="?", help="group to interact with"
+        "group",
+        nargs="*",
+        help="Groups to interact with: names, ranked by exact, case-"
+        "insensitive, prefix, substring, regex and fuzzy match (an error if "
+        "several rank the same), or globs and /regexes/ (every match)",
     )
 
     item_parser = subparsers.add_parser(
@@ -279,7 +603,14 @@ def parse_args():
         nargs="?",
         help="list/show/hide/toggle/screenshot",
     )
-    item_parser.add_argument("ITEM", nargs="?", help="Item to interact with")
+    item_parser.add_argument(
+        "ITEM",
+        nargs="*",
+        help="Items to interact with: names, ranked by exact, case-"
+        "insensitive, prefix, substring, regex and fuzzy match (an error if "
+        "several rank the same), or globs and /regexes/ (every match). "
+        "Several items change on the same frame",
+    )
     item_parser.add_argument(
         "-o",
         "--output",
@@ -310,6 +641,20 @@ def parse_args():
         default=-1,
         help="Compression quality -1 to 100 (-1 = OBS default)",
     )
+    item_parser.add_argument(
+        "--every",
+        type=parse_duration,
+        default=None,
+        help="Take a screenshot at this interval, e.g. 500ms, writing "
+        "numbered files (-o frame-%%04d.png)",
+    )
+    item_parser.add_argument(
+        "--count",
+        type=int,
+        default=None,
+        help="Number of screenshots to take (default with --every: until "
+        "interrupted)",
+    )
 
     input_parser = subparsers.add_parser(
         "input",
@@ -328,14 +673,39 @@ def parse_args():
             "unmute",
             "toggle-mute",
             "is-muted",
+            "meter",
         ],
         default="list",
         nargs="?",
-        help="list/show/get/set/mute/unmute/toggle-mute/is-muted",
+        help="list/show/get/set/mute/unmute/toggle-mute/is-muted/meter",
+    )
+    input_parser.add_argument(
+        "INPUT", nargs="?", help="Input name, for meter also a glob"
     )
-    input_parser.add_argument("INPUT", nargs="?", help="Input name")
     input_parser.add_argument("PROPERTY", nargs="?", help="Property name")
     input_parser.add_argument("VALUE", nargs="?", help="Property value")
+    # meter takes any number of inputs
+    input_parser.add_argument("MORE", nargs="*", help=argparse.SUPPRESS)
+    input_parser.add_argument(
+        "-i",
+        "--interval",
+        type=parse_duration,
+        default=0.25,
+        help="meter: time between updates, e.g. 100ms (default: 250ms)",
+    )
+    input_parser.add_argument(
+        "--hold",
+        type=parse_duration,
+        default=2.0,
+        help="meter: how long peaks are held (default: 2s)",
+    )
+    input_parser.add_argument(
+        "-n",
+        "--count",
+        type=int,
+        default=None,
+        help="meter: exit after this many updates",
+    )
 
     filter_parser = subparsers.add_parser(
         "filter",
@@ -350,8 +720,25 @@ def parse_args():
         nargs="?",
         help="list/toggle/enable/disable/status",
     )
-    filter_parser.add_argument("INPUT", nargs="?", help="Input name")
+    filter_parser.add_argument(
+        "INPUT",
+        nargs="?",
+        help="Input or scene name, for list also a glob matching several",
+    )
     filter_parser.add_argument("FILTER", nargs="?", help="Filter name")
+    filter_parser.add_argument(
+        "-a",
+        "--all",
+        action="store_true",
+        default=False,
+        help="list: the filters of every input and scene",
+    )
+    filter_parser.add_argument(
+        "--settings",
+        action="store_true",
+        default=False,
+        help="list: include filter settings",
+    )
 
     hotkey_parser = subparsers.add_parser(
         "hotkey",
@@ -381,12 +768,25 @@ def parse_args():
         nargs="?",
         help="list/screenshot/active",
     )
-    source_parser.add_argument("SOURCE", nargs="?", help="Source name")
+    source_parser.add_argument(
+        "SOURCE",
+        nargs="*",
+        help="Source name. screenshot takes several names and globs, e.g. "
+        "'Cam*'",
+    )
     source_parser.add_argument(
         "-o",
         "--output",
         default=None,
-        help="Output file (required without --raw/--json)",
+        help="Output file (required without --raw/--json), a directory for "
+        "several sources",
+    )
+    source_parser.add_argument(
+        "-a",
+        "--all",
+        action="store_true",
+        default=False,
+        help="Screenshot all sources",
     )
     source_parser.add_argument(
         "--raw",
@@ -412,6 +812,20 @@ def parse_args():
         default=-1,
         help="Compression quality -1 to 100 (-1 = OBS default)",
     )
+    source_parser.add_argument(
+        "--every",
+        type=parse_duration,
+        default=None,
+        help="Take a screenshot at this interval, e.g. 500ms, writing "
+        "numbered files (-o frame-%%04d.png)",
+    )
+    source_parser.add_argument(
+        "--count",
+        type=int,
+        default=None,
+        help="Number of screenshots to take (default with --every: until "
+        "interrupted)",
+    )
 
     virtualcam_parser = subparsers.add_parser(
         "virtualcam", parents=[_common], formatter_class=RichHelpFormatter
@@ -424,8 +838,49 @@ def parse_args():
         help="status/start/stop/toggle",
     )
 
+    # status --watch of stream and record
+    _output_watch = argparse.ArgumentParser(add_help=False)
+    _output_watch.add_argument(
+        "-w",
+        "--watch",
+        action="store_true",
+        default=False,
+        help="status: keep sampling the bitrate and, for stream, dropped "
+        "frames and congestion",
+    )
+    _output_watch.add_argument(
+        "-i",
+        "--interval",
+        type=parse_duration,
+        default=1.0,
+        help="--watch: time between samples, e.g. 500ms (default: 1s)",
+    )
+    _output_watch.add_argument(
+        "--window",
+        type=parse_duration,
+        default=10.0,
+        help="--watch: time span of the rolling values (default: 10s)",
+    )
+    _output_watch.add_argument(
+        "-n",
+        "--count",
+        type=int,
+        default=None,
+        help="--watch: exit after this many samples",
+    )
+    _output_watch.add_argument(
+        "--min-bitrate",
+        type=float,
+        default=None,
+        metavar="KBPS",
+        help="--watch: exit 1 once the rolling bitrate is below this, or "
+        "the output is not active",
+    )
+
     stream_parser = subparsers.add_parser(
-        "stream", parents=[_common], formatter_class=RichHelpFormatter
+        "stream",
+        parents=[_common, _output_watch],
+        formatter_class=RichHelpFormatter,
     )
     stream_parser.add_argument(
         "action",
@@ -434,10 +889,29 @@ def parse_args():
         nargs="?",
         help="status/start/stop/toggle",
     )
+    stream_parser.add_argument(
+        "--max-dropped",
+        type=float,
+        default=None,
+        metavar="PERCENT",
+        help="--watch: exit 1 once the rolling share of dropped frames is "
+        "above this",
+    )
+    stream_parser.add_argument(
+        "--max-congestion",
+        type=float,
+        default=None,
+        help="--watch: exit 1 once the rolling congestion (0 to 1) is above "
+        "this",
+    )
 
     record_parser = subparsers.add_parser(
-        "record", parents=[_common], formatter_class=RichHelpFormatter
+        "record",
+        parents=[_common, _output_watch],
+        formatter_class=RichHelpFormatter,
     )
+    # Recordings have no dropped frames or congestion
+    record_parser.set_defaults(max_dropped=None, max_congestion=None)
     record_parser.add_argument(
         "action",
         choices=["status", "start", "stop", "toggle"],
@@ -457,168 +931,1440 @@ def parse_args():
         help="status/start/stop/toggle",
     )
 
-    return parser.parse_args()
-
-
-class ObsItemNotFoundException(ValueError):
-    pass
-
-
-class ObsSceneNotFoundException(ValueError):
-    pass
-
-
-def get_scene_names(cl):
-    return sorted(
-        (scene.get("sceneName") for scene in cl.get_scene_list().scenes)
+    batch_parser = subparsers.add_parser(
+        "batch", parents=[_common], formatter_class=RichHelpFormatter
     )
-
-
-def switch_to_scene(cl, scene, exact=False, ignorecase=True):
-    if not scene:
-        raise ValueError("Missing scene name")
-
-    regex = re.compile(
-        (f"^{re.escape(scene)}$" if exact else re.escape(scene)),
-        re.IGNORECASE if ignorecase else re.NOFLAG,
+    batch_parser.add_argument(
+        "FILE",
+        nargs="?",
+        default="-",
+        help="File with one command per line (default: stdin)",
     )
-    scene_names = get_scene_names(cl)
-    for scene_name in scene_names:
-        if re.search(regex, scene_name):
-            cl.set_current_program_scene(scene_name)
-            return True
-
-    available_scenes = "\n".join(f"  - '{name}'" for name in scene_names)
-    raise ObsSceneNotFoundException(
-        f"Scene not found: '{scene}'\nAvailable scenes:\n{available_scenes}"
+    batch_parser.add_argument(
+        "-e",
+        "--stop-on-error",
+        action="store_true",
+        default=False,
+        help="Stop at the first failing command",
     )
 
-
-def get_items(
-    cl, scene=None, names_only=False, recurse=True, include_groups=False
-):
-    scene = scene or get_current_scene_name(cl)
-    items = cl.get_scene_item_list(scene).scene_items
-    if recurse:
-        all_items = []
-        for it in items:
-            if it.get("isGroup"):
-                if include_groups:
-                    all_items.append(it)
-                for grp_it in cl.get_group_scene_item_list(
-                    it.get("sourceName")
-                ).scene_items:
-                    # Inject parent group attribute
-                    grp_it["parentGroup"] = it
-                    all_items.append(grp_it)
-            else:
-                all_items.append(it)
-        items = all_items
-
-    items = sorted(
-        items,
-        key=lambda x: (
-            x.get("parentGroup") is None,  # Items with parentGroup come first
-            (
-                x.get("parentGroup", {}).get("sourceName")
-                if x.get("parentGroup")
-                else None
-            ),  # Then sort by parentGroup.sourceName
-            x.get("sourceName"),  # Finally, sort by sourceName
-        ),
+    apply_parser = subparsers.add_parser(
+        "apply", parents=[_common], formatter_class=RichHelpFormatter
     )
-
-    return [x.get("sourceName") for x in items] if names_only else items
-
-
-def get_groups(cl, scene=None, names_only=False):
-    scene = scene or get_current_scene_name(cl)
-    groups = sorted(
-        [
-            x
-            for x in cl.get_scene_item_list(scene).scene_items
-            if x.get("isGroup", False)
-        ],
-        key=lambda x: x.get("sourceName"),
+    apply_parser.add_argument(
+        "FILE",
+        help="JSON file with the desired item visibility per scene, and "
+        "mute state, settings and filters per input",
+    )
+    apply_parser.add_argument(
+        "-n",
+        "--dry-run",
+        action="store_true",
+        default=False,
+        help="Only print the changes that would be made",
     )
 
-    return [x.get("sourceName") for x in groups] if names_only else groups
-
+    snapshot_parser = subparsers.add_parser(
+        "snapshot", parents=[_common], formatter_class=RichHelpFormatter
+    )
+    snapshot_parser.add_argument(
+        "-o",
+        "--output",
+        default="-",
+        help="File to write to (default: stdout)",
+    )
+    snapshot_parser.add_argument(
+        "--ndjson",
+        action="store_true",
+        default=None,
+        help="One JSON record per line (default for .ndjson/.jsonl files)",
+    )
 
-def get_item_by_name(
-    cl, item, ignorecase=True, exact=False, scene=None, is_group=False
-):
-    items = get_items(cl, scene) if not is_group else get_groups(cl, scene)
-    regex = re.compile(
-        item if not exact else f"^{item}$",
-        re.IGNORECASE if ignorecase else re.NOFLAG,
+    watch_parser = subparsers.add_parser(
+        "watch", parents=[_common], formatter_class=RichHelpFormatter
+    )
+    watch_parser.add_argument(
+        "CATEGORY",
+        nargs="*",
+        help="Event categories to subscribe to, e.g. scenes, outputs, "
+        "inputvolumemeters (default: low_volume, i.e. all but the "
+        "high-volume ones)",
+    )
+    watch_parser.add_argument(
+        "-n",
+        "--count",
+        type=int,
+        default=None,
+        help="Exit after this many events",
     )
-    for it in items:
-        if re.search(regex, it.get("sourceName")):
-            return it
 
-    raise ObsItemNotFoundException(
-        f"Item not found: '{item}' (Scene: '{scene}')"
+    stats_parser = subparsers.add_parser(
+        "stats", parents=[_common], formatter_class=RichHelpFormatter
+    )
+    stats_parser.add_argument(
+        "-i",
+        "--interval",
+        type=parse_duration,
+        default=1.0,
+        help="Time between samples, e.g. 250ms (default: 1s)",
+    )
+    stats_parser.add_argument(
+        "-w",
+        "--window",
+        type=parse_duration,
+        default=10.0,
+        help="Time span of the rolling min/avg/p95/max (default: 10s)",
+    )
+    stats_parser.add_argument(
+        "-n",
+        "--count",
+        type=int,
+        default=None,
+        help="Exit after this many samples",
     )
 
+    exporter_parser = subparsers.add_parser(
+        "exporter", parents=[_common], formatter_class=RichHelpFormatter
+    )
+    exporter_parser.add_argument(
+        "-l",
+        "--listen",
+        type=parse_listen_address,
+        default=os.environ.get("OBS_CLI_EXPORTER_LISTEN", ":9455"),
+        help="Address to serve /metrics and /healthz on "
+        "($OBS_CLI_EXPORTER_LISTEN, default: :9455)",
+    )
+    exporter_parser.add_argument(
+        "-i",
+        "--interval",
+        type=parse_duration,
+        default=5.0,
+        help="Time between samples of OBS (default: 5s)",
+    )
 
-def get_item_id(cl, item, scene=None, is_group=False):
-    data = get_item_by_name(cl, item, scene=scene, is_group=is_group)
-    return data.get("sceneItemId", -1)
+    daemon_parser = subparsers.add_parser(
+        "daemon", parents=[_common], formatter_class=RichHelpFormatter
+    )
+    daemon_parser.add_argument(
+        "action",
+        choices=["run", "status", "stop"],
+        default="run",
+        nargs="?",
+        help="run/status/stop",
+    )
 
+    completion_parser = subparsers.add_parser(
+        "completion", parents=[_common], formatter_class=RichHelpFormatter
+    )
+    completion_parser.add_argument(
+        "action",
+        choices=["bash", "zsh", "fish", "refresh"],
+        help="Print the completion script for bash/zsh/fish, or refresh "
+        "the name cache completion reads from",
+    )
 
-def get_item_parent(cl, item, scene=None):
-    data = get_item_by_name(cl, item, scene=scene)
-    parent_group = data.get("parentGroup")
-    return parent_group.get("sourceName") if parent_group else scene
+    return parser
+
+
+# Positionals each input action takes. meter takes any number of inputs,
+# which spill over from INPUT into PROPERTY, VALUE and MORE.
+_INPUT_POSITIONALS = {
+    "list": 0,
+    "show": 2,
+    "get": 2,
+    "set": 3,
+    "mute": 1,
+    "unmute": 1,
+    "toggle-mute": 1,
+    "is-muted": 1,
+}
+
+
+def parse_args(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if _COMMAND_ALIASES.get(args.command, args.command) == "input":
+        positionals = [
+            value
+            for value in (args.INPUT, args.PROPERTY, args.VALUE, *args.MORE)
+            if value is not None
+        ]
+        limit = _INPUT_POSITIONALS.get(args.action)
+        if limit is not None and len(positionals) > limit:
+            subparsers = parser._subparsers._group_actions[0]
+            subparsers.choices[args.command].error(
+                f"{args.action}: unexpected arguments: "
+                f"{' '.join(positionals[limit:])}"
+            )
+    args.hosts = [
+        parse_host(host, args.port, args.password) for host in args.host or []
+    ]
+    if args.hosts_file:
+        args.hosts.extend(
+            read_hosts_file(args.hosts_file, args.port, args.password)
+        )
+    # A host listed twice runs the command once, its output is keyed by host
+    unique = {}
+    for host in args.hosts:
+        unique.setdefault(host[:2], host)
+    args.hosts = list(unique.values())
+    if not args.hosts:
+        args.hosts = [
+            parse_host(
+                os.environ.get("OBS_API_HOST", "localhost"),
+                args.port,
+                args.password,
+            )
+        ]
+    args.host, args.port, args.password = args.hosts[0]
+    args.trace = args.trace or bool(args.trace_file)
+    if len(args.hosts) > 1 and args.timeout is None:
+        args.timeout = 10.0
+    return args
 
 
-def is_item_enabled(cl, item, scene=None, is_group=False):
-    data = get_item_by_name(cl, item=item, is_group=is_group, scene=scene)
-    return data.get("sceneItemEnabled")
+class ObsItemNotFoundException(ValueError):
+    pass
 
 
-def show_item(cl, item, scene=None, is_group=False):
-    scene = scene or get_current_scene_name(cl)
-    item_id = get_item_id(cl, item=item, scene=scene, is_group=is_group)
-    parent = scene if is_group else get_item_parent(cl, item, scene)
-    return cl.set_scene_item_enabled(parent, item_id, True)
+class ObsSceneNotFoundException(ValueError):
+    pass
 
 
-def hide_item(cl, item, scene=None, is_group=False):
-    scene = scene or get_current_scene_name(cl)
-    item_id = get_item_id(cl, item=item, scene=scene, is_group=is_group)
-    parent = scene if is_group else get_item_parent(cl, item, scene)
-    return cl.set_scene_item_enabled(parent, item_id, False)
+class ObsAmbiguousNameException(ValueError):
+    pass
 
 
-def toggle_item(cl, item, scene=None, is_group=False):
-    scene = scene or get_current_scene_name(cl)
-    item_id = get_item_id(cl, item=item, scene=scene, is_group=is_group)
-    parent = scene if is_group else get_item_parent(cl, item, scene)
-    enabled = not is_item_enabled(
-        cl, item=item, scene=scene, is_group=is_group
-    )
-    return cl.set_scene_item_enabled(parent, item_id, enabled)
+# obs-websocket RequestBatchExecutionType values
+BATCH_SERIAL_REALTIME = 0
+BATCH_SERIAL_FRAME = 1
+BATCH_PARALLEL = 2
 
+# RFC 6455 handshake GUID
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
 
-def get_current_scene_name(cl):
-    return cl.get_current_program_scene().current_program_scene_name
 
+class ObsConnectionClosedException(ConnectionError):
+    def __init__(self, code):
+        super().__init__(f"Connection closed by OBS (code {code})")
+        self.code = code
 
-def get_inputs(cl):
-    return sorted(cl.get_input_list().inputs, key=lambda x: x.get("inputName"))
 
+def mask_payload(data, mask):
+    # XOR of the whole payload with the repeated 4-byte mask, as one int
+    size = len(data)
+    key = (mask * (size // 4 + 1))[:size]
+    return (int.from_bytes(data, "big") ^ int.from_bytes(key, "big")).to_bytes(
+        size, "big"
+    )
 
-def get_input_settings(cl, input):
-    return cl.get_input_settings(input).input_settings
 
+def auth_response(password, salt, challenge):
+    import hashlib
 
-def set_input_setting(cl, input, key, value):
+    secret = base64.b64encode(
+        hashlib.sha256((password + salt).encode()).digest()
+    )
+    return base64.b64encode(
+        hashlib.sha256(secret + challenge.encode()).digest()
+    ).decode()
+
+
+# obs-websocket v5 client on asyncio streams, with just enough of RFC 6455
+# for it. Requests are multiplexed by requestId: any number of them can be
+# in flight on the one connection, each with its own timeout, and a reader
+# task hands every response to the request waiting for it. A request that
+# times out or is cancelled stops waiting, its late response is dropped.
+# Events are only sent by OBS after subscribe(), and the reader task hands
+# them to on_event.
+class AsyncClient:
+    def __init__(self, reader, writer, timeout=None):
+        self.reader = reader
+        self.writer = writer
+        self.timeout = timeout
+        # Close code once the connection is gone
+        self.close_code = None
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._reader_task = None
+        # Called with (event type, data) for every event, see subscribe()
+        self.on_event = None
+
+    @classmethod
+    async def connect(
+        cls, host="localhost", port=4455, password="", timeout=None
+    ):
+        try:
+            return await asyncio.wait_for(
+                cls._open(host, port, password, timeout), timeout
+            )
+        except asyncio.TimeoutError as exc:
+            raise obs.error.OBSSDKTimeoutError(
+                f"Timeout while connecting to {host}:{port}"
+            ) from exc
+
+    @classmethod
+    async def _open(cls, host, port, password, timeout):
+        with trace_span("connect", "tcp"):
+            reader, writer = await asyncio.open_connection(host, port)
+        self = cls(reader, writer, timeout)
+        try:
+            with trace_span("connect", "websocket handshake"):
+                await self._handshake(host, port)
+            identifying = time.monotonic()
+            hello = await self._recv()
+            if hello is None:
+                raise ObsConnectionClosedException(self.close_code)
+            identify = {"rpcVersion": 1, "eventSubscriptions": 0}
+            auth = json.loads(hello)["d"].get("authentication")
+            if auth:
+                if not password:
+                    raise obs.error.OBSSDKError(
+                        "authentication enabled but no password provided"
+                    )
+                identify["authentication"] = auth_response(
+                    password, auth["salt"], auth["challenge"]
+                )
+            await self._send({"op": 1, "d": identify})
+            identified = await self._recv()
+            if identified is None or json.loads(identified)["op"] != 2:
+                raise obs.error.OBSSDKError(
+                    "failed to identify client with the server, please "
+                    "check connection settings"
+                )
+            if TRACER is not None:
+                TRACER.add(
+                    "connect", "identify", identifying, time.monotonic()
+                )
+        except BaseException:
+            writer.close()
+            raise
+        self._reader_task = asyncio.ensure_future(self._read_responses())
+        return self
+
+    async def _handshake(self, host, port):
+        import hashlib
+
+        key = base64.b64encode(os.urandom(16)).decode()
+        # IPv6 addresses are bracketed in the Host header
+        if ":" in host:
+            host = f"[{host}]"
+        self.writer.write(
+            (
+                "GET / HTTP/1.1\r\n"
+                f"Host: {host}:{port}\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Key: {key}\r\n"
+                "Sec-WebSocket-Version: 13\r\n"
+                "Sec-WebSocket-Protocol: obswebsocket.json\r\n\r\n"
+            ).encode()
+        )
+        await self.writer.drain()
+        status = await self.reader.readline()
+        headers = {}
+        while True:
+            line = (await self.reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        accept = base64.b64encode(
+            hashlib.sha1((key + _WS_GUID).encode()).digest()
+        ).decode()
+        if status.split()[1:2] != [b"101"] or (
+            headers.get("sec-websocket-accept") != accept
+        ):
+            raise obs.error.OBSSDKError(
+                f"websocket handshake failed: {status.decode().strip()}"
+            )
+
+    def _write_frame(self, opcode, payload):
+        size = len(payload)
+        if size < 126:
+            length = bytes([0x80 | size])
+        elif size < 1 << 16:
+            length = bytes([0x80 | 126]) + size.to_bytes(2, "big")
+        else:
+            length = bytes([0x80 | 127]) + size.to_bytes(8, "big")
+        mask = os.urandom(4)
+        self.writer.write(
+            bytes([0x80 | opcode])
+            + length
+            + mask
+            + mask_payload(payload, mask)
+        )
+
+    async def _send(self, message):
+        # Returns the size of the message
+        if self.close_code is not None:
+            raise ObsConnectionClosedException(self.close_code)
+        payload = json.dumps(message).encode()
+        self._write_frame(0x1, payload)
+        await self.writer.drain()
+        return len(payload)
+
+    async def _recv(self):
+        # The next message, or None once the connection is closed
+        fragments = []
+        try:
+            while True:
+                head = await self.reader.readexactly(2)
+                opcode = head[0] & 0x0F
+                size = head[1] & 0x7F
+                if size == 126:
+                    size = int.from_bytes(
+                        await self.reader.readexactly(2), "big"
+                    )
+                elif size == 127:
+                    size = int.from_bytes(
+                        await self.reader.readexactly(8), "big"
+                    )
+                mask = (
+                    await self.reader.readexactly(4)
+                    if head[1] & 0x80
+                    else None
+                )
+                payload = await self.reader.readexactly(size)
+                if mask:
+                    payload = mask_payload(payload, mask)
+                if opcode == 0x8:
+                    self.close_code = (
+                        int.from_bytes(payload[:2], "big")
+                        if len(payload) >= 2
+                        else 1005
+                    )
+                    return None
+                if opcode == 0x9:
+                    self._write_frame(0xA, payload)
+                elif opcode != 0xA:
+                    fragments.append(payload)
+                    if head[0] & 0x80:
+                        return b"".join(fragments)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            self.close_code = 1006
+            return None
+
+    async def _read_responses(self):
+        try:
+            while True:
+                message = await self._recv()
+                if message is None:
+                    break
+                received = time.monotonic()
+                size = len(message)
+                message = json.loads(message)
+                if message.get("op") in (7, 9):
+                    future = self._pending.get(message["d"].get("requestId"))
+                    if future is not None and not future.done():
+                        future.set_result((message["d"], received, size))
+                elif message.get("op") == 5 and self.on_event is not None:
+                    self.on_event(
+                        message["d"].get("eventType"),
+                        message["d"].get("eventData") or {},
+                    )
+        finally:
+            if self.close_code is None:
+                self.close_code = 1006
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(
+                        ObsConnectionClosedException(self.close_code)
+                    )
+
+    async def _request(self, op, data, timeout=None):
+        # Returns (response, sent, received) with monotonic times
+        request_id = data["requestId"] = f"{op}-{next(self._ids)}"
+        request_type = data.get("requestType", "RequestBatch")
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        start = time.monotonic()
+        response = sent_size = received_size = None
+        try:
+            sent_size = await self._send({"op": op, "d": data})
+            sent = time.monotonic()
+            response, received, received_size = await asyncio.wait_for(
+                future, self.timeout if timeout is None else timeout
+            )
+        except asyncio.TimeoutError as exc:
+            raise obs.error.OBSSDKTimeoutError(
+                f"Timeout while waiting for a response to {request_type}"
+            ) from exc
+        finally:
+            del self._pending[request_id]
+            if TRACER is not None:
+                TRACER.add_request(
+                    request_type,
+                    start,
+                    data,
+                    response,
+                    sent_size,
+                    received_size,
+                )
+        return response, sent, received
+
+    async def timed_request(
+        self, request_type, request_data=None, timeout=None
+    ):
+        return await self._request(
+            6,
+            {
+                "requestType": request_type,
+                **({"requestData": request_data} if request_data else {}),
+            },
+            timeout,
+        )
+
+    async def request(self, request_type, request_data=None, timeout=None):
+        response, _, _ = await self.timed_request(
+            request_type, request_data, timeout
+        )
+        return response
+
+    async def gather(self, requests, timeout=None):
+        # Sends all requests at once, responses are in request order
+        responses = await asyncio.gather(
+            *(
+                self.request(request_type, request_data, timeout)
+                for request_type, request_data in requests
+            ),
+            return_exceptions=True,
+        )
+        for response in responses:
+            if isinstance(response, BaseException):
+                raise response
+        return responses
+
+    async def request_batch(
+        self,
+        requests,
+        halt_on_failure=False,
+        execution_type=BATCH_SERIAL_REALTIME,
+        timeout=None,
+    ):
+        # Results of a RequestBatch in request order. Requests skipped by
+        # haltOnFailure have no result.
+        response, _, _ = await self._request(
+            8,
+            {
+                "haltOnFailure": halt_on_failure,
+                "executionType": execution_type,
+                "requests": [
+                    {
+                        "requestType": request_type,
+                        "requestId": str(index),
+                        **(
+                            {"requestData": request_data}
+                            if request_data
+                            else {}
+                        ),
+                    }
+                    for index, (request_type, request_data) in enumerate(
+                        requests
+                    )
+                ],
+            },
+            timeout,
+        )
+        results = {
+            result.get("requestId"): result
+            for result in response.get("results", [])
+        }
+        return [
+            results[str(index)]
+            for index in range(len(requests))
+            if str(index) in results
+        ]
+
+    async def subscribe(self, subs):
+        # Changes the event subscriptions of this connection (Reidentify)
+        await self._send({"op": 3, "d": {"eventSubscriptions": subs}})
+
+    async def close(self):
+        if self.close_code is None:
+            with contextlib.suppress(ConnectionError):
+                self._write_frame(0x8, (1000).to_bytes(2, "big"))
+                await self.writer.drain()
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._reader_task
+        self.writer.close()
+        with contextlib.suppress(ConnectionError):
+            await self.writer.wait_closed()
+
+
+# Synchronous client for the CLI: a thin wrapper that runs AsyncClient on
+# a private event loop. Independent requests go out together with
+# send_many() and come back after one round trip. Several requests can
+# also go out in one RequestBatch: servers that reject batches (they close
+# the connection with UnknownOpCode) are detected once, after which we
+# reconnect and fall back to separate requests. Mixed into obs.ReqClient
+# by get_client_class() for its request methods (get_scene_list() and so
+# on), so that obsws_python is only loaded once we connect. ReqClient's own
+# connection is never opened: its methods end up in send(), and all
+# requests and the events of watch and input meter go over AsyncClient.
+# Events are only handled while the loop runs, i.e. during requests and
+# wait(), which is why ObsIndex has a connection of its own.
+class ClientMixin:
+    def __init__(self, **kwargs):
+        self.connect_kwargs = kwargs
+        self.loop = asyncio.new_event_loop()
+        self.conn = None
+        self.batch_supported = True
+        # Individual requests and websocket round trips sent so far
+        self.request_count = 0
+        self.round_trips = 0
+        # ObsIndex caching name lookups, attached by long-lived modes
+        self.index = None
+        # Listings fetched so far, for the completion name cache
+        self.names = []
+        try:
+            self.reconnect()
+        except BaseException:
+            self.loop.close()
+            raise
+
+    def __repr__(self):
+        return "{}(host={host!r}, port={port}, timeout={timeout})".format(
+            type(self).__name__, **self.connect_kwargs
+        )
+
+    def run(self, coro):
+        # Runs coro on the client's loop. If we are interrupted, the
+        # request is cancelled rather than left behind.
+        task = self.loop.create_task(coro)
+        try:
+            return self.loop.run_until_complete(task)
+        except BaseException:
+            if not task.done():
+                task.cancel()
+                with contextlib.suppress(BaseException):
+                    self.loop.run_until_complete(task)
+            raise
+
+    @property
+    def connected(self):
+        return self.conn is not None and self.conn.close_code is None
+
+    def reconnect(self):
+        if self.conn is not None:
+            self.run(self.conn.close())
+        self.conn = None
+        with trace_span("connect"):
+            self.conn = self.run(AsyncClient.connect(**self.connect_kwargs))
+
+    def disconnect(self):
+        if self.loop.is_closed():
+            return
+        try:
+            if self.conn is not None:
+                self.run(self.conn.close())
+        finally:
+            tasks = asyncio.all_tasks(self.loop)
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                self.loop.run_until_complete(
+                    asyncio.gather(*tasks, return_exceptions=True)
+                )
+            self.loop.close()
+
+    def subscribe(self, subs, callback):
+        # callback(event type, data) is called for every event of the subs
+        # categories while the loop runs, i.e. during requests and wait()
+        self.conn.on_event = callback
+        self.run(self.conn.subscribe(subs))
+
+    def wait(self, seconds):
+        # Lets events come in for a while. False once the connection is
+        # gone.
+        self.run(asyncio.sleep(seconds))
+        return self.conn.close_code is None
+
+    def send(self, param, data=None, raw=False):
+        self.request_count += 1
+        self.round_trips += 1
+        return self._unpack(self.run(self.conn.request(param, data)), raw)
+
+    def send_many(self, requests, raw=False, return_exceptions=False):
+        # Independent requests, all sent at once over the one connection.
+        # Responses are in request order and converted like send() does.
+        # With return_exceptions, failed requests yield their
+        # OBSSDKRequestError instead of raising it.
+        requests = [
+            (req, None) if isinstance(req, str) else req for req in requests
+        ]
+        if not requests:
+            return []
+        self.request_count += len(requests)
+        self.round_trips += 1
+        return [
+            self._unpack(response, raw, return_exceptions)
+            for response in self.run(self.conn.gather(requests))
+        ]
+
+    def send_batch(
+        self,
+        requests,
+        raw=False,
+        halt_on_failure=False,
+        execution_type=BATCH_SERIAL_REALTIME,
+        return_exceptions=False,
+    ):
+        # Like send_many(), but in one RequestBatch that OBS executes in
+        # order (or per execution_type), stopping at the first failure with
+        # halt_on_failure
+        requests = [
+            (req, None) if isinstance(req, str) else req for req in requests
+        ]
+        if not requests:
+            return []
+
+        if self.batch_supported:
+            try:
+                responses = self._request_batch(
+                    requests, halt_on_failure, execution_type
+                )
+            except ObsConnectionClosedException as exc:
+                if exc.code != 4004:
+                    raise
+                LOGGER.debug(
+                    "RequestBatch rejected by server, "
+                    "falling back to sequential requests"
+                )
+                self.batch_supported = False
+                self.reconnect()
+            else:
+                return [
+                    self._unpack(response, raw, return_exceptions)
+                    for response in responses
+                ]
+
+        if execution_type == BATCH_PARALLEL and not halt_on_failure:
+            return self.send_many(requests, raw, return_exceptions)
+        results = []
+        for request_type, request_data in requests:
+            self.request_count += 1
+            self.round_trips += 1
+            response = self.run(self.conn.request(request_type, request_data))
+            result = self._unpack(response, raw, return_exceptions)
+            results.append(result)
+            if halt_on_failure and isinstance(result, obs.error.OBSSDKError):
+                break
+        return results
+
+    def send_pipelined(
+        self,
+        requests,
+        depth=2,
+        raw=False,
+        ordered=True,
+        return_exceptions=False,
+    ):
+        # Sends requests without waiting for the responses to the previous
+        # ones, with up to depth of them in flight. requests may be a
+        # generator that blocks until the next request is due. Yields
+        # (index, response, sent, received) with monotonic send/receive
+        # times, in request order or, with ordered=False, as responses
+        # arrive. Responses are converted like send_batch() does.
+        requests = enumerate(requests)
+        in_flight = {}
+        received = {}
+        next_index = 0
+        try:
+            while True:
+                while len(in_flight) < depth:
+                    index, request = next(requests, (None, None))
+                    if request is None:
+                        break
+                    request_type, request_data = (
+                        (request, None)
+                        if isinstance(request, str)
+                        else request
+                    )
+                    self.request_count += 1
+                    self.round_trips += 1
+                    task = self.loop.create_task(
+                        self.conn.timed_request(request_type, request_data)
+                    )
+                    in_flight[task] = index
+                if not in_flight and not received:
+                    return
+                while not received or (ordered and next_index not in received):
+                    done, _ = self.run(
+                        asyncio.wait(
+                            in_flight, return_when=asyncio.FIRST_COMPLETED
+                        )
+                    )
+                    for task in done:
+                        received[in_flight.pop(task)] = task.result()
+                index = next_index if ordered else next(iter(received))
+                response, sent, received_at = received.pop(index)
+                next_index += 1
+                yield (
+                    index,
+                    self._unpack(response, raw, return_exceptions),
+                    sent,
+                    received_at,
+                )
+        finally:
+            # Abandoned requests, their late responses are dropped
+            for task in in_flight:
+                task.cancel()
+
+    def _request_batch(self, requests, halt_on_failure, execution_type):
+        LOGGER.debug(f"Sending RequestBatch of {len(requests)} requests")
+        self.request_count += len(requests)
+        self.round_trips += 1
+        return self.run(
+            self.conn.request_batch(requests, halt_on_failure, execution_type)
+        )
+
+    def _unpack(self, response, raw=False, return_exceptions=False):
+        status = response["requestStatus"]
+        if not status["result"]:
+            error = obs.error.OBSSDKRequestError(
+                response["requestType"], status["code"], status.get("comment")
+            )
+            if return_exceptions:
+                return error
+            raise error
+        if "responseData" in response:
+            if raw:
+                return response["responseData"]
+            return obs.util.as_dataclass(
+                response["requestType"], response["responseData"]
+            )
+
+
+@functools.cache
+def get_client_class():
+    return type("Client", (ClientMixin, obs.ReqClient), {})
+
+
+# Cache of scene, item, input and filter listings for long-lived modes
+# (daemon, batch). Entries are fetched on first use and then kept fresh
+# from a dedicated event connection: state changes are applied in place,
+# structural changes drop the affected entries. If the event stream drops,
+# everything is dropped and refetched, since changes may have been missed.
+# The event connection is obsws_python's EventClient on purpose: its
+# thread applies events while the daemon is idle between commands, when
+# the Client's loop is not running, so that a command never reads an
+# entry made stale by a change.
+class ObsIndex:
+    def __init__(self, cl):
+        self.cl = cl
+        self.lock = threading.RLock()
+        self.events = None
+        self._generation = 0
+        self._clear()
+        self._subscribe()
+
+    def _subscribe(self):
+        # Events that change what is cached
+        self.events = obs.EventClient(
+            **self.cl.connect_kwargs,
+            subs=obs.Subs.CONFIG
+            | obs.Subs.SCENES
+            | obs.Subs.INPUTS
+            | obs.Subs.FILTERS
+            | obs.Subs.SCENEITEMS,
+        )
+        # EventClient calls callback.trigger(event_type, data)
+        self.events.callback = self
+
+    def close(self):
+        self.events.disconnect()
+
+    def _clear(self):
+        self._generation += 1
+        # ("scene_names",), ("current_scene",), ("items", scene, recurse),
+        # ("inputs",) and ("filters", source) -> what the helpers return
+        self._cache = {}
+        # (scene or group name, sceneItemId) -> cached item dicts
+        self._items_by_id = {}
+
+    def lookup(self, key, fetch):
+        if not self.events.worker.is_alive():
+            LOGGER.debug("Event stream lost, resyncing index")
+            with self.lock:
+                self._clear()
+            self._subscribe()
+        with self.lock:
+            if key in self._cache:
+                return self._cache[key]
+            generation = self._generation
+        value = fetch()
+        with self.lock:
+            # Do not cache what may have been invalidated while fetching
+            if generation == self._generation:
+                self._cache[key] = value
+                if key[0] == "items":
+                    self._add_items(key[1], value)
+        return value
+
+    def _add_items(self, scene, items):
+        for it in items:
+            parent = it.get("parentGroup")
+            container = parent.get("sourceName") if parent else scene
+            self._items_by_id.setdefault(
+                (container, it.get("sceneItemId")), []
+            ).append(it)
+
+    def _invalidate(self, predicate):
+        self._generation += 1
+        for key in [key for key in self._cache if predicate(key)]:
+            del self._cache[key]
+        self._items_by_id = {}
+        for key, value in self._cache.items():
+            if key[0] == "items":
+                self._add_items(key[1], value)
+
+    def _invalidate_items(self, container):
+        # container is a scene or a group, which may be part of any scene
+        self._invalidate(
+            lambda key: key[0] == "items"
+            and (
+                key[1] == container
+                or any(
+                    it.get("isGroup") and it.get("sourceName") == container
+                    for it in self._cache[key]
+                )
+            )
+        )
+
+    def trigger(self, event_type, data):
+        LOGGER.debug(f"Index event: {event_type}")
+        with self.lock:
+            self.handle_event(event_type, data)
+
+    def handle_event(self, event_type, data):
+        if event_type == "CurrentProgramSceneChanged":
+            self._cache[("current_scene",)] = data.get("sceneName")
+        elif event_type == "SceneItemEnableStateChanged":
+            for it in self._items_by_id.get(
+                (data.get("sceneName"), data.get("sceneItemId")), ()
+            ):
+                it["sceneItemEnabled"] = data.get("sceneItemEnabled")
+        elif event_type in (
+            "SceneItemCreated",
+            "SceneItemRemoved",
+            "SceneItemListReindexed",
+        ):
+            self._invalidate_items(data.get("sceneName"))
+        elif event_type in (
+            "SceneCreated",
+            "SceneRemoved",
+            "SceneNameChanged",
+            "SceneListChanged",
+        ):
+            self._invalidate(
+                lambda key: key[0] in ("scene_names", "current_scene", "items")
+            )
+        elif event_type in (
+            "InputCreated",
+            "InputRemoved",
+            "InputNameChanged",
+        ):
+            old_name = data.get("oldInputName")
+            if old_name and ("filters", old_name) in self._cache:
+                self._cache[("filters", data.get("inputName"))] = (
+                    self._cache.pop(("filters", old_name))
+                )
+            self._invalidate(
+                lambda key: key[0] in ("inputs", "items")
+                or key == ("filters", data.get("inputName"))
+            )
+        elif event_type == "SourceFilterEnableStateChanged":
+            for f in self._cache.get(("filters", data.get("sourceName")), ()):
+                if f.get("filterName") == data.get("filterName"):
+                    f["filterEnabled"] = data.get("filterEnabled")
+        elif event_type.startswith("SourceFilter"):
+            self._invalidate(
+                lambda key: key == ("filters", data.get("sourceName"))
+            )
+        elif event_type.startswith("CurrentSceneCollection"):
+            self._clear()
+
+
+def cached(cl, key, fetch):
+    if cl.index is None:
+        value = fetch()
+    else:
+        value = cl.index.lookup(key, fetch)
+    cl.names.append((key, value))
+    return value
+
+
+# Write requests whose data is also the event OBS sends for the change
+_INDEX_WRITES = {
+    "SetCurrentProgramScene": "CurrentProgramSceneChanged",
+    "SetSceneItemEnabled": "SceneItemEnableStateChanged",
+    "SetSourceFilterEnabled": "SourceFilterEnableStateChanged",
+}
+
+
+def notify_index(cl, event_type, data):
+    # Apply our own changes right away instead of waiting for their event
+    if cl.index is not None:
+        cl.index.trigger(event_type, data)
+
+
+def get_scene_names(cl):
+    return list(
+        cached(
+            cl,
+            ("scene_names",),
+            lambda: sorted(
+                scene.get("sceneName") for scene in cl.get_scene_list().scenes
+            ),
+        )
+    )
+
+
+def switch_to_scene(cl, scene, exact=False, ignorecase=True):
+    if not scene:
+        raise ValueError("Missing scene name")
+
+    scene_name = find_scene(
+        get_scene_names(cl), scene, exact=exact, ignorecase=ignorecase
+    )
+    cl.set_current_program_scene(scene_name)
+    notify_index(cl, "CurrentProgramSceneChanged", {"sceneName": scene_name})
+    return True
+
+
+# Finds what the user typed in a list of names, trying in turn: the exact
+# name, the name in another case, names starting with it, names containing
+# it, names it matches as a regex and names within a few typos of it. Within
+# a step, earlier matches and shorter names rank first. Names ranking the
+# same are all returned so that callers can report the ambiguity.
+class NameMatcher:
+    def __init__(self, names, ignorecase=True):
+        self.fold = str.casefold if ignorecase else str
+        self.flags = re.IGNORECASE if ignorecase else 0
+        self.names = set(names)
+        # Folded name -> names, e.g. "scene" -> ["Scene", "SCENE"]
+        self.folded = {}
+        for name in names:
+            self.folded.setdefault(self.fold(name), []).append(name)
+        # Sorted folded names: the ones starting with a prefix are a range
+        self.keys = sorted(self.folded)
+        # Trigram -> folded names, built on the first fuzzy lookup
+        self.trigrams = None
+
+    def match(self, query, exact=False):
+        import bisect
+
+        if query in self.names:
+            return [query]
+        key = self.fold(query)
+        if key in self.folded or exact:
+            return list(self.folded.get(key, []))
+
+        start = bisect.bisect_left(self.keys, key)
+        end = bisect.bisect_left(self.keys, key + "\U0010ffff")
+        if start < end:
+            return self.best(self.keys[start:end], len)
+
+        found = [k for k in self.keys if key in k]
+        if found:
+            return self.best(found, lambda k: (k.find(key), len(k)))
+
+        try:
+            regex = re.compile(query, self.flags)
+        except re.error:
+            regex = None
+        if regex is not None:
+            found = {
+                k: (m.start(), len(k))
+                for k in self.keys
+                for m in [regex.search(self.folded[k][0])]
+                if m
+            }
+            if found:
+                return self.best(found, found.get)
+
+        return self.fuzzy(key)
+
+    def fuzzy(self, key, cutoff=0.6, limit=50):
+        # Like difflib.get_close_matches(), keeping the scores, and only
+        # for the names sharing the most trigrams with key
+        import difflib
+        import heapq
+
+        def trigrams(text):
+            text = f"  {text} "
+            return set(map("".join, zip(text, text[1:], text[2:])))
+
+        if self.trigrams is None:
+            self.trigrams = {}
+            for k in self.keys:
+                for trigram in trigrams(k):
+                    self.trigrams.setdefault(trigram, []).append(k)
+        shared = {}
+        for trigram in trigrams(key):
+            for k in self.trigrams.get(trigram, ()):
+                shared[k] = shared.get(k, 0) + 1
+
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(key)
+        scores = {}
+        for k in heapq.nlargest(limit, shared, key=shared.get):
+            matcher.set_seq1(k)
+            if (
+                matcher.real_quick_ratio() >= cutoff
+                and matcher.quick_ratio() >= cutoff
+                and matcher.ratio() >= cutoff
+            ):
+                scores[k] = -matcher.ratio()
+        return self.best(scores, scores.get) if scores else []
+
+    def best(self, keys, rank):
+        ranks = {k: rank(k) for k in keys}
+        top = min(ranks.values())
+        return [
+            name
+            for k, r in ranks.items()
+            if r == top
+            for name in self.folded[k]
+        ]
+
+
+# Matchers are built once per list of names and reused while it does not
+# change, e.g. for every lookup of a batch or daemon session
+@functools.lru_cache(maxsize=64)
+def get_name_matcher(names, ignorecase=True):
+    return NameMatcher(names, ignorecase)
+
+
+def format_names(names):
+    return ", ".join(f"'{name}'" for name in sorted(names))
+
+
+def find_scene(scene_names, scene, exact=False, ignorecase=True):
+    matches = get_name_matcher(tuple(scene_names), ignorecase).match(
+        scene, exact=exact
+    )
+    if len(matches) == 1:
+        return matches[0]
+    if matches:
+        raise ObsAmbiguousNameException(
+            f"Scene name '{scene}' is ambiguous: {format_names(matches)}"
+        )
+
+    available_scenes = "\n".join(f"  - '{name}'" for name in scene_names)
+    raise ObsSceneNotFoundException(
+        f"Scene not found: '{scene}'\nAvailable scenes:\n{available_scenes}"
+    )
+
+
+def get_items(
+    cl, scene=None, names_only=False, recurse=True, include_groups=False
+):
+    scene = scene or get_current_scene_name(cl)
+    items = [
+        # Copies, callers may modify what they get
+        dict(it)
+        for it in cached(
+            cl,
+            ("items", scene, recurse),
+            lambda: fetch_items(cl, scene, recurse),
+        )
+        if include_groups
+        or not recurse
+        or not it.get("isGroup")
+        or it.get("parentGroup")
+    ]
+    return [x.get("sourceName") for x in items] if names_only else items
+
+
+def fetch_items(cl, scene, recurse=True):
+    # The scene's items, groups included, plus with recurse the items of
+    # every group, fetched all at once
+    items = cl.get_scene_item_list(scene).scene_items
+    if recurse:
+        groups = [it for it in items if it.get("isGroup")]
+        group_lists = cl.send_many(
+            (
+                ("GetGroupSceneItemList", {"sceneName": it.get("sourceName")})
+                for it in groups
+            ),
+            raw=True,
+        )
+        group_items = {
+            id(group): res.get("sceneItems", [])
+            for group, res in zip(groups, group_lists)
+        }
+        all_items = []
+        for it in items:
+            all_items.append(it)
+            if it.get("isGroup"):
+                for grp_it in group_items[id(it)]:
+                    # Inject parent group attribute
+                    grp_it["parentGroup"] = it
+                    all_items.append(grp_it)
+        items = all_items
+
+    return sorted(
+        items,
+        key=lambda x: (
+            x.get("parentGroup") is None,  # Items with parentGroup come first
+            (
+                x.get("parentGroup", {}).get("sourceName")
+                if x.get("parentGroup")
+                else None
+            ),  # Then sort by parentGroup.sourceName
+            x.get("sourceName"),  # Finally, sort by sourceName
+        ),
+    )
+
+
+def get_groups(cl, scene=None, names_only=False):
+    groups = sorted(
+        [
+            x
+            for x in get_items(cl, scene, recurse=False)
+            if x.get("isGroup", False)
+        ],
+        key=lambda x: x.get("sourceName"),
+    )
+
+    return [x.get("sourceName") for x in groups] if names_only else groups
+
+
+def is_candidate(item, is_group=False):
+    # Items of a snapshot from get_item_snapshot() that can be matched:
+    # groups only when is_group is set, and then only top-level ones
+    return bool(item.get("isGroup")) == is_group and not (
+        is_group and item.get("parentGroup")
+    )
+
+
+def match_item(
+    items, item, ignorecase=True, exact=False, scene=None, is_group=False
+):
+    # The same source can be in a scene several times, e.g. in two groups:
+    # its first item is the match, as before
+    candidates = {}
+    for it in items:
+        if is_candidate(it, is_group):
+            candidates.setdefault(it.get("sourceName"), it)
+    matches = get_name_matcher(tuple(candidates), ignorecase).match(
+        item, exact=exact
+    )
+    if len(matches) == 1:
+        return candidates[matches[0]]
+    if matches:
+        raise ObsAmbiguousNameException(
+            f"{'Group' if is_group else 'Item'} name '{item}' is ambiguous "
+            f"(Scene: '{scene}'): {format_names(matches)}"
+        )
+
+    raise ObsItemNotFoundException(
+        f"Item not found: '{item}' (Scene: '{scene}')"
+    )
+
+
+def match_items(items, item, scene=None, is_group=False):
+    # A glob ("Cam*") or a regex between slashes ("/^Cam/") selects every
+    # matching item, anything else the best ranked item, like match_item(),
+    # which raises ObsAmbiguousNameException if several rank the same.
+    # Globs matching nothing are ranked as well, e.g. "Cam.*" as a regex.
+    if len(item) > 2 and item.startswith("/") and item.endswith("/"):
+        try:
+            regex = re.compile(item[1:-1], re.IGNORECASE)
+        except re.error as exc:
+            raise ObsItemNotFoundException(
+                f"Invalid regex '{item}': {exc}"
+            ) from None
+        matches = [
+            it
+            for it in items
+            if is_candidate(it, is_group)
+            and regex.search(it.get("sourceName"))
+        ]
+        if not matches:
+            raise ObsItemNotFoundException(
+                f"No item matches '{item}' (Scene: '{scene}')"
+            )
+        return matches
+    if is_glob(item):
+        regex = re.compile(fnmatch.translate(item), re.IGNORECASE)
+        matches = [
+            it
+            for it in items
+            if is_candidate(it, is_group) and regex.match(it.get("sourceName"))
+        ]
+        if matches:
+            return matches
+    return [match_item(items, item, scene=scene, is_group=is_group)]
+
+
+def get_item_snapshot(cl, scene=None, recurse=True):
+    # Every item of the scene, groups and their children included, from one
+    # GetSceneItemList and GetGroupSceneItemList for every group, sent
+    # together. Resolve as many items as needed against it instead of
+    # re-listing the scene.
+    # Group operations only need the top level (recurse=False).
+    return get_items(cl, scene, recurse=recurse, include_groups=True)
+
+
+def resolve_item(cl, item, scene=None, is_group=False, snapshot=None):
+    scene = scene or get_current_scene_name(cl)
+    if snapshot is None:
+        snapshot = get_item_snapshot(cl, scene)
+    data = match_item(snapshot, item, scene=scene, is_group=is_group)
+    return resolved_item(data, scene, is_group)
+
+
+def resolve_items(cl, items, scene=None, is_group=False, snapshot=None):
+    # Every item matching any of items, each once, from one scene listing
+    scene = scene or get_current_scene_name(cl)
+    if snapshot is None:
+        snapshot = get_item_snapshot(cl, scene)
+    resolved = {}
+    for item in items:
+        for data in match_items(snapshot, item, scene, is_group):
+            resolved.setdefault(id(data), resolved_item(data, scene, is_group))
+    return list(resolved.values())
+
+
+def resolved_item(data, scene, is_group=False):
+    parent_group = data.get("parentGroup")
+    return {
+        "id": data.get("sceneItemId", -1),
+        "parent": (
+            parent_group.get("sourceName")
+            if parent_group and not is_group
+            else scene
+        ),
+        "enabled": data.get("sceneItemEnabled"),
+        "item": data,
+    }
+
+
+def get_item_by_name(
+    cl, item, ignorecase=True, exact=False, scene=None, is_group=False
+):
+    return match_item(
+        get_item_snapshot(cl, scene),
+        item,
+        ignorecase=ignorecase,
+        exact=exact,
+        scene=scene,
+        is_group=is_group,
+    )
+
+
+def get_item_id(cl, item, scene=None, is_group=False):
+    return resolve_item(cl, item, scene=scene, is_group=is_group)["id"]
+
+
+def get_item_parent(cl, item, scene=None):
+    return resolve_item(cl, item, scene=scene)["parent"]
+
+
+def is_item_enabled(cl, item, scene=None, is_group=False):
+    return resolve_item(cl, item, scene=scene, is_group=is_group)["enabled"]
+
+
+def set_items_enabled(
+    cl, items, enabled, scene=None, is_group=False, snapshot=None
+):
+    # Shows or hides every item matching items, enabled=None toggles each
+    # one. Several items change in one RequestBatch executed on a single
+    # frame, so that no mix of old and new state goes on air.
+    requests = [
+        (
+            "SetSceneItemEnabled",
+            {
+                "sceneName": resolved["parent"],
+                "sceneItemId": resolved["id"],
+                "sceneItemEnabled": (
+                    not resolved["enabled"] if enabled is None else enabled
+                ),
+            },
+        )
+        for resolved in resolve_items(
+            cl, items, scene=scene, is_group=is_group, snapshot=snapshot
+        )
+    ]
+    if len(requests) == 1:
+        results = [cl.send(*requests[0])]
+    else:
+        results = cl.send_batch(requests, execution_type=BATCH_SERIAL_FRAME)
+    for _, data in requests:
+        notify_index(cl, "SceneItemEnableStateChanged", data)
+    return results
+
+
+def set_item_enabled(
+    cl, item, enabled, scene=None, is_group=False, snapshot=None
+):
+    # enabled=None toggles the current state
+    return set_items_enabled(
+        cl, [item], enabled, scene=scene, is_group=is_group, snapshot=snapshot
+    )[0]
+
+
+def show_item(cl, item, scene=None, is_group=False, snapshot=None):
+    return set_item_enabled(
+        cl, item, True, scene=scene, is_group=is_group, snapshot=snapshot
+    )
+
+
+def hide_item(cl, item, scene=None, is_group=False, snapshot=None):
+    return set_item_enabled(
+        cl, item, False, scene=scene, is_group=is_group, snapshot=snapshot
+    )
+
+
+def toggle_item(cl, item, scene=None, is_group=False, snapshot=None):
+    return set_item_enabled(
+        cl, item, None, scene=scene, is_group=is_group, snapshot=snapshot
+    )
+
+
+# Item action -> enabled argument of set_items_enabled()
+_ITEM_STATES = {"show": True, "hide": False, "toggle": None}
+
+
+def get_current_scene_name(cl):
+    return cached(
+        cl,
+        ("current_scene",),
+        lambda: cl.get_current_program_scene().current_program_scene_name,
+    )
+
+
+def get_inputs(cl):
+    return [
+        dict(input)
+        for input in cached(
+            cl,
+            ("inputs",),
+            lambda: sorted(
+                cl.get_input_list().inputs, key=lambda x: x.get("inputName")
+            ),
+        )
+    ]
+
+
+def get_input_settings(cl, input):
+    return cl.get_input_settings(input).input_settings
+
+
+def parse_setting_value(value):
     try:
-        value = json.loads(value)
+        return json.loads(value)
     except (ValueError, TypeError):
-        pass
+        return value
+
+
+def set_input_setting(cl, input, key, value):
+    value = parse_setting_value(value)
     LOGGER.debug(f"Setting {key} to {value} ({type(value)})")
     return cl.set_input_settings(input, {key: value}, overlay=True)
 
@@ -627,6 +2373,64 @@ def get_mute_state(cl, input):
     return cl.get_input_mute(input).input_muted
 
 
+# obs-websocket answers GetInputMute on an input without audio with
+# InvalidResourceState
+_INVALID_RESOURCE_STATE = 604
+
+# Whether an input kind has audio, keyed by inputKind. Audio support is a
+# per-kind output flag in OBS, so a single probe per kind is enough.
+_AUDIO_INPUT_KINDS = {}
+
+
+def get_mute_states(cl, inputs):
+    # Returns {inputName: muted}, with None for inputs without audio.
+    # Unknown kinds are probed with one input each first, then the rest of
+    # the audio-capable inputs are fetched all at once. A probe failing for
+    # another reason leaves its kind unknown, so every input of that kind is
+    # asked then, and errors other than "no audio" are raised.
+    states = {input.get("inputName"): None for input in inputs}
+    answered = set()
+    probes = {}
+    for input in inputs:
+        kind = input.get("inputKind")
+        if kind not in _AUDIO_INPUT_KINDS:
+            probes.setdefault(kind, input)
+
+    def fetch(batch, strict):
+        results = cl.send_many(
+            (
+                ("GetInputMute", {"inputName": input.get("inputName")})
+                for input in batch
+            ),
+            raw=True,
+            return_exceptions=True,
+        )
+        for input, res in zip(batch, results):
+            kind = input.get("inputKind")
+            if isinstance(res, obs.error.OBSSDKRequestError):
+                if res.code == _INVALID_RESOURCE_STATE:
+                    _AUDIO_INPUT_KINDS[kind] = False
+                    answered.add(id(input))
+                elif strict:
+                    raise res
+                continue
+            _AUDIO_INPUT_KINDS[kind] = True
+            answered.add(id(input))
+            states[input.get("inputName")] = res.get("inputMuted")
+
+    fetch(list(probes.values()), strict=False)
+    fetch(
+        [
+            input
+            for input in inputs
+            if id(input) not in answered
+            and _AUDIO_INPUT_KINDS.get(input.get("inputKind"), True)
+        ],
+        strict=True,
+    )
+    return states
+
+
 def mute_input(cl, input):
     cl.set_input_mute(input, True)
 
@@ -640,28 +2444,67 @@ def toggle_mute_input(cl, input):
 
 
 def get_filters(cl, input):
-    return cl.get_source_filter_list(input).filters
+    return [
+        dict(f)
+        for f in cached(
+            cl,
+            ("filters", input),
+            lambda: cl.get_source_filter_list(input).filters,
+        )
+    ]
+
+
+def get_all_filters(cl, sources):
+    # {source: filters} for many sources, fetched all at once
+    results = cl.send_many(
+        (
+            ("GetSourceFilterList", {"sourceName": source})
+            for source in sources
+        ),
+        raw=True,
+    )
+    filters = {}
+    for source, res in zip(sources, results):
+        filters[source] = res.get("filters", [])
+        cl.names.append((("filters", source), filters[source]))
+    return filters
 
 
 def is_filter_enabled(cl, source, filter):
+    if cl.index is not None:
+        for f in get_filters(cl, source):
+            if f.get("filterName") == filter:
+                return f.get("filterEnabled")
     return cl.get_source_filter(source, filter).filter_enabled
 
 
+def set_filter_enabled(cl, source, filter, enabled):
+    res = cl.set_source_filter_enabled(source, filter, enabled)
+    notify_index(
+        cl,
+        "SourceFilterEnableStateChanged",
+        {"sourceName": source, "filterName": filter, "filterEnabled": enabled},
+    )
+    return res
+
+
 def enable_filter(cl, source, filter):
-    return cl.set_source_filter_enabled(source, filter, True)
+    return set_filter_enabled(cl, source, filter, True)
 
 
 def disable_filter(cl, source, filter):
-    return cl.set_source_filter_enabled(source, filter, False)
+    return set_filter_enabled(cl, source, filter, False)
 
 
 def toggle_filter(cl, source, filter):
     enabled = is_filter_enabled(cl, source, filter)
-    return cl.set_source_filter_enabled(source, filter, not enabled)
+    return set_filter_enabled(cl, source, filter, not enabled)
 
 
 def get_hotkeys(cl):
-    return cl.get_hot_key_list().hotkeys
+    hotkeys = cl.get_hot_key_list().hotkeys
+    cl.names.append((("hotkeys",), hotkeys))
+    return hotkeys
 
 
 def trigger_hotkey(cl, hotkey):
@@ -716,171 +2559,3246 @@ def replay_toggle(cl):
     return cl.toggle_replay_buffer()
 
 
-def replay_status(cl):
-    return cl.get_replay_buffer_status().output_active
+def replay_status(cl):
+    return cl.get_replay_buffer_status().output_active
+
+
+def record_status(cl):
+    return cl.get_record_status().output_active
+
+
+def record_start(cl):
+    return cl.start_record()
+
+
+def record_stop(cl):
+    return cl.stop_record()
+
+
+def record_toggle(cl):
+    return cl.toggle_record()
+
+
+def source_active(cl, source):
+    res = cl.send("GetSourceActive", {"sourceName": source}, raw=True)
+    return res.get("videoActive", False), res.get("videoShowing", False)
+
+
+def screenshot_payload(
+    source,
+    image_format="png",
+    width=None,
+    height=None,
+    compression_quality=-1,
+):
+    payload = {
+        "sourceName": source,
+        "imageFormat": image_format,
+        "imageCompressionQuality": compression_quality,
+    }
+    if width:
+        payload["imageWidth"] = width
+    if height:
+        payload["imageHeight"] = height
+    return payload
+
+
+def image_data_offset(image_data):
+    # Start of the base64 payload after a data URI prefix (e.g.
+    # "data:image/png;base64,"), found without copying the string
+    return image_data.find(",", 0, 64) + 1
+
+
+def take_screenshot(
+    cl,
+    source,
+    image_format="png",
+    width=None,
+    height=None,
+    compression_quality=-1,
+):
+    # The base64 image data as OBS sent it, see write_screenshot()
+    return cl.send(
+        "GetSourceScreenshot",
+        screenshot_payload(
+            source, image_format, width, height, compression_quality
+        ),
+        raw=True,
+    )["imageData"]
+
+
+def get_screenshot_format(args):
+    fmt = args.format
+    if not fmt and args.output and not args.json:
+        ext = os.path.splitext(args.output)[1].lstrip(".")
+        if ext:
+            fmt = ext.lower()
+    return fmt or "png"
+
+
+def format_frame_path(pattern, index):
+    # printf style frame number as ffmpeg uses it, e.g. frame-%04d.png.
+    # Without one, the number goes before the extension.
+    if re.search(r"%0?\d*d", pattern.replace("%%", "")):
+        return pattern % index
+    root, ext = os.path.splitext(pattern)
+    return f"{root}-{index:06d}{ext}"
+
+
+# Base64 characters handled per write (a multiple of 4), so that a 4K
+# screenshot is never held decoded in memory as a whole
+_IMAGE_DATA_CHUNK = 4 * 64 * 1024
+
+
+def write_image_data(stream, image_data, decode=True):
+    size = 0
+    for start in range(
+        image_data_offset(image_data), len(image_data), _IMAGE_DATA_CHUNK
+    ):
+        end = start + _IMAGE_DATA_CHUNK
+        chunk = image_data[start:end]
+        size += stream.write(base64.b64decode(chunk) if decode else chunk)
+    return size
+
+
+@traced("render")
+def write_screenshot(
+    image_data, fmt, path=None, as_json=False, extra=None, indent=None
+):
+    # image_data is the base64 string from OBS. Without path, screenshots
+    # go to stdout: raw bytes back to back, or JSON objects ending in a
+    # newline. JSON reuses OBS' base64 as is, written around the other
+    # fields (the data comes last). Returns the number of bytes written.
+    if as_json:
+        head, tail = json.dumps(
+            {**(extra or {}), "format": fmt, "data": ""}, indent=indent
+        ).rsplit('""', 1)
+        if not path:
+            tail += "\n"
+        with (
+            open(path, "w") if path else contextlib.nullcontext(sys.stdout)
+        ) as f:
+            size = f.write(f'{head}"')
+            size += write_image_data(f, image_data, decode=False)
+            size += f.write(f'"{tail}')
+            f.flush()
+        return size
+    with (
+        open(path, "wb") if path else contextlib.nullcontext(sys.stdout.buffer)
+    ) as f:
+        size = write_image_data(f, image_data)
+        f.flush()
+    return size
+
+
+# Screenshot requests in flight during a timelapse, so that the next one
+# goes out while the previous response is still on its way
+_SCREENSHOT_PIPELINE_DEPTH = 2
+# Frames waiting to be decoded and written before capturing blocks, bounds
+# memory when the disk cannot keep up
+_SCREENSHOT_MAX_PENDING = 32
+
+
+def run_timelapse(cl, args, source, fmt):
+    from concurrent.futures import ThreadPoolExecutor
+
+    payload = screenshot_payload(
+        source, fmt, args.width, args.height, args.compression_quality
+    )
+    interval = args.every or 0
+    began = start = time.monotonic()
+    # Set by the daemon when the client went away
+    cancelled = getattr(args, "cancelled", None) or threading.Event()
+
+    def requests():
+        nonlocal start
+        indices = (
+            itertools.count() if args.count is None else range(args.count)
+        )
+        for index in indices:
+            delay = start + index * interval - time.monotonic()
+            if cancelled.wait(max(delay, 0)):
+                return
+            if delay <= 0:
+                # Fell behind, keep the spacing rather than catching up
+                start = time.monotonic() - index * interval
+            yield "GetSourceScreenshot", payload
+
+    # Frames for stdout have to stay in order, files can be written in
+    # parallel
+    workers = 1 if args.output is None else min(4, os.cpu_count() or 1)
+    pending = threading.BoundedSemaphore(_SCREENSHOT_MAX_PENDING)
+    errors = []
+
+    def done(future):
+        pending.release()
+        if future.exception() is not None:
+            errors.append(future.exception())
+
+    frames = 0
+    first = last = None
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        for index, res, _, last in cl.send_pipelined(
+            requests(), depth=_SCREENSHOT_PIPELINE_DEPTH, raw=True
+        ):
+            frames = index + 1
+            first = first or last
+            pending.acquire()
+            path = args.output and format_frame_path(args.output, frames)
+            future = pool.submit(
+                write_screenshot, res["imageData"], fmt, path, args.json
+            )
+            future.add_done_callback(done)
+            if errors:
+                break
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+    finally:
+        pool.shutdown()
+    if errors:
+        raise errors[0]
+
+    if not args.quiet and frames:
+        achieved = (frames - 1) / (last - first) if last > first else 0
+        requested = f"{1 / interval:.2f} fps" if interval else "unthrottled"
+        sys.stderr.write(
+            f"{frames} frames in {last - began:.2f}s, "
+            f"{achieved:.2f} fps (requested: {requested})\n"
+        )
+    return 0
+
+
+# Screenshot requests in flight when capturing several sources
+_SCREENSHOT_CONCURRENCY = 4
+
+
+def is_glob(pattern):
+    return any(char in pattern for char in "*?[")
+
+
+def expand_sources(cl, patterns, all_sources=False, scenes=False):
+    # Names as given, globs expanded to the matching inputs, and with
+    # scenes also to the matching scenes
+    names = []
+    if all_sources or any(map(is_glob, patterns)):
+        names = [src.get("inputName") for src in get_inputs(cl)]
+        if scenes:
+            names.extend(get_scene_names(cl))
+    if all_sources:
+        return names
+    sources = []
+    for pattern in patterns:
+        matches = (
+            fnmatch.filter(names, pattern) if is_glob(pattern) else [pattern]
+        )
+        if not matches:
+            raise ObsItemNotFoundException(f"No source matches '{pattern}'")
+        sources.extend(name for name in matches if name not in sources)
+    return sources
+
+
+def screenshot_filename(source, fmt):
+    return f"{source.replace(os.sep, '_')}.{'json' if fmt is None else fmt}"
+
+
+def run_multi_screenshot(cl, args, console, error_console):
+    # Requests are pipelined on the one connection and every screenshot is
+    # written as soon as it arrives. Per source we record the latency and
+    # the time since the previous response (or the request, if later),
+    # which excludes waiting behind other sources: roughly OBS' render
+    # time for that source.
+    from concurrent.futures import ThreadPoolExecutor
+
+    if args.raw or args.every is not None or args.count is not None:
+        print_error(
+            error_console, "--raw, --every and --count take one source"
+        )
+        return 2
+    if not args.output and not args.json:
+        print_error(
+            error_console, "--output directory required without --json"
+        )
+        return 2
+    sources = expand_sources(cl, args.SOURCE, all_sources=args.all)
+    fmt = args.format or "png"
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+
+    requests = [
+        (
+            "GetSourceScreenshot",
+            screenshot_payload(
+                source, fmt, args.width, args.height, args.compression_quality
+            ),
+        )
+        for source in sources
+    ]
+    records = []
+    futures = []
+    previous = time.monotonic()
+    # Only one thread may write to stdout, files can be written in parallel
+    workers = 1 if args.output is None else _SCREENSHOT_CONCURRENCY
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for index, res, sent, received in cl.send_pipelined(
+            requests,
+            depth=_SCREENSHOT_CONCURRENCY,
+            raw=True,
+            ordered=False,
+            return_exceptions=True,
+        ):
+            record = {
+                "source": sources[index],
+                "latency_ms": round((received - sent) * 1000, 3),
+                "render_ms": round((received - max(sent, previous)) * 1000, 3),
+            }
+            previous = received
+            records.append(record)
+            if isinstance(res, obs.error.OBSSDKError):
+                record["error"] = str(res)
+                futures.append(None)
+                if args.output is None:
+                    print_error(error_console, f"{sources[index]}: {res}")
+                continue
+            if args.output:
+                record["file"] = os.path.join(
+                    args.output,
+                    screenshot_filename(
+                        sources[index], None if args.json else fmt
+                    ),
+                )
+            futures.append(
+                pool.submit(
+                    write_screenshot,
+                    res["imageData"],
+                    fmt,
+                    record.get("file"),
+                    args.json,
+                    extra=record,
+                )
+            )
+    for record, future in zip(records, futures):
+        if future is None:
+            continue
+        try:
+            record["bytes"] = future.result()
+        except OSError as exc:
+            record["error"] = str(exc)
+
+    failed = any("error" in record for record in records)
+    if args.output is None or args.quiet:
+        # The screenshots themselves went to stdout
+        return 1 if failed else 0
+    if args.json:
+        print_json(data=records)
+        return 1 if failed else 0
+    table = make_table("source", "file", "bytes", "latency", "render")
+    for record in sorted(records, key=lambda x: -x["render_ms"]):
+        table.add_row(
+            record["source"],
+            record.get("file") or record.get("error"),
+            str(record.get("bytes", "")),
+            f"{record['latency_ms']:.1f} ms",
+            f"{record['render_ms']:.1f} ms",
+        )
+    console.print(table)
+    return 1 if failed else 0
+
+
+def run_screenshot(cl, args, source):
+    if not args.raw and not args.json and not args.output:
+        print(
+            "ERROR: --output required without --raw/--json",
+            file=sys.stderr,
+        )
+        return 2
+    fmt = get_screenshot_format(args)
+    if args.every is not None or args.count is not None:
+        return run_timelapse(cl, args, source, fmt)
+    image_data = take_screenshot(
+        cl,
+        source,
+        image_format=fmt,
+        width=args.width,
+        height=args.height,
+        compression_quality=args.compression_quality,
+    )
+    write_screenshot(
+        image_data,
+        fmt,
+        # --raw wins over --output, as it always did
+        path=None if args.raw and not args.json else args.output,
+        as_json=args.json,
+        indent=None if args.output else 2,
+    )
+    return 0
+
+
+def na():
+    from rich.text import Text
+
+    return Text("N/A", style="bright_black italic")
+
+
+def format_bool(value):
+    from rich.text import Text
+
+    if value:
+        return Text("true", style="bold green")
+    return Text("false", style="bright_black")
+
+
+_COLUMN_STYLES = (
+    "cyan",
+    "green",
+    "magenta",
+    "white",
+    "yellow",
+    "blue",
+    "bright_black",
+    "red",
+)
+
+
+def make_table(*headers):
+    from rich.table import Table
+
+    table = Table(
+        box=None,
+        show_edge=False,
+        pad_edge=False,
+        padding=(0, 2, 0, 0),
+        header_style="bold",
+    )
+    for i, header in enumerate(headers):
+        table.add_column(
+            header.upper(), style=_COLUMN_STYLES[i % len(_COLUMN_STYLES)]
+        )
+    return table
+
+
+def format_info_value(value, suffix=None):
+    from rich.text import Text
+
+    if value is None:
+        return na()
+
+    if isinstance(value, bool):
+        if value:
+            return Text("enabled", style="bold green")
+        return Text("disabled", style="bold red")
+
+    if isinstance(value, float):
+        value = f"{value:.2f}".rstrip("0").rstrip(".")
+
+    if isinstance(value, Text):
+        return value
+
+    text = str(value)
+    if suffix:
+        text = f"{text} {suffix}"
+    return Text(text)
+
+
+def make_info_panel(title, rows, border_style):
+    from rich.panel import Panel
+    from rich.table import Table
+
+    table = Table.grid(expand=True)
+    table.add_column(style="cyan", no_wrap=True)
+    table.add_column(style="white")
+
+    for key, value, *rest in rows:
+        suffix = rest[0] if rest else None
+        table.add_row(key, format_info_value(value, suffix=suffix))
+
+    return Panel(
+        table,
+        title=title,
+        border_style=border_style,
+        padding=(0, 1),
+    )
+
+
+def use_pretty_output(args):
+    return bool(getattr(args, "pretty", False)) and not args.json
+
+
+def render_pretty_panels(console, panels):
+    from rich.columns import Columns
+
+    if not panels:
+        return
+    console.print(Columns(panels, expand=True, equal=True))
+
+
+def render_pretty_hotkeys(console, hotkeys):
+    rows = tuple(
+        (str(index + 1), hotkey) for index, hotkey in enumerate(hotkeys)
+    )
+    console.print(make_info_panel("Hotkeys", rows, "yellow"))
+
+
+def print_error(console, message):
+    console.print(f"[bold red]ERROR:[/bold red] {message}")
+
+
+_COMMAND_ALIASES = {
+    "scenes": "scene",
+    "groups": "group",
+    "items": "item",
+    "inputs": "input",
+    "filters": "filter",
+    "hotkeys": "hotkey",
+    "sources": "source",
+}
+
+# Commands that never go through the daemon
+_LOCAL_COMMANDS = {
+    "daemon",
+    "batch",
+    "watch",
+    "stats",
+    "exporter",
+    "completion",
+}
+
+# Actions that run until interrupted, so they cannot go through the daemon
+# either, nor be part of a batch or run on several hosts. So does --watch,
+# and a timelapse (--every) without --count.
+_LOCAL_ACTIONS = {("input", "meter")}
+
+
+def local_command(args):
+    # The command as shown in errors if it must run on its own, else None
+    action = getattr(args, "action", None)
+    if args.command in _LOCAL_COMMANDS:
+        return args.command
+    if getattr(args, "watch", False):
+        return f"{args.command} {action} --watch"
+    if getattr(args, "every", None) is not None and args.count is None:
+        return f"{args.command} {action} --every without --count"
+    if (_COMMAND_ALIASES.get(args.command, args.command), action) in (
+        _LOCAL_ACTIONS
+    ):
+        return f"{args.command} {action}"
+    return None
+
+
+# Output actions that map to exactly one request
+_OUTPUT_REQUESTS = {
+    ("stream", "start"): "StartStream",
+    ("stream", "stop"): "StopStream",
+    ("stream", "toggle"): "ToggleStream",
+    ("record", "start"): "StartRecord",
+    ("record", "stop"): "StopRecord",
+    ("record", "toggle"): "ToggleRecord",
+    ("virtualcam", "start"): "StartVirtualCam",
+    ("virtualcam", "stop"): "StopVirtualCam",
+    ("virtualcam", "toggle"): "ToggleVirtualCam",
+    ("replay", "start"): "StartReplayBuffer",
+    ("replay", "stop"): "StopReplayBuffer",
+    ("replay", "toggle"): "ToggleReplayBuffer",
+    ("replay", "save"): "SaveReplayBuffer",
+}
+
+
+# Turns batch commands that are only write requests without output into
+# these requests, so consecutive ones can share a RequestBatch. Name lookups
+# are served from state fetched once and updated with the planned changes,
+# so later commands see the effect of earlier ones before they are sent.
+class BatchPlanner:
+    def __init__(self, cl):
+        self.cl = cl
+        self.reset()
+
+    def reset(self):
+        self.scene_names = None
+        self.current_scene = None
+        self.snapshots = {}
+
+    def get_current_scene(self):
+        if self.current_scene is None:
+            self.current_scene = get_current_scene_name(self.cl)
+        return self.current_scene
+
+    def get_snapshot(self, scene):
+        if scene not in self.snapshots:
+            self.snapshots[scene] = get_item_snapshot(self.cl, scene)
+        return self.snapshots[scene]
+
+    def plan(self, args):
+        cmd = _COMMAND_ALIASES.get(args.command, args.command)
+        action = getattr(args, "action", None)
+
+        if (cmd, action) in _OUTPUT_REQUESTS:
+            return [(_OUTPUT_REQUESTS[(cmd, action)], None)]
+
+        if cmd == "scene" and action == "switch" and args.SCENE:
+            if self.scene_names is None:
+                self.scene_names = get_scene_names(self.cl)
+            scene = find_scene(self.scene_names, args.SCENE, exact=args.exact)
+            self.current_scene = scene
+            return [("SetCurrentProgramScene", {"sceneName": scene})]
+
+        is_group = cmd == "group"
+        items = getattr(args, "group" if is_group else "ITEM", None)
+        if (
+            cmd in ("item", "group")
+            and action in ("show", "hide", "toggle")
+            and items
+        ):
+            scene = args.scene or self.get_current_scene()
+            requests = []
+            for resolved in resolve_items(
+                self.cl,
+                items,
+                scene=scene,
+                is_group=is_group,
+                snapshot=self.get_snapshot(scene),
+            ):
+                enabled = _ITEM_STATES[action]
+                if enabled is None:
+                    enabled = not resolved["enabled"]
+                resolved["item"]["sceneItemEnabled"] = enabled
+                requests.append(
+                    (
+                        "SetSceneItemEnabled",
+                        {
+                            "sceneName": resolved["parent"],
+                            "sceneItemId": resolved["id"],
+                            "sceneItemEnabled": enabled,
+                        },
+                    )
+                )
+            return requests
+
+        if cmd == "input" and args.INPUT:
+            if action in ("mute", "unmute"):
+                return [
+                    (
+                        "SetInputMute",
+                        {
+                            "inputName": args.INPUT,
+                            "inputMuted": action == "mute",
+                        },
+                    )
+                ]
+            if action == "toggle-mute":
+                return [("ToggleInputMute", {"inputName": args.INPUT})]
+            if action == "set" and args.PROPERTY and args.VALUE:
+                return [
+                    (
+                        "SetInputSettings",
+                        {
+                            "inputName": args.INPUT,
+                            "inputSettings": {
+                                args.PROPERTY: parse_setting_value(args.VALUE)
+                            },
+                            "overlay": True,
+                        },
+                    )
+                ]
+
+        if cmd == "filter" and action in ("enable", "disable"):
+            return [
+                (
+                    "SetSourceFilterEnabled",
+                    {
+                        "sourceName": args.INPUT,
+                        "filterName": args.FILTER,
+                        "filterEnabled": action == "enable",
+                    },
+                )
+            ]
+
+        if cmd == "hotkey" and action == "trigger" and args.HOTKEY:
+            return [("TriggerHotkeyByName", {"hotkeyName": args.HOTKEY})]
+
+        return None
+
+
+def read_batch_commands(source):
+    for lineno, line in enumerate(source, start=1):
+        argv = shlex.split(line, comments=True)
+        if argv:
+            yield lineno, line.strip(), argv
+
+
+def input_pending(source):
+    # Whether reading the next command will not block, i.e. whether it is
+    # worth holding planned requests back to batch them with it
+    import select
+
+    if source.seekable():
+        return True
+    readable, _, _ = select.select([source], [], [], 0)
+    return bool(readable)
+
+
+def run_batch(cl, args, console, error_console):
+    source = (
+        sys.stdin
+        if args.FILE in (None, "-")
+        else open(args.FILE, encoding="utf-8")
+    )
+    planner = BatchPlanner(cl)
+    pending = []
+    failures = 0
+    stop = False
+
+    def report(lineno, line, rc, error=None):
+        nonlocal failures, stop
+        if rc:
+            failures += 1
+            stop = stop or args.stop_on_error
+            if error is not None:
+                print_error(error_console, f"line {lineno}: {error}")
+        if args.json:
+            sys.stderr.write(
+                json.dumps({"line": lineno, "command": line, "status": rc})
+                + "\n"
+            )
+        elif rc or not args.quiet:
+            sys.stderr.write(f"{lineno}\t{rc}\t{line}\n")
+        sys.stderr.flush()
+
+    def flush():
+        if not pending:
+            return
+        results = iter(
+            cl.send_batch(
+                [
+                    request
+                    for _, _, requests in pending
+                    for request in requests
+                ],
+                halt_on_failure=args.stop_on_error,
+                return_exceptions=True,
+            )
+        )
+        # A line fails if any of its requests does; with halt_on_failure
+        # there are no results past the first failure
+        for lineno, line, requests in pending:
+            done = 0
+            error = None
+            for (request_type, data), res in zip(requests, results):
+                done += 1
+                if isinstance(res, obs.error.OBSSDKError):
+                    error = error or res
+                    continue
+                LOGGER.debug(res)
+                if request_type in _INDEX_WRITES:
+                    notify_index(cl, _INDEX_WRITES[request_type], data)
+            if not done:
+                break
+            report(lineno, line, 1 if error else 0, error)
+        pending.clear()
+
+    with (
+        contextlib.closing(source)
+        if source is not sys.stdin
+        else (contextlib.nullcontext())
+    ):
+        for lineno, line, argv in read_batch_commands(source):
+            if stop:
+                break
+            try:
+                command_args = parse_args(argv)
+            except SystemExit as exc:
+                flush()
+                report(lineno, line, exc.code or 0)
+                continue
+            if local_command(command_args):
+                flush()
+                report(
+                    lineno,
+                    line,
+                    2,
+                    f"'{local_command(command_args)}' cannot be used in a "
+                    "batch",
+                )
+                continue
+
+            try:
+                requests = planner.plan(command_args)
+            except (
+                ObsItemNotFoundException,
+                ObsSceneNotFoundException,
+                ObsAmbiguousNameException,
+            ) as exc:
+                flush()
+                report(lineno, line, 1, exc)
+                continue
+
+            if requests is not None:
+                pending.append((lineno, line, requests))
+                if not input_pending(source):
+                    flush()
+                continue
+
+            flush()
+            try:
+                rc = run_command(cl, command_args, console, error_console)
+            except SystemExit as exc:
+                rc = exc.code
+            report(lineno, line, rc or 0)
+            # The command may have changed anything the planner knows
+            planner.reset()
+        flush()
+
+    return 1 if failures else 0
+
+
+# apply: the state file describes what should be, e.g.
+#
+#   {
+#     "scenes": {
+#       "Live": {
+#         "items": {"Camera": true, "Slides": false},
+#         "filters": {"Color Correction": true}
+#       }
+#     },
+#     "inputs": {
+#       "Mic/Aux": {
+#         "muted": false,
+#         "settings": {"device_id": "default"},
+#         "filters": {"Noise Suppression": true}
+#       }
+#     }
+#   }
+#
+# Items are matched by exact name, in groups too, and every item of that
+# name is changed. Settings are compared key by key and only differing keys
+# are sent.
+_APPLY_SCENE_KEYS = {"items", "filters"}
+_APPLY_INPUT_KEYS = {"muted", "settings", "filters"}
+
+
+def load_state_file(path):
+    with open(path, encoding="utf-8") as f:
+        state = json.load(f)
+
+    # Errors name the JSON path of the bad entry, e.g.
+    # scenes["Live"].items["Camera"]
+    def check(value, path, keys=None):
+        if not isinstance(value, dict):
+            raise ValueError(f"{path} must be an object")
+        unknown = set(value) - keys if keys is not None else ()
+        if unknown:
+            raise ValueError(
+                f"{path}: unknown key '{sorted(unknown)[0]}' (expected "
+                f"{', '.join(sorted(keys))})"
+            )
+        return value
+
+    def check_flags(values, path):
+        for name, value in check(values, path).items():
+            if not isinstance(value, bool):
+                raise ValueError(
+                    f"{path}[{json.dumps(name)}] must be true or false"
+                )
+
+    check(state, "state", {"scenes", "inputs"})
+    for scene, desired in check(state.get("scenes", {}), "scenes").items():
+        path = f"scenes[{json.dumps(scene)}]"
+        check(desired, path, _APPLY_SCENE_KEYS)
+        for key in ("items", "filters"):
+            if key in desired:
+                check_flags(desired[key], f"{path}.{key}")
+    for input, desired in check(state.get("inputs", {}), "inputs").items():
+        path = f"inputs[{json.dumps(input)}]"
+        check(desired, path, _APPLY_INPUT_KEYS)
+        if "muted" in desired and not isinstance(desired["muted"], bool):
+            raise ValueError(f"{path}.muted must be true or false")
+        if "settings" in desired:
+            check(desired["settings"], f"{path}.settings")
+        if "filters" in desired:
+            check_flags(desired["filters"], f"{path}.filters")
+    return state
+
+
+def plan_state(cl, state):
+    # Returns (changes, errors). Current state is fetched with one round
+    # trip, plus one for the items of groups and the default settings of
+    # the input kinds, where needed. Each change carries the request that
+    # makes it.
+    scenes = state.get("scenes", {})
+    inputs = state.get("inputs", {})
+    filters = {
+        **{name: s["filters"] for name, s in scenes.items() if "filters" in s},
+        **{name: i["filters"] for name, i in inputs.items() if "filters" in i},
+    }
+    requests = (
+        [("GetSceneItemList", {"sceneName": name}) for name in scenes]
+        + [("GetSourceFilterList", {"sourceName": name}) for name in filters]
+        + [
+            ("GetInputMute", {"inputName": name})
+            for name, desired in inputs.items()
+            if "muted" in desired
+        ]
+        + [
+            ("GetInputSettings", {"inputName": name})
+            for name, desired in inputs.items()
+            if desired.get("settings")
+        ]
+    )
+    current = {}
+    for (request_type, data), res in zip(
+        requests,
+        cl.send_many(requests, raw=True, return_exceptions=True),
+    ):
+        current[(request_type, next(iter(data.values())))] = res
+
+    changes = []
+    errors = []
+
+    def change(kind, source, name, was, desired, request_type, data):
+        if was != desired:
+            changes.append(
+                {
+                    "kind": kind,
+                    "source": source,
+                    "name": name,
+                    "current": was,
+                    "desired": desired,
+                    "request": (request_type, data),
+                }
+            )
+
+    # The items of the groups in scenes with items to set, and the
+    # defaults of the input kinds, since OBS leaves settings at their
+    # default out of GetInputSettings
+    scene_items = {}
+    groups = {}
+    for scene, desired in scenes.items():
+        items = current[("GetSceneItemList", scene)]
+        if isinstance(items, Exception):
+            errors.append(f"Scene '{scene}': {items}")
+            continue
+        items = scene_items[scene] = items.get("sceneItems", [])
+        if desired.get("items"):
+            for it in items:
+                if it.get("isGroup"):
+                    groups[it.get("sourceName")] = []
+    kinds = {}
+    for input, desired in inputs.items():
+        res = current.get(("GetInputSettings", input))
+        if res is not None and not isinstance(res, Exception):
+            kinds[res.get("inputKind")] = {}
+    requests = [
+        ("GetGroupSceneItemList", {"sceneName": group}) for group in groups
+    ] + [("GetInputDefaultSettings", {"inputKind": kind}) for kind in kinds]
+    if requests:
+        for (request_type, data), res in zip(
+            requests,
+            cl.send_many(requests, raw=True, return_exceptions=True),
+        ):
+            if isinstance(res, Exception):
+                continue
+            if request_type == "GetGroupSceneItemList":
+                groups[data["sceneName"]] = res.get("sceneItems", [])
+            else:
+                kinds[data["inputKind"]] = res.get("defaultInputSettings", {})
+
+    for scene, items in scene_items.items():
+        containers = [(scene, items)] + [
+            (it.get("sourceName"), groups.get(it.get("sourceName"), []))
+            for it in items
+            if it.get("isGroup")
+        ]
+        for name, enabled in scenes[scene].get("items", {}).items():
+            found = False
+            for container, container_items in containers:
+                for it in container_items:
+                    if it.get("sourceName") != name:
+                        continue
+                    found = True
+                    change(
+                        "item",
+                        scene,
+                        name,
+                        it.get("sceneItemEnabled"),
+                        bool(enabled),
+                        "SetSceneItemEnabled",
+                        {
+                            "sceneName": container,
+                            "sceneItemId": it.get("sceneItemId"),
+                            "sceneItemEnabled": bool(enabled),
+                        },
+                    )
+            if not found:
+                errors.append(f"Item not found: '{name}' (Scene: '{scene}')")
+
+    for source, desired in filters.items():
+        res = current[("GetSourceFilterList", source)]
+        if isinstance(res, Exception):
+            errors.append(f"Source '{source}': {res}")
+            continue
+        enabled = {
+            f.get("filterName"): f.get("filterEnabled")
+            for f in res.get("filters", [])
+        }
+        for name, filter_enabled in desired.items():
+            if name not in enabled:
+                errors.append(
+                    f"Filter not found: '{name}' (Source: '{source}')"
+                )
+                continue
+            change(
+                "filter",
+                source,
+                name,
+                enabled[name],
+                bool(filter_enabled),
+                "SetSourceFilterEnabled",
+                {
+                    "sourceName": source,
+                    "filterName": name,
+                    "filterEnabled": bool(filter_enabled),
+                },
+            )
+
+    for input, desired in inputs.items():
+        if "muted" in desired:
+            res = current[("GetInputMute", input)]
+            if isinstance(res, Exception):
+                errors.append(f"Input '{input}': {res}")
+            else:
+                change(
+                    "mute",
+                    input,
+                    None,
+                    res.get("inputMuted"),
+                    bool(desired["muted"]),
+                    "SetInputMute",
+                    {"inputName": input, "inputMuted": bool(desired["muted"])},
+                )
+        if desired.get("settings"):
+            res = current[("GetInputSettings", input)]
+            if isinstance(res, Exception):
+                errors.append(f"Input '{input}': {res}")
+                continue
+            settings = {
+                **kinds.get(res.get("inputKind"), {}),
+                **res.get("inputSettings", {}),
+            }
+            for key, value in desired["settings"].items():
+                change(
+                    "setting",
+                    input,
+                    key,
+                    settings.get(key),
+                    value,
+                    "SetInputSettings",
+                    {
+                        "inputName": input,
+                        "inputSettings": {key: value},
+                        "overlay": True,
+                    },
+                )
+
+    # One SetInputSettings per input
+    merged = {}
+    for c in changes:
+        request_type, data = c["request"]
+        if request_type != "SetInputSettings":
+            continue
+        first = merged.setdefault(data["inputName"], data)
+        if first is not data:
+            first["inputSettings"].update(data["inputSettings"])
+            c["request"] = None
+    return changes, errors
+
+
+def run_apply(cl, args, console, error_console):
+    try:
+        state = load_state_file(args.FILE)
+    except (OSError, ValueError) as exc:
+        print_error(error_console, f"{args.FILE}: {exc}")
+        return 2
+
+    changes, errors = plan_state(cl, state)
+    for error in errors:
+        print_error(error_console, error)
+    if errors:
+        # Nothing is applied unless all of the state could be
+        return 1
+
+    failed = False
+    if not args.dry_run:
+        requests = [c["request"] for c in changes if c["request"]]
+        # Everything on the same frame, like a multi-item show/hide
+        results = iter(
+            cl.send_batch(
+                requests,
+                execution_type=BATCH_SERIAL_FRAME,
+                return_exceptions=True,
+            )
+        )
+        res = None
+        for c in changes:
+            if c["request"] is not None:
+                res = next(results)
+                request_type, data = c["request"]
+                if (
+                    not isinstance(res, obs.error.OBSSDKError)
+                    and request_type in _INDEX_WRITES
+                ):
+                    notify_index(cl, _INDEX_WRITES[request_type], data)
+            # Settings merged into one request share its result
+            c["status"] = (
+                "failed" if isinstance(res, obs.error.OBSSDKError) else "ok"
+            )
+            if c["status"] == "failed":
+                failed = True
+                print_error(error_console, res)
+
+    if args.json:
+        print_json(
+            data=[
+                {
+                    key: value
+                    for key, value in c.items()
+                    if key != "request" and (key != "name" or value)
+                }
+                for c in changes
+            ]
+        )
+    elif not args.quiet:
+        if not changes:
+            console.print("Nothing to change")
+        else:
+            headers = ["kind", "source", "name", "current", "desired"]
+            if not args.dry_run:
+                headers.append("status")
+            table = make_table(*headers)
+            for c in changes:
+                table.add_row(
+                    c["kind"],
+                    c["source"],
+                    c["name"] if c["name"] is not None else na(),
+                    (
+                        json.dumps(c["current"])
+                        if c["current"] is not None
+                        else na()
+                    ),
+                    json.dumps(c["desired"]),
+                    *([c["status"]] if not args.dry_run else []),
+                )
+            console.print(table)
+    return 1 if failed else 0
+
+
+# Sources per round trip when taking a snapshot: enough to keep the
+# connection busy, few enough that only a chunk is held in memory
+_SNAPSHOT_CHUNK = 50
+
+
+def snapshot_records(cl):
+    # Yields (kind, data) for the whole scene collection: one "collection"
+    # record, then every scene with its filters and items (group items
+    # nested in their group), then every input with its settings, mute
+    # state and filters. Each chunk of sources takes one round trip, plus
+    # one for the groups in a chunk of scenes.
+    version, scene_collections, scenes, inputs = cl.send_many(
+        (
+            "GetVersion",
+            "GetSceneCollectionList",
+            "GetSceneList",
+            "GetInputList",
+        ),
+        raw=True,
+    )
+    yield "collection", {
+        "sceneCollectionName": scene_collections.get(
+            "currentSceneCollectionName"
+        ),
+        "currentProgramSceneName": scenes.get("currentProgramSceneName"),
+        "currentPreviewSceneName": scenes.get("currentPreviewSceneName"),
+        "obsVersion": version.get("obsVersion"),
+        "obsWebSocketVersion": version.get("obsWebSocketVersion"),
+    }
+
+    def chunks(items):
+        for start in range(0, len(items), _SNAPSHOT_CHUNK):
+            end = start + _SNAPSHOT_CHUNK
+            yield items[start:end]
+
+    for chunk in chunks(scenes.get("scenes", [])[::-1]):
+        results = iter(
+            cl.send_many(
+                (
+                    request
+                    for scene in chunk
+                    for request in (
+                        (
+                            "GetSceneItemList",
+                            {"sceneName": scene["sceneName"]},
+                        ),
+                        (
+                            "GetSourceFilterList",
+                            {"sourceName": scene["sceneName"]},
+                        ),
+                    )
+                ),
+                raw=True,
+            )
+        )
+        records = [
+            {
+                "sceneName": scene["sceneName"],
+                "sceneIndex": scene.get("sceneIndex"),
+                "items": next(results).get("sceneItems", []),
+                "filters": next(results).get("filters", []),
+            }
+            for scene in chunk
+        ]
+        groups = [
+            item
+            for record in records
+            for item in record["items"]
+            if item.get("isGroup")
+        ]
+        for group, res in zip(
+            groups,
+            cl.send_many(
+                (
+                    (
+                        "GetGroupSceneItemList",
+                        {"sceneName": group["sourceName"]},
+                    )
+                    for group in groups
+                ),
+                raw=True,
+            ),
+        ):
+            group["items"] = res.get("sceneItems", [])
+        for record in records:
+            yield "scene", record
+
+    for chunk in chunks(inputs.get("inputs", [])):
+        results = iter(
+            cl.send_many(
+                (
+                    request
+                    for input in chunk
+                    for request in (
+                        (
+                            "GetInputSettings",
+                            {"inputName": input["inputName"]},
+                        ),
+                        ("GetInputMute", {"inputName": input["inputName"]}),
+                        (
+                            "GetSourceFilterList",
+                            {"sourceName": input["inputName"]},
+                        ),
+                    )
+                ),
+                raw=True,
+                return_exceptions=True,
+            )
+        )
+        for input in chunk:
+            settings, mute, filters = (
+                next(results),
+                next(results),
+                next(results),
+            )
+            for res in (settings, filters):
+                if isinstance(res, Exception):
+                    raise res
+            # Inputs without audio have no mute state
+            if isinstance(mute, obs.error.OBSSDKRequestError):
+                if mute.code != _INVALID_RESOURCE_STATE:
+                    raise mute
+                mute = {}
+            yield "input", {
+                **input,
+                "inputSettings": settings.get("inputSettings", {}),
+                "inputMuted": mute.get("inputMuted"),
+                "filters": filters.get("filters", []),
+            }
+
+
+def write_snapshot(cl, stream, ndjson=False):
+    # Records are written as they arrive. As JSON, the collection record
+    # becomes the top-level object, with "scenes" and "inputs" lists.
+    # Returns the number of records of each kind.
+    counts = {"collection": 0, "scene": 0, "input": 0}
+    section = None
+    for kind, data in snapshot_records(cl):
+        counts[kind] += 1
+        if ndjson:
+            stream.write(json.dumps({"type": kind, **data}) + "\n")
+            continue
+        if kind == "collection":
+            stream.write(json.dumps(data)[:-1])
+            continue
+        if section != kind:
+            stream.write(f"{']' if section else ''}, \"{kind}s\": [\n")
+            section = kind
+        else:
+            stream.write(",\n")
+        stream.write(json.dumps(data))
+    if not ndjson:
+        stream.write(f"{']' if section else ''}}}\n")
+    return counts
+
+
+def run_snapshot(cl, args, error_console):
+    ndjson = args.ndjson
+    if ndjson is None:
+        ndjson = args.output.endswith((".ndjson", ".jsonl"))
+    start = time.monotonic()
+    if args.output == "-":
+        counts = write_snapshot(cl, sys.stdout, ndjson)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            counts = write_snapshot(cl, f, ndjson)
+    elapsed = time.monotonic() - start
+    if not args.quiet:
+        sys.stderr.write(
+            f"snapshot: {counts['scene']} scenes, {counts['input']} inputs "
+            f"in {elapsed:.2f}s ({cl.request_count} requests, "
+            f"{cl.round_trips} round trips)\n"
+        )
+    return 0
+
+
+def get_event_subscriptions(categories):
+    # Event categories accepted by watch, see obsws_python.Subs. The
+    # high-volume ones are only sent by OBS when explicitly requested.
+    event_categories = {
+        name.lower(): flag for name, flag in obs.Subs.__members__.items()
+    }
+    subs = 0
+    for category in categories or ["low_volume"]:
+        category = category.lower().replace("-", "_")
+        if category not in event_categories:
+            raise ValueError(
+                f"Unknown event category: '{category}' (choose from "
+                f"{', '.join(sorted(event_categories))})"
+            )
+        subs |= event_categories[category]
+    return subs
+
+
+# Writes every event as one JSON line
+class EventWriter:
+    def __init__(self, stream, count=None):
+        self.stream = stream
+        self.remaining = count
+        self.done = threading.Event()
+
+    def trigger(self, event_type, data):
+        if self.done.is_set():
+            return
+        try:
+            self.stream.write(
+                json.dumps(
+                    {"time": time.time(), "type": event_type, "data": data}
+                )
+                + "\n"
+            )
+            self.stream.flush()
+        except BrokenPipeError:
+            # Downstream consumer went away, e.g. `obs-cli watch | head`
+            self.done.set()
+            return
+        if self.remaining is not None:
+            self.remaining -= 1
+            if self.remaining <= 0:
+                self.done.set()
+
+
+def run_watch(args, error_console):
+    try:
+        subs = get_event_subscriptions(args.CATEGORY)
+    except ValueError as exc:
+        print_error(error_console, str(exc))
+        return 2
+    writer = EventWriter(sys.stdout, count=args.count)
+    cl = connect(args)
+    try:
+        # Events are handled while the client's loop runs
+        cl.subscribe(subs, writer.trigger)
+        while not writer.done.is_set():
+            if not cl.wait(0.5):
+                print_error(error_console, "connection to OBS lost")
+                return 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        disconnect(cl)
+    return 0
+
+
+# Fixed-size buffer of the latest values of one metric. Backed by an array
+# of doubles, so that adding a sample does not allocate.
+class RingBuffer:
+    def __init__(self, size):
+        import array
+
+        self.data = array.array("d", bytes(8 * size))
+        self.size = size
+        self.count = 0
+        self.index = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, value):
+        self.data[self.index] = value
+        self.index = (self.index + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+    def latest(self):
+        return self.data[self.index - 1]
+
+    def values(self):
+        # Oldest first
+        start = (self.index - self.count) % self.size
+        return [self.data[(start + i) % self.size] for i in range(self.count)]
+
+    def summary(self):
+        # The order of the samples does not matter here
+        values = sorted(self.data[: self.count])
+        return {
+            "min": values[0],
+            "avg": math.fsum(values) / len(values),
+            # Nearest-rank percentile
+            "p95": values[math.ceil(0.95 * len(values)) - 1],
+            "max": values[-1],
+        }
+
+
+# stats metrics: (name, GetStats field, whether the field is a cumulative
+# counter reported as a per second rate)
+_STATS_METRICS = (
+    ("fps", "activeFps", False),
+    ("render_ms", "averageFrameRenderTime", False),
+    ("cpu_percent", "cpuUsage", False),
+    ("memory_mb", "memoryUsage", False),
+    ("render_frames_per_s", "renderTotalFrames", True),
+    ("render_skipped_per_s", "renderSkippedFrames", True),
+    ("output_frames_per_s", "outputTotalFrames", True),
+    ("output_skipped_per_s", "outputSkippedFrames", True),
+)
+
+
+class StatsSampler:
+    def __init__(self, size):
+        self.buffers = {
+            name: RingBuffer(size) for name, _, _ in _STATS_METRICS
+        }
+        self.previous = {}
+        self.previous_time = None
+        self.elapsed = None
+
+    def add(self, stats, now):
+        # Returns False for the first sample, which is only the baseline
+        # for the counters
+        if self.previous_time is not None:
+            self.elapsed = now - self.previous_time
+        for name, field, counter in _STATS_METRICS:
+            value = stats.get(field) or 0
+            if counter:
+                previous = self.previous.get(field)
+                self.previous[field] = value
+                if previous is None:
+                    continue
+                # Output counters start over when an output is restarted
+                value = max(value - previous, 0) / self.elapsed
+            self.buffers[name].append(value)
+        self.previous_time = now
+        return self.elapsed is not None
+
+    def to_dict(self):
+        return {
+            "time": time.time(),
+            "interval": self.elapsed,
+            "values": {
+                name: buffer.latest() for name, buffer in self.buffers.items()
+            },
+            "window": {
+                name: buffer.summary() for name, buffer in self.buffers.items()
+            },
+        }
+
+
+def render_stats_table(sampler):
+    table = make_table("metric", "now", "min", "avg", "p95", "max")
+    for name, buffer in sampler.buffers.items():
+        summary = buffer.summary()
+        table.add_row(
+            name,
+            *(
+                f"{value:.2f}"
+                for value in (
+                    buffer.latest(),
+                    summary["min"],
+                    summary["avg"],
+                    summary["p95"],
+                    summary["max"],
+                )
+            ),
+        )
+    return table
+
+
+def run_stats(cl, args, console):
+    # Samples are scheduled on a fixed grid, so that slow responses do
+    # not make the interval drift
+    sampler = StatsSampler(max(1, math.ceil(args.window / args.interval)))
+    live = None
+    if not args.json:
+        from rich.live import Live
+
+        live = Live(console=console.get(), auto_refresh=False)
+    samples = 0
+    next_sample = time.monotonic()
+    try:
+        with live or contextlib.nullcontext():
+            while args.count is None or samples < args.count:
+                stats = cl.send("GetStats", raw=True)
+                if sampler.add(stats, time.monotonic()):
+                    samples += 1
+                    if live is not None:
+                        live.update(render_stats_table(sampler), refresh=True)
+                    else:
+                        sys.stdout.write(json.dumps(sampler.to_dict()) + "\n")
+                        sys.stdout.flush()
+                    if samples == args.count:
+                        break
+                next_sample += args.interval
+                delay = next_sample - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    # Fell behind, skip the missed samples
+                    next_sample = time.monotonic()
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+    if live is not None and not live.console.is_terminal:
+        # Live only ends the line on terminals
+        live.console.line()
+    return 0
+
+
+# status --watch: GetStreamStatus and GetRecordStatus report cumulative
+# counters, so rates come from the deltas between samples, the latest two
+# for the current value and the whole window for the rolling one
+_OUTPUT_COUNTERS = (
+    ("time", None),
+    ("bytes", "outputBytes"),
+    ("frames", "outputTotalFrames"),
+    ("skipped", "outputSkippedFrames"),
+    ("congestion", "outputCongestion"),
+)
+
+
+class OutputSampler:
+    def __init__(self, output, size):
+        self.output = output
+        self.size = max(size, 2)
+        self.status = {}
+        self.reset()
+
+    def reset(self):
+        self.buffers = {
+            name: RingBuffer(self.size) for name, _ in _OUTPUT_COUNTERS
+        }
+
+    def add(self, status, now):
+        self.status = status
+        if not status.get("outputActive"):
+            self.reset()
+            return
+        sample = {
+            name: now if field is None else status.get(field) or 0
+            for name, field in _OUTPUT_COUNTERS
+        }
+        buffers = self.buffers
+        # Counters start over when the output is restarted
+        if len(buffers["bytes"]) and sample["bytes"] < (
+            buffers["bytes"].latest()
+        ):
+            self.reset()
+        for name, value in sample.items():
+            self.buffers[name].append(value)
+
+    def deltas(self, window):
+        # Differences of every counter over the window or the last interval
+        first = 0 if window else -2
+        return {
+            name: values[-1] - values[first]
+            for name, values in (
+                (name, buffer.values())
+                for name, buffer in self.buffers.items()
+            )
+        }
+
+    def rates(self, window):
+        if len(self.buffers["time"]) < 2:
+            return {"bitrate_kbps": None, "dropped_percent": None}
+        delta = self.deltas(window)
+        dropped = None
+        if "outputTotalFrames" in self.status and delta["frames"] > 0:
+            dropped = 100 * delta["skipped"] / delta["frames"]
+        return {
+            "bitrate_kbps": 8 * delta["bytes"] / delta["time"] / 1000,
+            "dropped_percent": dropped,
+        }
+
+    def congestion(self):
+        # (latest, rolling average, least squares slope per minute)
+        if "outputCongestion" not in self.status or not len(
+            self.buffers["time"]
+        ):
+            return None, None, None
+        times = self.buffers["time"].values()
+        values = self.buffers["congestion"].values()
+        mean_time = math.fsum(times) / len(times)
+        mean = math.fsum(values) / len(values)
+        variance = math.fsum((t - mean_time) ** 2 for t in times)
+        slope = None
+        if variance > 0:
+            slope = 60 * (
+                math.fsum(
+                    (t - mean_time) * (v - mean) for t, v in zip(times, values)
+                )
+                / variance
+            )
+        return values[-1], mean, slope
+
+    def to_dict(self):
+        current = self.rates(window=False)
+        rolling = self.rates(window=True)
+        congestion, average, trend = self.congestion()
+        return {
+            "time": time.time(),
+            "output": self.output,
+            "active": bool(self.status.get("outputActive")),
+            "paused": bool(self.status.get("outputPaused")),
+            "reconnecting": bool(self.status.get("outputReconnecting")),
+            "duration_ms": self.status.get("outputDuration"),
+            "values": {**current, "congestion": congestion},
+            "window": {
+                **rolling,
+                "congestion": average,
+                "congestion_trend_per_min": trend,
+            },
+        }
+
+
+def check_output_thresholds(sample, args):
+    # Messages for the thresholds the rolling values crossed
+    alerts = []
+    window = sample["window"]
+    if args.min_bitrate is not None:
+        if not sample["active"]:
+            alerts.append(f"{sample['output']} is not active")
+        elif (
+            not sample["paused"]
+            and window["bitrate_kbps"] is not None
+            and window["bitrate_kbps"] < args.min_bitrate
+        ):
+            alerts.append(
+                f"bitrate {window['bitrate_kbps']:.0f} kbit/s is below "
+                f"{args.min_bitrate:g}"
+            )
+    dropped = window["dropped_percent"]
+    if args.max_dropped is not None and (dropped or 0) > args.max_dropped:
+        alerts.append(
+            f"{dropped:.2f}% of frames dropped, more than "
+            f"{args.max_dropped:g}%"
+        )
+    congestion = window["congestion"]
+    if args.max_congestion is not None and (
+        (congestion or 0) > args.max_congestion
+    ):
+        alerts.append(
+            f"congestion {congestion:.2f} is above {args.max_congestion:g}"
+        )
+    return alerts
+
+
+def render_output_table(sample):
+    def fmt(value, precision=2):
+        return na() if value is None else f"{value:.{precision}f}"
+
+    if sample["reconnecting"]:
+        state = "reconnecting"
+    elif sample["paused"]:
+        state = "paused"
+    else:
+        state = "started" if sample["active"] else "stopped"
+    duration = sample["duration_ms"]
+    table = make_table("metric", "now", "window")
+    table.add_row("state", state, "")
+    table.add_row(
+        "duration",
+        na() if duration is None else f"{duration / 1000:.0f}s",
+        "",
+    )
+    for name in ("bitrate_kbps", "dropped_percent", "congestion"):
+        table.add_row(
+            name,
+            fmt(sample["values"][name], 0 if name == "bitrate_kbps" else 2),
+            fmt(sample["window"][name], 0 if name == "bitrate_kbps" else 2),
+        )
+    table.add_row(
+        "congestion_trend_per_min",
+        "",
+        fmt(sample["window"]["congestion_trend_per_min"], 3),
+    )
+    return table
+
+
+def run_output_watch(cl, args, console, error_console):
+    # Samples on a fixed grid like run_stats
+    request = {"stream": "GetStreamStatus", "record": "GetRecordStatus"}[
+        args.command
+    ]
+    sampler = OutputSampler(
+        args.command, math.ceil(args.window / args.interval) + 1
+    )
+    live = None
+    if not args.json:
+        from rich.live import Live
+
+        live = Live(console=console.get(), auto_refresh=False)
+    alerts = []
+    samples = 0
+    next_sample = time.monotonic()
+    try:
+        with live or contextlib.nullcontext():
+            while args.count is None or samples < args.count:
+                sampler.add(cl.send(request, raw=True), time.monotonic())
+                samples += 1
+                sample = sampler.to_dict()
+                alerts = check_output_thresholds(sample, args)
+                if live is not None:
+                    live.update(render_output_table(sample), refresh=True)
+                else:
+                    sample["alerts"] = alerts
+                    sys.stdout.write(json.dumps(sample) + "\n")
+                    sys.stdout.flush()
+                if alerts or samples == args.count:
+                    break
+                next_sample += args.interval
+                delay = next_sample - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    # Fell behind, skip the missed samples
+                    next_sample = time.monotonic()
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+    if live is not None and not live.console.is_terminal:
+        live.console.line()
+    for alert in alerts:
+        print_error(error_console, alert)
+    return 1 if alerts else 0
+
+
+# input meter: OBS sends InputVolumeMeters about 20 times a second, with
+# [magnitude, peak, input peak] per channel of every input as multipliers.
+# Events only update the linear values, which are converted to dBFS for
+# all inputs and channels at once when a sample is taken.
+_METER_FLOOR_DB = -100.0
+_METER_RANGE_DB = 60.0
+_METER_WIDTH = 30
+
+
+class LevelMeter:
+    def __init__(self, names=None, hold=2.0):
+        # names: the inputs to show, None for every one
+        self.names = names
+        self.wanted = None if names is None else set(names)
+        self.hold = hold
+        # Input -> [[magnitude, peak], ...] per channel, latest event
+        self.levels = {}
+        # Input -> [[peak, time], ...] per channel, the held peaks
+        self.holds = {}
+        # Input -> events in which a channel peaked at 0 dBFS or above
+        self.clips = {}
+
+    def trigger(self, event_type, data):
+        if event_type != "InputVolumeMeters":
+            return
+        now = time.monotonic()
+        for input in data.get("inputs", ()):
+            name = input.get("inputName")
+            if self.wanted is not None and name not in self.wanted:
+                continue
+            channels = input.get("inputLevelsMul") or []
+            self.levels[name] = channels
+            holds = self.holds.setdefault(name, [])
+            # Channels that went away
+            while len(holds) > len(channels):
+                holds.pop()
+            clipped = False
+            for index, (_, peak, *_) in enumerate(channels):
+                clipped = clipped or peak >= 1.0
+                if index == len(holds):
+                    holds.append([peak, now])
+                elif peak >= holds[index][0] or now - holds[index][1] > (
+                    self.hold
+                ):
+                    holds[index] = [peak, now]
+            if clipped:
+                self.clips[name] = self.clips.get(name, 0) + 1
+
+    def sample(self):
+        # [{inputName, magnitude, peak, peakHold, clips}], levels in dBFS
+        # per channel. Inputs without audio have no channels.
+        import array
+
+        names = (
+            list(self.names) if self.names is not None else sorted(self.levels)
+        )
+        linear = array.array("d")
+        for name in names:
+            holds = self.holds.get(name, [])
+            for (magnitude, peak, *_), (held, _) in zip(
+                self.levels.get(name, []), holds
+            ):
+                linear.extend((magnitude, peak, held))
+        floor = 10 ** (_METER_FLOOR_DB / 20)
+        db = iter([round(20 * math.log10(max(v, floor)), 1) for v in linear])
+        samples = []
+        for name in names:
+            count = len(self.holds.get(name, []))
+            values = list(itertools.islice(db, 3 * count))
+            samples.append(
+                {
+                    "inputName": name,
+                    "magnitude": values[0::3],
+                    "peak": values[1::3],
+                    "peakHold": values[2::3],
+                    "clips": self.clips.get(name, 0),
+                }
+            )
+        return samples
+
+
+def render_meter_bar(magnitude, hold):
+    # Loudness bar over the top _METER_RANGE_DB, with the held peak as a
+    # tick: green, yellow above -20 dBFS and red above -9 dBFS
+    from rich.text import Text
+
+    def cells(db):
+        position = (db + _METER_RANGE_DB) / _METER_RANGE_DB * _METER_WIDTH
+        return min(max(round(position), 0), _METER_WIDTH)
+
+    def style(cell):
+        db = cell / _METER_WIDTH * _METER_RANGE_DB - _METER_RANGE_DB
+        return "red" if db > -9 else "yellow" if db > -20 else "green"
+
+    filled = cells(magnitude)
+    tick = cells(hold) - 1
+    bar = Text()
+    for cell in range(_METER_WIDTH):
+        if cell < filled:
+            bar.append("█", style=style(cell + 1))
+        elif cell == tick:
+            bar.append("▏", style=style(cell + 1))
+        else:
+            bar.append("·", style="bright_black")
+    return bar
+
+
+def render_meter_table(samples):
+    table = make_table("input", "level", "dbfs", "peak", "clips")
+    for sample in samples:
+        if not sample["magnitude"]:
+            table.add_row(sample["inputName"], na(), na(), na(), na())
+            continue
+        # The loudest channel
+        magnitude = max(sample["magnitude"])
+        hold = max(sample["peakHold"])
+        table.add_row(
+            sample["inputName"],
+            render_meter_bar(magnitude, hold),
+            f"{magnitude:6.1f}",
+            f"{hold:6.1f}",
+            str(sample["clips"]),
+        )
+    return table
+
+
+def run_meter(cl, args, console, error_console):
+    patterns = [
+        name
+        for name in (args.INPUT, args.PROPERTY, args.VALUE, *args.MORE)
+        if name
+    ]
+    names = None
+    if patterns:
+        inputs = [input.get("inputName") for input in get_inputs(cl)]
+        names = []
+        for pattern in patterns:
+            if is_glob(pattern):
+                matches = fnmatch.filter(inputs, pattern)
+            else:
+                matches = [pattern] if pattern in inputs else []
+            if not matches:
+                raise ObsItemNotFoundException(f"No input matches '{pattern}'")
+            names.extend(name for name in matches if name not in names)
+    meter = LevelMeter(names, hold=args.hold)
+    cl.subscribe(obs.Subs.INPUTVOLUMEMETERS, meter.trigger)
+
+    live = None
+    if not args.json:
+        from rich.live import Live
+
+        live = Live(console=console.get(), auto_refresh=False)
+    updates = 0
+    next_update = time.monotonic() + args.interval
+    try:
+        with live or contextlib.nullcontext():
+            while args.count is None or updates < args.count:
+                if not cl.wait(max(next_update - time.monotonic(), 0)):
+                    print_error(error_console, "connection to OBS lost")
+                    return 1
+                next_update = max(
+                    next_update + args.interval, time.monotonic()
+                )
+                samples = meter.sample()
+                updates += 1
+                if live is not None:
+                    live.update(render_meter_table(samples), refresh=True)
+                else:
+                    sys.stdout.write(
+                        json.dumps({"time": time.time(), "inputs": samples})
+                        + "\n"
+                    )
+                    sys.stdout.flush()
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+    if live is not None and not live.console.is_terminal:
+        live.console.line()
+    return 0
+
+
+# Client environment that affects rendering, replayed by the daemon
+_DAEMON_ENV = ("TERM", "COLORTERM", "NO_COLOR", "FORCE_COLOR", "COLUMNS")
+
+
+def get_daemon_socket(args):
+    import tempfile
+
+    if args.socket:
+        return args.socket
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    base_dir = (
+        os.path.join(runtime_dir, "obs-cli")
+        if runtime_dir
+        else os.path.join(tempfile.gettempdir(), f"obs-cli-{os.getuid()}")
+    )
+    return os.path.join(base_dir, f"{args.host}-{args.port}.sock")
+
+
+def check_daemon_dir(args, path):
+    # The socket directory picked by get_daemon_socket may have been
+    # created by another user, e.g. in the shared temporary directory, who
+    # could then listen in place of the daemon. It must be ours and closed
+    # to everybody else. A --socket is the user's choice.
+    import stat
+
+    if args.socket:
+        return
+    directory = os.path.dirname(path)
+    info = os.lstat(directory)
+    if (
+        not stat.S_ISDIR(info.st_mode)
+        or info.st_uid != os.getuid()
+        or info.st_mode & 0o077
+    ):
+        raise PermissionError(
+            f"{directory} must be a directory owned by the current user "
+            "and not accessible to others"
+        )
+
+
+def daemon_request(path, request):
+    # One request per connection: a JSON line from the client, answered by
+    # a JSON header line followed by the raw stdout and stderr bytes.
+    import socket
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        reader = sock.makefile("rb")
+        line = reader.readline()
+        if not line:
+            raise ConnectionError(f"Daemon at {path} closed the connection")
+        header = json.loads(line)
+        stdout = reader.read(header.get("stdout", 0))
+        stderr = reader.read(header.get("stderr", 0))
+        return header, stdout, stderr
+
+
+def forward_to_daemon(args, argv, error_console):
+    # Returns the command's exit code, or None if no daemon is listening
+    import shutil
+
+    path = get_daemon_socket(args)
+    if not os.path.exists(path):
+        return None
+    try:
+        check_daemon_dir(args, path)
+    except OSError as exc:
+        LOGGER.warning(f"Not using the daemon: {exc}")
+        return None
+    request = {
+        "argv": argv,
+        "cwd": os.getcwd(),
+        "tty": sys.stdout.isatty(),
+        "width": shutil.get_terminal_size().columns,
+        "env": {
+            key: os.environ[key] for key in _DAEMON_ENV if key in os.environ
+        },
+    }
+    try:
+        header, stdout, stderr = daemon_request(path, request)
+    except (ConnectionRefusedError, FileNotFoundError):
+        LOGGER.debug(f"Stale daemon socket {path}, connecting directly")
+        return None
+    except OSError as exc:
+        print_error(error_console, f"daemon: {exc}")
+        return 1
+    sys.stdout.buffer.write(stdout)
+    sys.stdout.buffer.flush()
+    sys.stderr.buffer.write(stderr)
+    sys.stderr.buffer.flush()
+    return header.get("rc", 1)
+
+
+@contextlib.contextmanager
+def client_context(request, stdout, stderr):
+    # Make the daemon process look like the forwarding client for the
+    # duration of one command: its cwd, terminal, environment and stdio
+    env = request.get("env", {})
+    saved_env = {key: os.environ.get(key) for key in _DAEMON_ENV}
+    saved_cwd = os.getcwd()
+    root_logger = logging.getLogger()
+    saved_handlers = root_logger.handlers
+    try:
+        for key in _DAEMON_ENV:
+            os.environ.pop(key, None)
+        os.environ.update(env)
+        os.chdir(request.get("cwd", saved_cwd))
+        handler = logging.StreamHandler(stderr)
+        handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+        root_logger.handlers = [handler]
+        with (
+            contextlib.redirect_stdout(stdout),
+            contextlib.redirect_stderr(stderr),
+        ):
+            import rich
+
+            rich.reconfigure(
+                force_terminal=request.get("tty", False),
+                width=request.get("width"),
+            )
+            yield
+    finally:
+        root_logger.handlers = saved_handlers
+        os.chdir(saved_cwd)
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        if "rich" in sys.modules:
+            sys.modules["rich"].reconfigure()
+
+
+# Holds one authenticated connection to OBS and runs forwarded commands on
+# it, one at a time since a Client is not thread safe
+def make_daemon(path, args):
+    # socketserver is only needed here, keep it out of the start-up path
+    import socketserver
+
+    class DaemonRequestHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            request = json.loads(self.rfile.readline() or "{}")
+            if request.get("stop") or request.get("status"):
+                rc, stdout, stderr = 0, b"", b""
+                if request.get("stop"):
+                    threading.Thread(target=self.server.shutdown).start()
+            else:
+                # The client hangs up when it is interrupted, which cancels
+                # a command that is still running, e.g. a timelapse
+                cancelled = threading.Event()
+                threading.Thread(
+                    target=self.watch_client, args=(cancelled,), daemon=True
+                ).start()
+                rc, stdout, stderr = self.server.execute(request, cancelled)
+            header = {"rc": rc, "stdout": len(stdout), "stderr": len(stderr)}
+            # Nobody to answer if the client went away
+            with contextlib.suppress(OSError):
+                self.wfile.write(
+                    json.dumps(header).encode() + b"\n" + stdout + stderr
+                )
+
+        def watch_client(self, cancelled):
+            # The client sends nothing after its request line
+            with contextlib.suppress(OSError):
+                self.connection.recv(1)
+            cancelled.set()
+
+    class Daemon(socketserver.UnixStreamServer):
+        def __init__(self, path, args):
+            self.args = args
+            self.client = connect(args, index=True)
+            super().__init__(path, DaemonRequestHandler)
+
+        def execute(self, request, cancelled):
+            stdout = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+            stderr = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+            with client_context(request, stdout, stderr):
+                width = request.get("width")
+                tty = request.get("tty", False)
+                console = LazyConsole(force_terminal=tty, width=width)
+                error_console = LazyConsole(
+                    stderr=True, force_terminal=tty, width=width
+                )
+                try:
+                    args = parse_args(request.get("argv", []))
+                    args.cancelled = cancelled
+                    LOGGER.setLevel(
+                        logging.DEBUG if args.debug else logging.INFO
+                    )
+                    if local_command(args):
+                        raise ValueError(
+                            f"'{local_command(args)}' cannot run in the daemon"
+                        )
+                    if self.client is None:
+                        self.client = connect(self.args, index=True)
+                    request_count = self.client.request_count
+                    round_trips = self.client.round_trips
+                    rc = run_command(self.client, args, console, error_console)
+                    requests = self.client.request_count - request_count
+                    trips = self.client.round_trips - round_trips
+                    LOGGER.debug(f"{requests} requests in {trips} round trips")
+                except SystemExit as exc:
+                    rc = exc.code
+                    if isinstance(rc, str):
+                        print(rc, file=sys.stderr)
+                        rc = 1
+                except Exception as exc:
+                    print_error(error_console, str(exc))
+                    rc = 1
+                finally:
+                    LOGGER.setLevel(logging.INFO)
+                    # Reconnect on the next command if OBS went away
+                    if self.client is not None and not self.client.connected:
+                        disconnect(self.client)
+                        self.client = None
+                stdout.flush()
+                stderr.flush()
+            return (
+                rc or 0,
+                stdout.buffer.getvalue(),
+                stderr.buffer.getvalue(),
+            )
+
+    return Daemon(path, args)
+
+
+def run_daemon(args, console, error_console):
+    import signal
+
+    path = get_daemon_socket(args)
+    if args.action in ("status", "stop"):
+        try:
+            daemon_request(path, {args.action: True})
+        except OSError:
+            if args.action == "stop" or not args.quiet:
+                print_error(error_console, f"no daemon listening on {path}")
+            return 1
+        if args.action == "status" and not args.quiet:
+            print_word(f"running ({path})")
+        return 0
+
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    try:
+        check_daemon_dir(args, path)
+    except OSError as exc:
+        print_error(error_console, str(exc))
+        return 1
+    if os.path.exists(path):
+        try:
+            daemon_request(path, {"status": True})
+        except OSError:
+            os.unlink(path)
+        else:
+            print_error(error_console, f"daemon already running on {path}")
+            return 1
+
+    # Only the current user may talk to the authenticated connection
+    umask = os.umask(0o177)
+    try:
+        server = make_daemon(path, args)
+    finally:
+        os.umask(umask)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    LOGGER.info(f"Listening on {path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(path)
+        if server.client is not None:
+            disconnect(server.client)
+    return 0
+
+
+# exporter metrics from GetStats: (field, metric, type, help, scale)
+_EXPORTER_STATS = (
+    ("activeFps", "obs_active_fps", "gauge", "Frames rendered per second", 1),
+    (
+        "averageFrameRenderTime",
+        "obs_average_frame_render_time_seconds",
+        "gauge",
+        "Average time to render a frame",
+        0.001,
+    ),
+    ("cpuUsage", "obs_cpu_usage_percent", "gauge", "CPU usage of OBS", 1),
+    (
+        "memoryUsage",
+        "obs_memory_usage_bytes",
+        "gauge",
+        "Memory used by OBS",
+        1024 * 1024,
+    ),
+    (
+        "availableDiskSpace",
+        "obs_available_disk_space_bytes",
+        "gauge",
+        "Free space on the recording disk",
+        1024 * 1024,
+    ),
+    (
+        "renderTotalFrames",
+        "obs_render_frames_total",
+        "counter",
+        "Frames rendered",
+        1,
+    ),
+    (
+        "renderSkippedFrames",
+        "obs_render_skipped_frames_total",
+        "counter",
+        "Frames skipped by the renderer",
+        1,
+    ),
+    (
+        "outputTotalFrames",
+        "obs_stats_output_frames_total",
+        "counter",
+        "Frames output",
+        1,
+    ),
+    (
+        "outputSkippedFrames",
+        "obs_stats_output_skipped_frames_total",
+        "counter",
+        "Frames skipped by the output",
+        1,
+    ),
+    (
+        "webSocketSessionIncomingMessages",
+        "obs_websocket_incoming_messages_total",
+        "counter",
+        "Messages received on this websocket session",
+        1,
+    ),
+    (
+        "webSocketSessionOutgoingMessages",
+        "obs_websocket_outgoing_messages_total",
+        "counter",
+        "Messages sent on this websocket session",
+        1,
+    ),
+)
+
+# exporter outputs and the request for their status
+_EXPORTER_OUTPUTS = (
+    ("stream", "GetStreamStatus"),
+    ("record", "GetRecordStatus"),
+    ("replay_buffer", "GetReplayBufferStatus"),
+    ("virtualcam", "GetVirtualCamStatus"),
+)
+
+# exporter metrics from output status responses, labelled by output
+_EXPORTER_OUTPUT_FIELDS = (
+    ("outputActive", "obs_output_active", "gauge", "Output is active", 1),
+    (
+        "outputReconnecting",
+        "obs_output_reconnecting",
+        "gauge",
+        "Output is reconnecting",
+        1,
+    ),
+    ("outputPaused", "obs_output_paused", "gauge", "Output is paused", 1),
+    (
+        "outputDuration",
+        "obs_output_duration_seconds",
+        "gauge",
+        "Time the output has been active",
+        0.001,
+    ),
+    (
+        "outputCongestion",
+        "obs_output_congestion",
+        "gauge",
+        "Congestion of the output, 0 to 1",
+        1,
+    ),
+    (
+        "outputBytes",
+        "obs_output_bytes_total",
+        "counter",
+        "Bytes sent by the output",
+        1,
+    ),
+    (
+        "outputTotalFrames",
+        "obs_output_frames_total",
+        "counter",
+        "Frames sent by the output",
+        1,
+    ),
+    (
+        "outputSkippedFrames",
+        "obs_output_skipped_frames_total",
+        "counter",
+        "Frames skipped by the output",
+        1,
+    ),
+)
+
+
+def escape_label(value):
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+def format_metrics(families):
+    # families: (name, type, help, [(labels, value)]) in Prometheus text
+    # exposition format
+    lines = []
+    for name, metric_type, help_text, samples in families:
+        if not samples:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for labels, value in samples:
+            label_str = ",".join(
+                f'{key}="{escape_label(val)}"' for key, val in labels.items()
+            )
+            if label_str:
+                label_str = f"{{{label_str}}}"
+            lines.append(f"{name}{label_str} {float(value)!r}")
+    return "".join(f"{line}\n" for line in lines)
+
+
+def collect_metrics(cl):
+    responses = cl.send_many(
+        [
+            "GetStats",
+            "GetCurrentProgramScene",
+            *(request for _, request in _EXPORTER_OUTPUTS),
+        ],
+        raw=True,
+        return_exceptions=True,
+    )
+    stats, scene, *outputs = (
+        # e.g. GetReplayBufferStatus fails when the replay buffer is off
+        {} if isinstance(res, obs.error.OBSSDKError) else res or {}
+        for res in responses
+    )
+
+    families = [
+        (
+            metric,
+            metric_type,
+            help_text,
+            [({}, stats[field] * scale)] if field in stats else [],
+        )
+        for field, metric, metric_type, help_text, scale in _EXPORTER_STATS
+    ]
+    families.extend(
+        (
+            metric,
+            metric_type,
+            help_text,
+            [
+                ({"output": output}, res[field] * scale)
+                for (output, _), res in zip(_EXPORTER_OUTPUTS, outputs)
+                if res.get(field) is not None
+            ],
+        )
+        for field, metric, metric_type, help_text, scale in (
+            _EXPORTER_OUTPUT_FIELDS
+        )
+    )
+    scene_name = scene.get("currentProgramSceneName")
+    families.append(
+        (
+            "obs_current_scene_info",
+            "gauge",
+            "Current program scene",
+            [({"scene": scene_name}, 1)] if scene_name is not None else [],
+        )
+    )
+    return format_metrics(families)
+
+
+# Samples OBS in the background for exporter, so that scrapes only ever
+# read the last result. The connection is (re)established as needed.
+class ExporterSampler(threading.Thread):
+    def __init__(self, args):
+        super().__init__(daemon=True)
+        self.args = args
+        self.cl = None
+        self.stopped = threading.Event()
+        # (metrics text, sample time, sample duration, error), replaced as
+        # a whole so that readers never see a mix of two samples
+        self.state = ("", None, None, "not sampled yet")
+
+    def run(self):
+        while not self.stopped.is_set():
+            start = time.monotonic()
+            metrics, sample_time, duration, _ = self.state
+            try:
+                if self.cl is None:
+                    self.cl = connect(self.args)
+                metrics = collect_metrics(self.cl)
+                sample_time = time.time()
+                duration = time.monotonic() - start
+                if self.state[3] is not None:
+                    LOGGER.info("Sampling OBS")
+                self.state = (metrics, sample_time, duration, None)
+            except Exception as exc:
+                error = str(exc) or type(exc).__name__
+                # Only log changes, OBS may be away for a long time
+                if error != self.state[3]:
+                    LOGGER.warning(f"Sampling OBS failed: {error}")
+                self.state = (metrics, sample_time, duration, error)
+                self.drop_connection()
+            self.stopped.wait(
+                max(0, self.args.interval - (time.monotonic() - start))
+            )
+        self.drop_connection()
+
+    def drop_connection(self):
+        if self.cl is not None:
+            with contextlib.suppress(Exception):
+                disconnect(self.cl)
+            self.cl = None
+
+    def health(self):
+        _, sample_time, duration, error = self.state
+        age = None if sample_time is None else time.time() - sample_time
+        return {
+            "connected": error is None,
+            "error": error,
+            "last_sample": sample_time,
+            "sample_age": age,
+            "sample_duration": duration,
+        }
+
+    def render(self):
+        metrics, sample_time, duration, error = self.state
+        families = [
+            (
+                "obs_up",
+                "gauge",
+                "Whether the last sample of OBS succeeded",
+                [({}, error is None)],
+            ),
+            (
+                "obs_sample_age_seconds",
+                "gauge",
+                "Time since the last successful sample",
+                (
+                    [({}, time.time() - sample_time)]
+                    if sample_time is not None
+                    else []
+                ),
+            ),
+            (
+                "obs_sample_duration_seconds",
+                "gauge",
+                "Time the last successful sample took",
+                [({}, duration)] if duration is not None else [],
+            ),
+        ]
+        # Metrics of the last good sample are kept while OBS is away,
+        # obs_up and the sample age tell whether they are current
+        return format_metrics(families) + metrics
+
+
+def parse_listen_address(value):
+    # ":9455", "127.0.0.1:9455" or "[::1]:9455"
+    host, sep, port = value.rpartition(":")
+    if not sep or not port.isdigit():
+        raise argparse.ArgumentTypeError(f"invalid address: '{value}'")
+    return host.strip("[]"), int(port)
+
+
+def make_exporter_handler(sampler):
+    # http.server is only needed here, keep it out of the start-up path
+    from http.server import BaseHTTPRequestHandler
+
+    class ExporterRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/metrics":
+                self.reply(
+                    200,
+                    "text/plain; version=0.0.4; charset=utf-8",
+                    sampler.render(),
+                )
+            elif path == "/healthz":
+                health = sampler.health()
+                healthy = (
+                    health["connected"]
+                    and health["sample_age"] is not None
+                    and health["sample_age"] < 3 * sampler.args.interval
+                )
+                self.reply(
+                    200 if healthy else 503,
+                    "application/json",
+                    json.dumps(health) + "\n",
+                )
+            else:
+                self.reply(404, "text/plain", "not found\n")
+
+        def reply(self, status, content_type, body):
+            body = body.encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            LOGGER.debug(f"{self.address_string()} {format % args}")
+
+    return ExporterRequestHandler
+
+
+def run_exporter(args, error_console):
+    import signal
+    import socket
+    from http.server import ThreadingHTTPServer
+
+    host, port = args.listen
+    if args.timeout is None:
+        # A request that is never answered would otherwise stall the
+        # sampler, and the last sample would be served as current. A
+        # timeout fails the sample (obs_up 0) and the next one reconnects.
+        args.timeout = max(args.interval, 1.0)
+    sampler = ExporterSampler(args)
+    server_class = ThreadingHTTPServer
+    if ":" in host:
+        server_class = type(
+            "ExporterServer",
+            (ThreadingHTTPServer,),
+            {"address_family": socket.AF_INET6},
+        )
+    try:
+        server = server_class((host, port), make_exporter_handler(sampler))
+    except OSError as exc:
+        print_error(error_console, f"cannot listen on {host}:{port}: {exc}")
+        return 1
+    server.daemon_threads = True
+    sampler.start()
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    LOGGER.info(f"Serving metrics on http://{host or '*'}:{port}/metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        sampler.stopped.set()
+        sampler.join()
+    return 0
+
+
+def parse_host(entry, port, password=None):
+    # "host", "host:port" or "[v6 address]:port" -> (host, port, password)
+    host, sep, host_port = entry.rpartition(":")
+    if (
+        not sep
+        or not host_port.isdigit()
+        or (":" in host and not host.startswith("["))
+    ):
+        return entry.strip("[]"), port, password
+    return host.strip("[]"), int(host_port), password
+
+
+def read_hosts_file(path, port, password=None):
+    # One "host[:port] [password]" per line, # starts a comment
+    hosts = []
+    with sys.stdin if path == "-" else open(path, encoding="utf-8") as f:
+        for line in f:
+            fields = shlex.split(line, comments=True)
+            if fields:
+                hosts.append(
+                    parse_host(
+                        fields[0],
+                        port,
+                        fields[1] if len(fields) > 1 else password,
+                    )
+                )
+    return hosts
 
 
-def record_status(cl):
-    return cl.get_record_status().output_active
+# Stands in for sys.stdout/sys.stderr while fanning out: what a worker
+# thread writes goes to that thread's own buffer
+class ThreadLocalStream:
+    def __init__(self, default):
+        self.default = default
+        self.local = threading.local()
 
+    def capture(self, stream):
+        self.local.stream = stream
 
-def record_start(cl):
-    return cl.start_record()
+    def __getattr__(self, name):
+        return getattr(
+            getattr(self.local, "stream", None) or self.default, name
+        )
 
 
-def record_stop(cl):
-    return cl.stop_record()
+def is_timeout(exc):
+    return isinstance(
+        exc,
+        (
+            TimeoutError,
+            asyncio.TimeoutError,
+            obs.error.OBSSDKTimeoutError,
+        ),
+    )
 
 
-def record_toggle(cl):
-    return cl.toggle_record()
+# Console for one host of a fan-out: an unexpected error is kept instead of
+# printed as a traceback, to be reported as the host's status
+class HostConsole:
+    def __init__(self):
+        self.console = LazyConsole()
+        self.exception = None
 
+    def print_exception(self, **kwargs):
+        self.exception = sys.exc_info()[1] or self.exception
 
-def source_active(cl, source):
-    res = cl.send("GetSourceActive", {"sourceName": source}, raw=True)
-    return res.get("videoActive", False), res.get("videoShowing", False)
+    def __getattr__(self, name):
+        return getattr(self.console, name)
 
 
-def take_screenshot(
-    cl,
-    source,
-    image_format="png",
-    width=None,
-    height=None,
-    compression_quality=-1,
-):
-    payload = {
-        "sourceName": source,
-        "imageFormat": image_format,
-        "imageCompressionQuality": compression_quality,
+def run_on_host(args, host, stdout, stderr):
+    # Runs the command against one host, with this thread's output captured
+    sys.stdout.capture(stdout)
+    sys.stderr.capture(stderr)
+    host_args = argparse.Namespace(**vars(args))
+    host_args.host, host_args.port, host_args.password = host
+    start = time.monotonic()
+    cl = None
+    try:
+        cl = connect(host_args)
+        console = HostConsole()
+        with trace_span("command", f"{host[0]}:{host[1]}"):
+            rc = run_command(cl, host_args, console, LazyConsole(stderr=True))
+        if console.exception is not None:
+            raise console.exception
+        status = "ok" if not rc else "failed"
+    except SystemExit as exc:
+        rc = exc.code if isinstance(exc.code, int) else 1
+        status = "ok" if not rc else "failed"
+    except Exception as exc:
+        rc = 1
+        status = "timeout" if is_timeout(exc) else "error"
+        stderr.write(f"{exc or type(exc).__name__}\n")
+    finally:
+        latency = time.monotonic() - start
+        if cl is not None:
+            with contextlib.suppress(Exception):
+                disconnect(cl)
+    stdout.flush()
+    stderr.flush()
+    return {
+        "host": f"{host[0]}:{host[1]}",
+        "status": status,
+        "rc": rc or 0,
+        "latency_ms": round(latency * 1000, 1),
     }
-    if width:
-        payload["imageWidth"] = width
-    if height:
-        payload["imageHeight"] = height
-    res = cl.send("GetSourceScreenshot", payload)
-    image_data = res.image_data
-    # Strip data URI prefix (e.g. "data:image/png;base64,")
-    if "," in image_data:
-        image_data = image_data.split(",", 1)[1]
-    return base64.b64decode(image_data)
 
 
-_NA = Text("N/A", style="bright_black italic")
+def parse_output(stdout):
+    # A host's stdout, as JSON if it is
+    text = stdout.buffer.getvalue().decode("utf-8", "replace")
+    with contextlib.suppress(ValueError):
+        return json.loads(text)
+    return text.rstrip("\n")
 
 
-_COLUMN_STYLES = (
-    "cyan",
-    "green",
-    "magenta",
-    "white",
-    "yellow",
-    "blue",
-    "bright_black",
-    "red",
-)
-
+def run_fanout(args, console, error_console):
+    # The command runs against every host at once on a bounded thread pool.
+    # Every host has its own connection with args.timeout applied to
+    # connecting and to each request.
+    import concurrent.futures
 
-def make_table(*headers):
-    table = Table(
-        box=None,
-        show_edge=False,
-        pad_edge=False,
-        padding=(0, 2, 0, 0),
-        header_style="bold",
+    if local_command(args):
+        print_error(
+            error_console,
+            f"'{local_command(args)}' cannot run on several hosts",
+        )
+        return 2
+
+    load_modules()
+    hosts = args.hosts
+    outputs = {
+        host: (
+            io.TextIOWrapper(io.BytesIO(), encoding="utf-8"),
+            io.TextIOWrapper(io.BytesIO(), encoding="utf-8"),
+        )
+        for host in hosts
+    }
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = ThreadLocalStream(stdout), ThreadLocalStream(
+        stderr
     )
-    for i, header in enumerate(headers):
-        table.add_column(
-            header.upper(), style=_COLUMN_STYLES[i % len(_COLUMN_STYLES)]
+    results = {}
+    try:
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(args.parallel, len(hosts))
+        ) as pool:
+            futures = {
+                pool.submit(run_on_host, args, host, *outputs[host]): host
+                for host in hosts
+            }
+            for future in concurrent.futures.as_completed(futures):
+                host = futures[future]
+                result = future.result()
+                out, err = outputs[host]
+                result["output"] = parse_output(out)
+                result["error"] = (
+                    err.buffer.getvalue().decode("utf-8", "replace").strip()
+                    or None
+                )
+                results[host] = result
+                if args.json:
+                    # NDJSON, as hosts finish
+                    stdout.write(json.dumps(result) + "\n")
+                    stdout.flush()
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+
+    failed = any(result["rc"] for result in results.values())
+    if args.json or (args.quiet and not failed):
+        return 1 if failed else 0
+    table = make_table("host", "status", "latency", "output")
+    for host in hosts:
+        result = results[host]
+        output = result["output"]
+        if not isinstance(output, str):
+            output = json.dumps(output)
+        if result["rc"] and result["error"]:
+            # The last line of an error is the most telling one
+            output = result["error"].splitlines()[-1]
+        table.add_row(
+            result["host"],
+            result["status"],
+            f"{result['latency_ms']:.1f} ms",
+            output,
         )
-    return table
-
-
-def format_info_value(value, suffix=None):
-    if value is None:
-        return _NA
-
-    if isinstance(value, bool):
-        if value:
-            return Text("enabled", style="bold green")
-        return Text("disabled", style="bold red")
-
-    if isinstance(value, float):
-        value = f"{value:.2f}".rstrip("0").rstrip(".")
-
-    if isinstance(value, Text):
-        return value
+    console.print(table)
+    return 1 if failed else 0
+
+
+# Shell completion reads names from a per-host JSON file instead of asking
+# OBS, so that Tab stays fast when OBS is slow or far away. Once the file
+# is older than the TTL, completion starts a full refresh in the background
+# and answers from what it has. In between, any command that fetched a
+# listing anyway writes it back. Nothing is written until completion was
+# used for a host.
+_COMPLETION_TTL = float(os.environ.get("OBS_CLI_COMPLETION_TTL", 300))
+
+_COMPLETION_SCRIPTS = {
+    "bash": """\
+_obs_cli() {
+    local name
+    COMPREPLY=()
+    while IFS= read -r name; do
+        COMPREPLY+=("$(printf '%q' "$name")")
+    done < <(obs-cli completion complete \
+        "${COMP_WORDS[@]:1:COMP_CWORD}" 2>/dev/null)
+}
+complete -o default -F _obs_cli obs-cli
+""",
+    "zsh": """\
+#compdef obs-cli
+_obs_cli() {
+    local -a names
+    names=("${(@f)$(obs-cli completion complete \\
+        "${(@Q)words[2,CURRENT]}" 2>/dev/null)}")
+    (( ${#names} )) && compadd -a names || _files
+}
+compdef _obs_cli obs-cli
+""",
+    "fish": """\
+function __obs_cli_complete
+    set -l tokens (commandline -opc) (commandline -ct)
+    obs-cli completion complete $tokens[2..-1] 2>/dev/null
+end
+complete -c obs-cli -a '(__obs_cli_complete)'
+""",
+}
+
+# (command, positional) -> what it names
+_COMPLETION_KINDS = {
+    ("scene", "SCENE"): "scenes",
+    ("group", "group"): "groups",
+    ("item", "ITEM"): "items",
+    ("input", "INPUT"): "inputs",
+    ("filter", "INPUT"): "sources",
+    ("filter", "FILTER"): "filters",
+    ("hotkey", "HOTKEY"): "hotkeys",
+    ("source", "SOURCE"): "sources",
+}
+
+
+def get_name_cache_path(host, port):
+    cache_dir = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_dir, "obs-cli", f"{host}-{port}.json")
 
-    text = str(value)
-    if suffix:
-        text = f"{text} {suffix}"
-    return Text(text)
 
+def read_name_cache(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
 
-def make_info_panel(title, rows, border_style):
-    table = Table.grid(expand=True)
-    table.add_column(style="cyan", no_wrap=True)
-    table.add_column(style="white")
 
-    for key, value, *rest in rows:
-        suffix = rest[0] if rest else None
-        table.add_row(key, format_info_value(value, suffix=suffix))
+def write_name_cache(path, names):
+    # Replaced atomically, completion may be reading it
+    import tempfile
 
-    return Panel(
-        table,
-        title=title,
-        border_style=border_style,
-        padding=(0, 1),
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path), prefix=".names-"
     )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(names, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def update_names(names, key, value):
+    # Merges a listing as returned by cached() into the name cache
+    kind, *rest = key
+    if kind == "scene_names":
+        names["scenes"] = list(value)
+    elif kind == "current_scene":
+        names["current_scene"] = value
+    elif kind == "inputs":
+        names["inputs"] = [input.get("inputName") for input in value]
+    elif kind == "hotkeys":
+        names["hotkeys"] = list(value)
+    elif kind == "filters":
+        names.setdefault("filters", {})[rest[0]] = [
+            f.get("filterName") for f in value
+        ]
+    elif kind == "items":
+        scene, recurse = rest
+        names.setdefault("groups", {})[scene] = [
+            it.get("sourceName")
+            for it in value
+            if it.get("isGroup") and not it.get("parentGroup")
+        ]
+        # Without recurse, the items of groups are missing
+        if recurse:
+            names.setdefault("items", {})[scene] = [
+                it.get("sourceName") for it in value if not it.get("isGroup")
+            ]
+
+
+def save_names(cl):
+    if not cl.names:
+        return
+    listings, cl.names = cl.names, []
+    kwargs = cl.connect_kwargs
+    path = get_name_cache_path(kwargs["host"], kwargs["port"])
+    names = read_name_cache(path)
+    if names is None:
+        return
+    for key, value in listings:
+        update_names(names, key, value)
+    with contextlib.suppress(OSError):
+        write_name_cache(path, names)
 
 
-def use_pretty_output(args):
-    return bool(getattr(args, "pretty", False)) and not args.json
-
+def fetch_names(cl):
+    # Everything completion offers, in three round trips
+    scenes, inputs, hotkeys = cl.send_many(
+        ("GetSceneList", "GetInputList", "GetHotkeyList"), raw=True
+    )
+    scene_names = sorted(s["sceneName"] for s in scenes.get("scenes", []))
+    input_names = sorted(i["inputName"] for i in inputs.get("inputs", []))
+    names = {
+        "time": time.time(),
+        "scenes": scene_names,
+        "current_scene": scenes.get("currentProgramSceneName"),
+        "inputs": input_names,
+        "hotkeys": hotkeys.get("hotkeys", []),
+        "items": {},
+        "groups": {},
+        "filters": {},
+    }
+    sources = scene_names + input_names
+    results = cl.send_many(
+        [("GetSceneItemList", {"sceneName": name}) for name in scene_names]
+        + [("GetSourceFilterList", {"sourceName": name}) for name in sources],
+        raw=True,
+        return_exceptions=True,
+    )
+    scene_items = dict(zip(scene_names, results))
+    for source, res in zip(
+        sources, itertools.islice(results, len(scene_names), None)
+    ):
+        if not isinstance(res, Exception):
+            names["filters"][source] = [
+                f["filterName"] for f in res.get("filters", [])
+            ]
 
-def render_pretty_panels(console, panels):
-    if not panels:
+    groups = sorted(
+        {
+            it["sourceName"]
+            for res in scene_items.values()
+            if not isinstance(res, Exception)
+            for it in res.get("sceneItems", [])
+            if it.get("isGroup")
+        }
+    )
+    group_items = dict(
+        zip(
+            groups,
+            cl.send_many(
+                (
+                    ("GetGroupSceneItemList", {"sceneName": group})
+                    for group in groups
+                ),
+                raw=True,
+                return_exceptions=True,
+            ),
+        )
+    )
+    for scene, res in scene_items.items():
+        if isinstance(res, Exception):
+            continue
+        items = []
+        names["groups"][scene] = []
+        for it in res.get("sceneItems", []):
+            if not it.get("isGroup"):
+                items.append(it["sourceName"])
+                continue
+            names["groups"][scene].append(it["sourceName"])
+            members = group_items.get(it["sourceName"])
+            if not isinstance(members, Exception):
+                items.extend(m["sourceName"] for m in members["sceneItems"])
+        names["items"][scene] = sorted(items)
+    return names
+
+
+def start_name_refresh(args, path):
+    # At most one refresh per host at a time: the lock file is removed by
+    # the refresh, or ignored once it is older than the TTL
+    import subprocess
+
+    lock_path = f"{path}.lock"
+    with contextlib.suppress(OSError):
+        if time.time() - os.stat(lock_path).st_mtime < _COMPLETION_TTL:
+            return
+        os.unlink(lock_path)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL, 0o600))
+    except OSError:
         return
-    console.print(Columns(panels, expand=True, equal=True))
+    env = dict(os.environ)
+    if args.password:
+        # Not on the command line, where other users could see it
+        env["OBS_API_PASSWORD"] = args.password
+    # Run as a module from wherever this one was loaded, since argv[0] may
+    # be a wrapper or shim rather than a Python script
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(
+            None,
+            (
+                os.path.dirname(os.path.abspath(__file__)),
+                env.get("PYTHONPATH"),
+            ),
+        )
+    )
+    try:
+        # Errors end up in the log, e.g. when the refresh cannot start and
+        # so leaves the lock in place until it expires
+        with open(f"{path}.log", "wb") as log:
+            subprocess.Popen(
+                [
+                    sys.executable,
+                    "-m",
+                    "obs_cli",
+                    "--no-daemon",
+                    "-H",
+                    args.host,
+                    "-P",
+                    str(args.port),
+                    "completion",
+                    "refresh",
+                ],
+                env=env,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=log,
+                start_new_session=True,
+            )
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.unlink(lock_path)
+
+
+def complete_words(words, names):
+    # Candidates for the last of words, the command line being completed
+    # without the program name
+    parser = build_parser()
+    *done, current = words or [""]
+    current = current.lstrip("'\"").replace("\\ ", " ")
+
+    command = None
+    active = parser
+    positionals = []
+    options = {}
+    expect = None
+    for word in done:
+        if expect is not None:
+            options[expect.dest] = word
+            expect = None
+        elif word.startswith("-") and word != "-":
+            option, sep, value = word.partition("=")
+            action = active._option_string_actions.get(option)
+            if action is None:
+                continue
+            if sep:
+                options[action.dest] = value
+            elif action.nargs != 0:
+                expect = action
+        elif command is None:
+            subparsers = parser._subparsers._group_actions[0]
+            if word not in subparsers.choices:
+                return []
+            command = _COMMAND_ALIASES.get(word, word)
+            active = subparsers.choices[word]
+        else:
+            positionals.append(word)
+
+    if expect is not None:
+        if expect.dest == "scene":
+            candidates = names.get("scenes", [])
+        else:
+            candidates = expect.choices or []
+    elif current.startswith("-"):
+        candidates = sorted(active._option_string_actions)
+    elif command is None:
+        candidates = parser._subparsers._group_actions[0].choices
+    else:
+        candidates = []
+        position = len(positionals)
+        for action in active._actions:
+            if action.option_strings:
+                continue
+            if position > 0 and action.nargs not in ("*", "+"):
+                position -= 1
+                continue
+            if action.choices:
+                candidates = action.choices
+                break
+            kind = _COMPLETION_KINDS.get((command, action.dest))
+            scene = options.get("scene") or names.get("current_scene")
+            if kind in ("items", "groups"):
+                candidates = names.get(kind, {}).get(scene, [])
+            elif kind == "sources":
+                candidates = names.get("inputs", []) + names.get("scenes", [])
+            elif kind == "filters" and positionals:
+                candidates = names.get("filters", {}).get(positionals[-1], [])
+            elif kind is not None:
+                candidates = names.get(kind, [])
+            break
+    return sorted(
+        {
+            name
+            for name in candidates
+            if isinstance(name, str) and name.startswith(current)
+        }
+    )
 
 
-def render_pretty_hotkeys(console, hotkeys):
-    rows = tuple(
-        (str(index + 1), hotkey) for index, hotkey in enumerate(hotkeys)
+def run_completion(args, error_console):
+    if args.action in _COMPLETION_SCRIPTS:
+        sys.stdout.write(_COMPLETION_SCRIPTS[args.action])
+        return 0
+
+    # refresh
+    path = get_name_cache_path(args.host, args.port)
+    try:
+        cl = connect(args)
+        try:
+            names = fetch_names(cl)
+        finally:
+            disconnect(cl)
+        write_name_cache(path, names)
+    except Exception as exc:
+        print_error(error_console, f"{exc or type(exc).__name__}")
+        return 1
+    finally:
+        with contextlib.suppress(OSError):
+            os.unlink(f"{path}.lock")
+    return 0
+
+
+def run_complete(words):
+    # Prints the candidates for the last of words. The host is the default
+    # one unless the command line being completed names another.
+    args = argparse.Namespace(password=os.environ.get("OBS_API_PASSWORD"))
+    args.host, args.port, _ = parse_host(
+        os.environ.get("OBS_API_HOST", "localhost"),
+        int(os.environ.get("OBS_API_PORT", 4455)),
     )
-    console.print(make_info_panel("Hotkeys", rows, "yellow"))
+    for i, word in enumerate(words[:-1]):
+        if word in ("-H", "--host"):
+            args.host, args.port, _ = parse_host(words[i + 1], args.port)
+        elif word in ("-P", "--port") and words[i + 1].isdigit():
+            args.port = int(words[i + 1])
+        elif word in ("-p", "--password"):
+            args.password = words[i + 1]
+    path = get_name_cache_path(args.host, args.port)
+    names = read_name_cache(path)
+    if names is None or time.time() - names.get("time", 0) > _COMPLETION_TTL:
+        start_name_refresh(args, path)
+    for name in complete_words(words, names or {}):
+        sys.stdout.write(f"{name}\n")
+    return 0
+
+
+def load_modules():
+    # Lazily imported modules, loaded up front: loading is not thread-safe,
+    # and --trace reports it apart from connecting
+    with trace_span("import", "modules"):
+        get_client_class()
+        asyncio.TimeoutError
+
+
+def connect(args, index=False):
+    load_modules()
+    cl = get_client_class()(
+        host=args.host,
+        port=args.port,
+        password=args.password,
+        timeout=args.timeout,
+    )
+    if index:
+        cl.index = ObsIndex(cl)
+    return cl
 
 
-def print_error(console, message):
-    console.print(f"[bold red]ERROR:[/bold red] {message}")
+def disconnect(cl):
+    save_names(cl)
+    if cl.index is not None:
+        cl.index.close()
+    cl.disconnect()
 
 
-def main():
-    console = Console()
-    error_console = Console(stderr=True)
-    logging.basicConfig()
+def run_filter_sweep(cl, args, console):
+    # filter list --all or with a glob: the filters of many sources in one
+    # table, or as NDJSON with one filter per line
+    sources = expand_sources(
+        cl, [args.INPUT or "*"], all_sources=args.all, scenes=True
+    )
+    rows = [
+        {
+            "sourceName": source,
+            "filterKind": f.get("filterKind"),
+            "filterName": f.get("filterName"),
+            "filterEnabled": f.get("filterEnabled"),
+            **(
+                {"filterSettings": f.get("filterSettings")}
+                if args.settings
+                else {}
+            ),
+        }
+        for source, filters in get_all_filters(cl, sources).items()
+        for f in filters
+    ]
+    if args.json:
+        for row in rows:
+            sys.stdout.write(json.dumps(row, ensure_ascii=False) + "\n")
+        return 0
+    if use_pretty_output(args):
+        render_pretty_panels(
+            console,
+            [
+                make_info_panel(
+                    row["filterName"],
+                    (
+                        ("source", row["sourceName"]),
+                        ("kind", row["filterKind"]),
+                        ("enabled", row["filterEnabled"]),
+                    ),
+                    "red",
+                )
+                for row in rows
+            ],
+        )
+        return 0
+    table = make_table(
+        "source", "kind", "name", "enabled", *["settings"] * args.settings
+    )
+    for row in rows:
+        table.add_row(
+            row["sourceName"],
+            row["filterKind"],
+            row["filterName"],
+            str(row["filterEnabled"]).lower(),
+            *[json.dumps(row.get("filterSettings"))] * args.settings,
+        )
+    console.print(table)
+    return 0
 
-    args = parse_args()
-    LOGGER.setLevel(logging.DEBUG if args.debug else logging.INFO)
-    LOGGER.debug(args)
 
+def run_command(cl, args, console, error_console):
     try:
-        cl = obs.ReqClient(
-            host=args.host,
-            port=args.port,
-            password=args.password,
-        )
-
-        _aliases = {
-            "scenes": "scene",
-            "groups": "group",
-            "items": "item",
-            "inputs": "input",
-            "filters": "filter",
-            "hotkeys": "hotkey",
-            "sources": "source",
-        }
-        cmd = _aliases.get(args.command, args.command)
+        cmd = _COMMAND_ALIASES.get(args.command, args.command)
         if cmd == "info":
             data = get_obs_info(cl)
             if args.json:
@@ -973,6 +5891,8 @@ def main():
                     ),
                     "magenta",
                 )
+                from rich.columns import Columns
+
                 console.print(Columns((obs_panel, video_panel), expand=True))
                 console.print(stats_panel)
                 return
@@ -1032,14 +5952,20 @@ def main():
                 ),
             )
             for key, value in rows:
-                table.add_row(key, _NA if value is None else str(value))
+                table.add_row(key, na() if value is None else str(value))
             console.print(table)
         elif cmd == "scene":
             if args.action == "current":
-                print(get_current_scene_name(cl))
+                print_word(get_current_scene_name(cl))
             elif args.action == "list":
                 res = cl.get_scene_list()
                 LOGGER.debug(res)
+                cl.names.append(
+                    (
+                        ("scene_names",),
+                        sorted(sc.get("sceneName") for sc in res.scenes),
+                    )
+                )
                 if args.json:
                     print_json(data=res.scenes)
                     return
@@ -1070,58 +5996,18 @@ def main():
                     table.add_row(
                         str(sc.get("sceneIndex")),
                         sc.get("sceneName"),
-                        (
-                            Text("true", style="bold green")
-                            if is_current
-                            else Text("false", style="bright_black")
-                        ),
+                        format_bool(is_current),
                     )
                 console.print(table)
             elif args.action == "switch":
                 if not args.SCENE:
                     print_error(error_console, "missing scene name")
                     return 2
-                res = switch_to_scene(cl, args.SCENE, exact=False)
+                res = switch_to_scene(cl, args.SCENE, exact=args.exact)
                 LOGGER.debug(res)
             elif args.action == "screenshot":
-                if not args.raw and not args.json and not args.output:
-                    print(
-                        "ERROR: --output required without --raw/--json",
-                        file=sys.stderr,
-                    )
-                    return 2
                 scene = args.SCENE or get_current_scene_name(cl)
-                fmt = args.format
-                if not fmt and args.output and not args.json:
-                    ext = os.path.splitext(args.output)[1].lstrip(".")
-                    if ext:
-                        fmt = ext.lower()
-                fmt = fmt or "png"
-                data = take_screenshot(
-                    cl,
-                    scene,
-                    image_format=fmt,
-                    width=args.width,
-                    height=args.height,
-                    compression_quality=args.compression_quality,
-                )
-                if args.json:
-                    json_out = json.dumps(
-                        {
-                            "format": fmt,
-                            "data": base64.b64encode(data).decode(),
-                        }
-                    )
-                    if args.output:
-                        with open(args.output, "w") as f:
-                            f.write(json_out)
-                    else:
-                        print_json(json_out)
-                elif args.raw:
-                    sys.stdout.buffer.write(data)
-                else:
-                    with open(args.output, "wb") as f:
-                        f.write(data)
+                return run_screenshot(cl, args, scene)
 
         elif cmd == "group":
             scene = args.scene or get_current_scene_name(cl)
@@ -1158,20 +6044,25 @@ def main():
                         str(group.get("sceneItemEnabled")).lower(),
                     )
                 console.print(table)
-            elif args.action == "toggle":
-                res = toggle_item(cl, args.group, scene=scene, is_group=True)
-                LOGGER.debug(res)
-            elif args.action == "show":
-                res = show_item(cl, args.group, scene=scene, is_group=True)
-                LOGGER.debug(res)
-            elif args.action == "hide":
-                res = hide_item(cl, args.group, scene=scene, is_group=True)
+            elif args.action in ("toggle", "show", "hide"):
+                if not args.group:
+                    print_error(error_console, "missing group name")
+                    return 2
+                snapshot = get_item_snapshot(cl, scene, recurse=False)
+                res = set_items_enabled(
+                    cl,
+                    args.group,
+                    _ITEM_STATES[args.action],
+                    scene=scene,
+                    is_group=True,
+                    snapshot=snapshot,
+                )
                 LOGGER.debug(res)
 
         elif cmd == "item":
             scene = args.scene or get_current_scene_name(cl)
             if args.action == "list":
-                data = get_items(cl, args.scene)
+                data = get_items(cl, scene)
                 if args.json:
                     print_json(data=data)
                     return
@@ -1204,74 +6095,45 @@ def main():
                     group = (item.get("parentGroup") or {}).get("sourceName")
                     table.add_row(
                         str(item.get("sceneItemId")),
-                        group or _NA,
+                        group or na(),
                         item.get("sourceName"),
                         str(item.get("sceneItemEnabled")).lower(),
                     )
                 console.print(table)
-            elif args.action == "toggle":
-                res = toggle_item(cl, item=args.ITEM, scene=scene)
-                LOGGER.debug(res)
-            elif args.action == "show":
-                res = show_item(cl, item=args.ITEM, scene=scene)
-                LOGGER.debug(res)
-            elif args.action == "hide":
-                res = hide_item(cl, item=args.ITEM, scene=scene)
-                LOGGER.debug(res)
-            elif args.action == "screenshot":
-                if not args.raw and not args.json and not args.output:
-                    print(
-                        "ERROR: --output required without --raw/--json",
-                        file=sys.stderr,
-                    )
+            elif args.action in ("toggle", "show", "hide"):
+                if not args.ITEM:
+                    print_error(error_console, "missing item name")
                     return 2
-                fmt = args.format
-                if not fmt and args.output and not args.json:
-                    ext = os.path.splitext(args.output)[1].lstrip(".")
-                    if ext:
-                        fmt = ext.lower()
-                fmt = fmt or "png"
-                data = take_screenshot(
+                snapshot = get_item_snapshot(cl, scene)
+                res = set_items_enabled(
                     cl,
                     args.ITEM,
-                    image_format=fmt,
-                    width=args.width,
-                    height=args.height,
-                    compression_quality=args.compression_quality,
+                    _ITEM_STATES[args.action],
+                    scene=scene,
+                    snapshot=snapshot,
                 )
-                if args.json:
-                    json_out = json.dumps(
-                        {
-                            "format": fmt,
-                            "data": base64.b64encode(data).decode(),
-                        }
-                    )
-                    if args.output:
-                        with open(args.output, "w") as f:
-                            f.write(json_out)
-                    else:
-                        print_json(json_out)
-                elif args.raw:
-                    sys.stdout.buffer.write(data)
-                else:
-                    with open(args.output, "wb") as f:
-                        f.write(data)
+                LOGGER.debug(res)
+            elif args.action == "screenshot":
+                if len(args.ITEM) != 1:
+                    print_error(error_console, "screenshot takes one item")
+                    return 2
+                return run_screenshot(cl, args, args.ITEM[0])
 
         elif cmd == "input":
-            if args.action == "list":
+            if args.action == "meter":
+                return run_meter(cl, args, console, error_console)
+            elif args.action == "list":
                 data = get_inputs(cl)
                 if args.json:
                     print_json(data=data)
                     return
+                mute_states = get_mute_states(cl, data)
                 if use_pretty_output(args):
                     panels = []
                     for input in data:
                         kind = input.get("inputKind")
                         name = input.get("inputName")
-                        if kind in ["ffmpeg_source"] or "capture" in kind:
-                            muted = get_mute_state(cl, name)
-                        else:
-                            muted = None
+                        muted = mute_states.get(name)
                         panels.append(
                             make_info_panel(
                                 name,
@@ -1289,11 +6151,8 @@ def main():
                 for input in data:
                     kind = input.get("inputKind")
                     name = input.get("inputName")
-                    # FIXME The inputKind whitelist here is probably incomplete
-                    if kind in ["ffmpeg_source"] or "capture" in kind:
-                        muted = str(get_mute_state(cl, name)).lower()
-                    else:
-                        muted = _NA
+                    muted = mute_states.get(name)
+                    muted = na() if muted is None else str(muted).lower()
                     table.add_row(kind, name, muted)
                 console.print(table)
             elif args.action == "show" or args.action == "get":
@@ -1325,9 +6184,13 @@ def main():
 
             elif args.action == "is-muted":
                 res = get_mute_state(cl, args.INPUT)
-                print("enabled" if res else "disabled")
+                print_word("enabled" if res else "disabled")
 
         elif cmd == "filter":
+            if args.action == "list" and (
+                args.all or (args.INPUT and is_glob(args.INPUT))
+            ):
+                return run_filter_sweep(cl, args, console)
             if args.action == "list":
                 data = get_filters(cl, args.INPUT)
                 if args.json:
@@ -1349,12 +6212,15 @@ def main():
                         )
                     render_pretty_panels(console, panels)
                     return
-                table = make_table("kind", "name", "enabled")
+                table = make_table(
+                    "kind", "name", "enabled", *["settings"] * args.settings
+                )
                 for f in data:
                     table.add_row(
                         f.get("filterKind"),
                         f.get("filterName"),
                         str(f.get("filterEnabled")).lower(),
+                        *[json.dumps(f.get("filterSettings"))] * args.settings,
                     )
                 console.print(table)
             elif args.action == "toggle":
@@ -1371,7 +6237,7 @@ def main():
                 LOGGER.debug(res)
                 if args.quiet:
                     sys.exit(0 if res else 1)
-                print("enabled" if res else "disabled")
+                print_word("enabled" if res else "disabled")
         elif cmd == "hotkey":
             if args.action == "list":
                 data = get_hotkeys(cl)
@@ -1415,45 +6281,20 @@ def main():
                     )
                 console.print(table)
             elif args.action == "screenshot":
-                if not args.raw and not args.json and not args.output:
-                    print(
-                        "ERROR: --output required without --raw/--json",
-                        file=sys.stderr,
+                if (
+                    args.all
+                    or len(args.SOURCE) > 1
+                    or any(map(is_glob, args.SOURCE))
+                ):
+                    return run_multi_screenshot(
+                        cl, args, console, error_console
                     )
-                    return 2
-                fmt = args.format
-                if not fmt and args.output and not args.json:
-                    ext = os.path.splitext(args.output)[1].lstrip(".")
-                    if ext:
-                        fmt = ext.lower()
-                fmt = fmt or "png"
-                data = take_screenshot(
-                    cl,
-                    args.SOURCE,
-                    image_format=fmt,
-                    width=args.width,
-                    height=args.height,
-                    compression_quality=args.compression_quality,
+                return run_screenshot(
+                    cl, args, args.SOURCE[0] if args.SOURCE else None
                 )
-                if args.json:
-                    json_out = json.dumps(
-                        {
-                            "format": fmt,
-                            "data": base64.b64encode(data).decode(),
-                        }
-                    )
-                    if args.output:
-                        with open(args.output, "w") as f:
-                            f.write(json_out)
-                    else:
-                        print_json(json_out)
-                elif args.raw:
-                    sys.stdout.buffer.write(data)
-                else:
-                    with open(args.output, "wb") as f:
-                        f.write(data)
             elif args.action == "active":
-                active, showing = source_active(cl, args.SOURCE)
+                source = args.SOURCE[0] if args.SOURCE else None
+                active, showing = source_active(cl, source)
                 if args.json:
                     print_json(data={"active": active, "showing": showing})
                     return
@@ -1461,17 +6302,9 @@ def main():
                     sys.exit(0 if active else 1)
                 table = make_table("source", "active", "showing")
                 table.add_row(
-                    args.SOURCE,
-                    (
-                        Text("true", style="bold green")
-                        if active
-                        else Text("false", style="bright_black")
-                    ),
-                    (
-                        Text("true", style="bold green")
-                        if showing
-                        else Text("false", style="bright_black")
-                    ),
+                    source,
+                    format_bool(active),
+                    format_bool(showing),
                 )
                 console.print(table)
 
@@ -1481,7 +6314,7 @@ def main():
                 LOGGER.debug(res)
                 if args.quiet:
                     sys.exit(0 if res else 1)
-                print("started" if res else "stopped")
+                print_word("started" if res else "stopped")
             elif args.action == "start":
                 res = virtual_camera_start(cl)
                 LOGGER.debug(res)
@@ -1493,12 +6326,17 @@ def main():
                 LOGGER.debug(res)
 
         elif cmd == "stream":
-            if args.action == "status":
+            if args.watch and args.action != "status":
+                print_error(error_console, "--watch only works with status")
+                return 2
+            if args.action == "status" and args.watch:
+                return run_output_watch(cl, args, console, error_console)
+            elif args.action == "status":
                 res = stream_status(cl)
                 LOGGER.debug(res)
                 if args.quiet:
                     sys.exit(0 if res else 1)
-                print("started" if res else "stopped")
+                print_word("started" if res else "stopped")
             elif args.action == "start":
                 res = stream_start(cl)
                 LOGGER.debug(res)
@@ -1510,12 +6348,17 @@ def main():
                 LOGGER.debug(res)
 
         elif cmd == "record":
-            if args.action == "status":
+            if args.watch and args.action != "status":
+                print_error(error_console, "--watch only works with status")
+                return 2
+            if args.action == "status" and args.watch:
+                return run_output_watch(cl, args, console, error_console)
+            elif args.action == "status":
                 res = record_status(cl)
                 LOGGER.debug(res)
                 if args.quiet:
                     sys.exit(0 if res else 1)
-                print("started" if res else "stopped")
+                print_word("started" if res else "stopped")
             elif args.action == "start":
                 res = record_start(cl)
                 LOGGER.debug(res)
@@ -1526,13 +6369,22 @@ def main():
                 res = record_toggle(cl)
                 LOGGER.debug(res)
 
+        elif cmd == "stats":
+            return run_stats(cl, args, console)
+
+        elif cmd == "apply":
+            return run_apply(cl, args, console, error_console)
+
+        elif cmd == "snapshot":
+            return run_snapshot(cl, args, error_console)
+
         elif cmd == "replay":
             if args.action == "status":
                 res = replay_status(cl)
                 LOGGER.debug(res)
                 if args.quiet:
                     sys.exit(0 if res else 1)
-                print("started" if res else "stopped")
+                print_word("started" if res else "stopped")
             elif args.action == "start":
                 res = replay_start(cl)
                 LOGGER.debug(res)
@@ -1553,9 +6405,106 @@ def main():
     except ObsSceneNotFoundException as ecp:
         print_error(error_console, str(ecp))
         return 1
+    except ObsAmbiguousNameException as ecp:
+        print_error(error_console, str(ecp))
+        return 1
+    except Exception:
+        console.print_exception(show_locals=True)
+        return 1
+    finally:
+        save_names(cl)
+
+
+# rich Console, created once something is printed to it. Use get() where
+# the Console itself is needed, e.g. as a context manager.
+class LazyConsole:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.console = None
+
+    def get(self):
+        if self.console is None:
+            with trace_span("render", "rich console"):
+                from rich.console import Console
+
+                self.console = Console(**self.kwargs)
+        return self.console
+
+    def __getattr__(self, name):
+        value = getattr(self.get(), name)
+        if TRACER is not None and name.startswith("print"):
+            return traced("render", f"console.{name}")(value)
+        return value
+
+
+def main(argv=None):
+    console = LazyConsole()
+    error_console = LazyConsole(stderr=True)
+    logging.basicConfig()
+
+    # The command line being completed is not ours to parse
+    words = sys.argv[1:] if argv is None else argv
+    if words[:2] == ["completion", "complete"]:
+        return run_complete(words[2:])
+
+    args = parse_args(argv)
+    LOGGER.setLevel(logging.DEBUG if args.debug else logging.INFO)
+    LOGGER.debug(args)
+
+    if not args.trace:
+        return dispatch(args, argv, console, error_console)
+    global TRACER
+    TRACER = Tracer()
+    try:
+        with TRACER.span("command", args.command):
+            return dispatch(args, argv, console, error_console)
+    finally:
+        TRACER.report(sys.stderr)
+        if args.trace_file:
+            TRACER.write_chrome_trace(args.trace_file)
+
+
+def dispatch(args, argv, console, error_console):
+    if args.command == "completion":
+        return run_completion(args, error_console)
+    if len(args.hosts) > 1:
+        return run_fanout(args, console, error_console)
+    if args.command == "daemon":
+        return run_daemon(args, console, error_console)
+    if args.command == "watch":
+        return run_watch(args, error_console)
+    if args.command == "exporter":
+        return run_exporter(args, error_console)
+    if args.command == "batch":
+        cl = connect(args, index=True)
+        try:
+            return run_batch(cl, args, console, error_console)
+        finally:
+            LOGGER.debug(
+                f"{cl.request_count} requests in {cl.round_trips} round trips"
+            )
+            disconnect(cl)
+    # Traced commands run here, not in the daemon
+    if not args.no_daemon and not args.trace and not local_command(args):
+        rc = forward_to_daemon(
+            args, sys.argv[1:] if argv is None else argv, error_console
+        )
+        if rc is not None:
+            return rc
+
+    cl = None
+    try:
+        cl = connect(args)
+        return run_command(cl, args, console, error_console)
     except Exception:
         console.print_exception(show_locals=True)
         return 1
+    finally:
+        if cl is not None:
+            LOGGER.debug(
+                f"{cl.request_count} requests in {cl.round_trips} round trips"
+            )
+            disconnect(cl)
 
 
 LOGGER = logging.getLogger(__name__)
@@ -0,0 +1,104 @@
+# Tests run obs-cli against the mock OBS server of the benchmarks
+# (benchmarks/mock_obs.py), in-process, with the default collection:
+# scenes "Scene 1", "Scene 2" and "Live", the latter with the group
+# "Overlay" (Logo, Clock).
+
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+import obs_cli
+from mock_obs import MockObsServer, ObsState
+
+
+@pytest.fixture(autouse=True)
+def environment(tmp_path, monkeypatch):
+    # Nothing from the user's environment: no daemon, hosts or name cache
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path / "run"))
+    for name in (
+        "OBS_API_HOST",
+        "OBS_API_PASSWORD",
+        "OBS_API_PORT",
+        "OBS_CLI_HOSTS",
+        "OBS_CLI_NO_DAEMON",
+        "OBS_CLI_SOCKET",
+    ):
+        monkeypatch.delenv(name, raising=False)
+
+
+@pytest.fixture
+def state():
+    return ObsState.default()
+
+
+@pytest.fixture
+def server(request, state):
+    # Server options can be given with indirect parametrization, e.g.
+    # {"batch_support": False}
+    server = MockObsServer(state, **getattr(request, "param", {}))
+    server.start_in_thread()
+    yield server
+    server.stop_thread()
+
+
+@pytest.fixture
+def run(server):
+    # Runs an obs-cli command line, returns its exit status
+    def run(*argv):
+        return obs_cli.main(
+            ["--no-daemon", "-H", server.host, "-P", str(server.port), *argv]
+        )
+
+    return run
+
+
+@pytest.fixture
+def daemon(server, tmp_path):
+    # A daemon process connected to the server, returns its socket path
+    path = str(tmp_path / "daemon.sock")
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            obs_cli.__file__,
+            "-H",
+            server.host,
+            "-P",
+            str(server.port),
+            "--socket",
+            path,
+            "daemon",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 10
+    while not os.path.exists(path):
+        assert process.poll() is None, "the daemon exited"
+        assert time.monotonic() < deadline, "the daemon did not start"
+        time.sleep(0.01)
+    yield path
+    process.terminate()
+    process.wait()
+
+
+@pytest.fixture
+def run_daemon(server, daemon):
+    # Runs an obs-cli command line through the daemon
+    def run(*argv):
+        return obs_cli.main(
+            [
+                "--socket",
+                daemon,
+                "-H",
+                server.host,
+                "-P",
+                str(server.port),
+                *argv,
+            ]
+        )
+
+    return run
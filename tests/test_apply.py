@@ -0,0 +1,135 @@
+import json
+
+import pytest
+
+
+@pytest.fixture
+def state_file(tmp_path):
+    def write(desired):
+        path = tmp_path / "state.json"
+        path.write_text(json.dumps(desired))
+        return str(path)
+
+    return write
+
+
+def enabled(state, container, name):
+    return [
+        it["sceneItemEnabled"]
+        for it in state.items[container]
+        if it["sourceName"] == name
+    ]
+
+
+DESIRED = {
+    "scenes": {
+        "Live": {
+            "items": {"Camera": False, "Logo": False},
+            "filters": {"Sharpen": False},
+        }
+    },
+    "inputs": {
+        "Mic/Aux": {
+            "muted": True,
+            "settings": {"device_id": "usb-mic"},
+            "filters": {"Gain": True},
+        }
+    },
+}
+
+
+def test_apply(run, state, state_file):
+    assert run("apply", state_file(DESIRED)) == 0
+    assert enabled(state, "Live", "Camera") == [False]
+    assert enabled(state, "Overlay", "Logo") == [False]
+    assert not state.filters["Live"][0]["filterEnabled"]
+    assert state.inputs["Mic/Aux"]["muted"]
+    assert state.inputs["Mic/Aux"]["settings"]["device_id"] == "usb-mic"
+    assert all(f["filterEnabled"] for f in state.filters["Mic/Aux"])
+
+
+def test_apply_again_changes_nothing(run, server, state_file, capsys):
+    path = state_file(DESIRED)
+    assert run("apply", path) == 0
+    capsys.readouterr()
+    server.reset_counters()
+    assert run("--json", "apply", path) == 0
+    assert json.loads(capsys.readouterr().out) == []
+    assert "SetSceneItemEnabled" not in server.request_types
+
+
+def test_setting_at_its_default_is_not_sent(run, server, state_file):
+    # GetInputSettings leaves out settings at their default value
+    desired = {"inputs": {"Mic/Aux": {"settings": {"device_id": "default"}}}}
+    assert run("apply", state_file(desired)) == 0
+    assert "SetInputSettings" not in server.request_types
+
+
+def test_item_at_top_level_and_in_group(run, state, state_file):
+    state.add_item("Live", "Logo")
+    desired = {"scenes": {"Live": {"items": {"Logo": False}}}}
+    assert run("apply", state_file(desired)) == 0
+    assert enabled(state, "Live", "Logo") == [False]
+    assert enabled(state, "Overlay", "Logo") == [False]
+
+
+def test_dry_run(run, state, state_file, capsys):
+    assert run("--json", "apply", "-n", state_file(DESIRED)) == 0
+    changes = json.loads(capsys.readouterr().out)
+    assert {(c["kind"], c["source"], c.get("name")) for c in changes} >= {
+        ("item", "Live", "Camera"),
+        ("mute", "Mic/Aux", None),
+        ("setting", "Mic/Aux", "device_id"),
+    }
+    assert enabled(state, "Live", "Camera") == [True]
+    assert not state.inputs["Mic/Aux"]["muted"]
+
+
+def test_errors_apply_nothing(run, state, state_file, capsys):
+    desired = {
+        "scenes": {"Live": {"items": {"Camera": False, "Nope": True}}},
+    }
+    assert run("apply", state_file(desired)) == 1
+    assert "Item not found: 'Nope'" in capsys.readouterr().err
+    assert enabled(state, "Live", "Camera") == [True]
+
+
+def test_invalid_file(run, state_file, capsys):
+    assert run("apply", state_file({"scenes": {"Live": {"x": 1}}})) != 0
+    assert "unknown key 'x'" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize(
+    "desired, path",
+    [
+        ({"scenes": []}, "scenes must be an object"),
+        ({"scenes": {"Live": ["Camera"]}}, 'scenes["Live"] must be'),
+        ({"scenes": {"Live": {"items": ["Camera"]}}}, 'scenes["Live"].items'),
+        (
+            {"scenes": {"Live": {"items": {"Camera": "yes"}}}},
+            'scenes["Live"].items["Camera"] must be true or false',
+        ),
+        (
+            {"scenes": {"Live": {"filters": {"Sharpen": 1}}}},
+            'scenes["Live"].filters["Sharpen"]',
+        ),
+        ({"inputs": {"Mic/Aux": 1}}, 'inputs["Mic/Aux"] must be an object'),
+        (
+            {"inputs": {"Mic/Aux": {"muted": "false"}}},
+            'inputs["Mic/Aux"].muted must be true or false',
+        ),
+        (
+            {"inputs": {"Mic/Aux": {"settings": []}}},
+            'inputs["Mic/Aux"].settings must be an object',
+        ),
+        (
+            {"inputs": {"Mic/Aux": {"filters": "Gain"}}},
+            'inputs["Mic/Aux"].filters must be an object',
+        ),
+    ],
+)
+def test_invalid_entry(run, state_file, capsys, desired, path):
+    assert run("apply", state_file(desired)) != 0
+    err = capsys.readouterr().err
+    assert path in err
+    assert "Traceback" not in err
@@ -0,0 +1,62 @@
+def enabled(state, container, name):
+    return next(
+        it["sceneItemEnabled"]
+        for it in state.items[container]
+        if it["sourceName"] == name
+    )
+
+
+def test_batch(run, server, state, tmp_path, capsys):
+    commands = tmp_path / "commands.txt"
+    commands.write_text(
+        "# comments and blank lines are skipped\n"
+        "\n"
+        "item -s Live hide Camera\n"
+        "item -s Live hide 'Camera 2'\n"
+        "input mute Mic/Aux\n"
+        "scene current\n"
+    )
+    assert run("batch", str(commands)) == 0
+    assert not enabled(state, "Live", "Camera")
+    assert not enabled(state, "Live", "Camera 2")
+    assert state.inputs["Mic/Aux"]["muted"]
+    assert capsys.readouterr().out == "Live\n"
+    # The item listing is looked up once for both items
+    assert server.request_types.get("GetSceneItemList") == 1
+    # One for the commands, one for the events that keep the index fresh
+    assert server.connections == 2
+
+
+def test_batch_reports_failures(run, state, tmp_path, capsys):
+    commands = tmp_path / "commands.txt"
+    commands.write_text("item -s Live hide Nope\nitem -s Live hide Camera\n")
+    assert run("batch", str(commands)) == 1
+    err = capsys.readouterr().err
+    assert "1\t1\titem -s Live hide Nope" in err
+    assert "2\t0\titem -s Live hide Camera" in err
+    assert not enabled(state, "Live", "Camera")
+
+
+def test_batch_stop_on_error(run, state, tmp_path):
+    commands = tmp_path / "commands.txt"
+    commands.write_text("item -s Live hide Nope\nitem -s Live hide Camera\n")
+    assert run("batch", "-e", str(commands)) == 1
+    assert enabled(state, "Live", "Camera")
+
+
+def test_batch_rejects_local_commands(run, tmp_path, capsys):
+    commands = tmp_path / "commands.txt"
+    commands.write_text("stats\n")
+    assert run("batch", str(commands)) == 1
+    assert "'stats' cannot be used in a batch" in capsys.readouterr().err
+
+
+def test_batch_exact_scene(run, state, tmp_path, capsys):
+    # Like on the command line, -e does not fall back to a prefix match
+    commands = tmp_path / "commands.txt"
+    commands.write_text("scene -e switch Liv\nscene switch 'Scene 2'\n")
+    assert run("batch", str(commands)) == 1
+    err = capsys.readouterr().err
+    assert "Scene not found: 'Liv'" in err
+    assert "1\t1\tscene -e switch Liv" in err
+    assert state.current_scene == "Scene 2"
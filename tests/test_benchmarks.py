@@ -0,0 +1,50 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import obs_cli
+
+BENCHMARKS = os.path.join(os.path.dirname(obs_cli.__file__), "benchmarks")
+
+
+def benchmark(*argv):
+    # The results of a benchmarks/commands.py run, in command order
+    out = subprocess.run(
+        [
+            sys.executable,
+            os.path.join(BENCHMARKS, "commands.py"),
+            "--runs",
+            "1",
+            # Enough for requests sent together to be in flight together
+            "--latency",
+            "20",
+            "--json",
+            *argv,
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return [json.loads(line) for line in out.splitlines()]
+
+
+def test_round_trips_do_not_grow_with_the_collection():
+    patterns = ["item *", "@daemon *", "batch *"]
+    small = benchmark("--scenes", "2", "--items", "5", *patterns)
+    large = benchmark("--scenes", "2", "--items", "40", *patterns)
+    assert len(small) == len(large) > 0
+    for result, large_result in zip(small, large):
+        assert result["rc"] == 0, result["command"]
+        assert result["round_trips"] == large_result["round_trips"], result[
+            "command"
+        ]
+
+
+@pytest.mark.parametrize("server", [{"password": "secret"}], indirect=True)
+def test_password(run, capsys):
+    assert run("-p", "secret", "scene", "current") == 0
+    assert capsys.readouterr().out == "Live\n"
+    assert run("-p", "wrong", "scene", "current") == 1
@@ -0,0 +1,44 @@
+import json
+import threading
+
+import pytest
+
+
+def later(fn, *args):
+    # Runs fn once the command is waiting for events
+    timer = threading.Timer(0.3, fn, args)
+    timer.start()
+    return timer
+
+
+def switch_scene(server, scene):
+    server.call(server._req_SetCurrentProgramScene, {"sceneName": scene})
+
+
+@pytest.mark.parametrize("server", [{"host": "::1"}], indirect=True)
+def test_ipv6(run, capsys):
+    # The mock server rejects an unbracketed address in the Host header
+    assert run("scene", "current") == 0
+    assert capsys.readouterr().out == "Live\n"
+
+
+def test_watch(run, server, capsys):
+    timer = later(switch_scene, server, "Scene 1")
+    assert run("watch", "scenes", "-n", "1") == 0
+    timer.join()
+    (line,) = capsys.readouterr().out.splitlines()
+    event = json.loads(line)
+    assert event["type"] == "CurrentProgramSceneChanged"
+    assert event["data"] == {"sceneName": "Scene 1"}
+
+
+def test_watch_connection_lost(run, server, capsys):
+    def close():
+        server.call(
+            lambda: [session.writer.close() for session in server.sessions]
+        )
+
+    timer = later(close)
+    assert run("watch", "scenes") == 1
+    timer.join()
+    assert "connection to OBS lost" in capsys.readouterr().err
@@ -0,0 +1,46 @@
+import obs_cli
+
+NAMES = {
+    "scenes": ["Live", "Scene 1", "Scene 2"],
+    "inputs": ["Camera", "Mic/Aux"],
+    "items": {"Live": ["Camera", "Mic/Aux"], "Scene 1": ["Slides"]},
+    "groups": {"Live": ["Overlay"]},
+    "filters": {"Mic/Aux": ["Gain", "Noise Suppression"]},
+    "current_scene": "Live",
+}
+
+
+def test_cache(tmp_path):
+    path = obs_cli.get_name_cache_path("localhost", 4455)
+    assert path.startswith(str(tmp_path))
+    assert obs_cli.read_name_cache(path) is None
+    obs_cli.write_name_cache(path, NAMES)
+    assert obs_cli.read_name_cache(path) == NAMES
+
+
+def test_commands():
+    assert "scene" in obs_cli.complete_words(["sc"], NAMES)
+    assert obs_cli.complete_words(["nope", ""], NAMES) == []
+
+
+def test_names():
+    complete = obs_cli.complete_words
+    assert complete(["scene", "switch", "S"], NAMES) == ["Scene 1", "Scene 2"]
+    assert complete(["item", "toggle", ""], NAMES) == ["Camera", "Mic/Aux"]
+    assert complete(["item", "toggle", "-s", "Scene 1", ""], NAMES) == [
+        "Slides"
+    ]
+    assert complete(["filter", "toggle", "Mic/Aux", "N"], NAMES) == [
+        "Noise Suppression"
+    ]
+    assert complete(["item", "show", "--scene", "L"], NAMES) == ["Live"]
+
+
+def test_refresh(server, run):
+    assert run("completion", "refresh") == 0
+    path = obs_cli.get_name_cache_path(server.host, server.port)
+    names = obs_cli.read_name_cache(path)
+    assert names["current_scene"] == "Live"
+    assert "Overlay" in names["groups"]["Live"]
+    words = ["-P", str(server.port), "input", "mute", "Mic"]
+    assert obs_cli.complete_words(words, names) == ["Mic/Aux"]
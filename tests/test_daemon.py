@@ -0,0 +1,59 @@
+import os
+import socket
+import tempfile
+import time
+
+import obs_cli
+
+
+def test_forwarding(run_daemon, server, capsys):
+    connections = server.connections
+    assert run_daemon("scene", "current") == 0
+    assert run_daemon("scene", "switch", "Scene 1") == 0
+    assert run_daemon("scene", "current") == 0
+    assert capsys.readouterr().out == "Live\nScene 1\n"
+    # Every command used the daemon's connection
+    assert server.connections == connections
+
+
+def test_errors_are_forwarded(run_daemon, capsys):
+    assert run_daemon("item", "-s", "Live", "hide", "Nope") == 1
+    assert "Item not found: 'Nope'" in capsys.readouterr().err
+
+
+def test_status_and_stop(run_daemon, daemon, capsys):
+    assert run_daemon("daemon", "status") == 0
+    assert "running" in capsys.readouterr().out
+    assert run_daemon("daemon", "stop") == 0
+    deadline = time.monotonic() + 10
+    while os.path.exists(daemon):
+        assert time.monotonic() < deadline, "the daemon did not stop"
+        time.sleep(0.01)
+    assert run_daemon("daemon", "status") == 1
+
+
+def test_stale_socket(server, tmp_path, capsys):
+    # Nobody listens on the socket, the command connects directly
+    path = str(tmp_path / "stale.sock")
+    with socket.socket(socket.AF_UNIX) as sock:
+        sock.bind(path)
+    argv = ["-H", server.host, "-P", str(server.port), "--socket", path]
+    assert obs_cli.main([*argv, "scene", "current"]) == 0
+    assert capsys.readouterr().out == "Live\n"
+
+
+def test_shared_directory(server, tmp_path, monkeypatch, capsys):
+    # Without $XDG_RUNTIME_DIR the socket goes to a directory in /tmp, which
+    # is not used if others can get in
+    monkeypatch.delenv("XDG_RUNTIME_DIR")
+    monkeypatch.setattr(tempfile, "gettempdir", lambda: str(tmp_path))
+    directory = tmp_path / f"obs-cli-{os.getuid()}"
+    directory.mkdir(mode=0o755)
+    directory.chmod(0o755)
+    argv = ["-H", server.host, "-P", str(server.port)]
+    assert obs_cli.main([*argv, "daemon"]) == 1
+    assert "not accessible to others" in capsys.readouterr().err
+    # Commands connect directly
+    open(directory / f"{server.host}-{server.port}.sock", "w").close()
+    assert obs_cli.main([*argv, "scene", "current"]) == 0
+    assert capsys.readouterr().out == "Live\n"
@@ -0,0 +1,109 @@
+import json
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+import obs_cli
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get(url):
+    # (status, body)
+    try:
+        with urllib.request.urlopen(url, timeout=5) as res:
+            return res.status, res.read().decode()
+    except urllib.error.HTTPError as exc:
+        return exc.code, exc.read().decode()
+
+
+@pytest.fixture
+def exporter():
+    # Starts an exporter process for the given OBS address and options,
+    # returns its base URL once it answers
+    processes = []
+
+    def start(host, port, *options):
+        listen = free_port()
+        processes.append(
+            subprocess.Popen(
+                [
+                    sys.executable,
+                    obs_cli.__file__,
+                    "-H",
+                    host,
+                    "-P",
+                    str(port),
+                    *options,
+                    "exporter",
+                    "-l",
+                    f"127.0.0.1:{listen}",
+                    "-i",
+                    "100ms",
+                ],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        )
+        url = f"http://127.0.0.1:{listen}"
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                get(f"{url}/healthz")
+                return url
+            except OSError:
+                assert time.monotonic() < deadline, "no exporter"
+                time.sleep(0.05)
+
+    yield start
+    for process in processes:
+        process.terminate()
+        process.wait()
+
+
+def wait_for(url, status):
+    deadline = time.monotonic() + 10
+    while get(url)[0] != status:
+        assert time.monotonic() < deadline, f"{url} never answered {status}"
+        time.sleep(0.05)
+    return get(url)[1]
+
+
+def test_metrics(exporter, server):
+    url = exporter(server.host, server.port)
+    health = json.loads(wait_for(f"{url}/healthz", 200))
+    assert health["connected"]
+    status, metrics = get(f"{url}/metrics")
+    assert status == 200
+    assert "obs_up 1.0\n" in metrics
+    assert "# TYPE obs_render_frames_total counter" in metrics
+    assert 'obs_current_scene_info{scene="Live"} 1.0' in metrics
+    assert get(f"{url}/nope")[0] == 404
+
+
+def test_obs_down(exporter):
+    url = exporter("127.0.0.1", free_port())
+    health = json.loads(wait_for(f"{url}/healthz", 503))
+    assert not health["connected"]
+    assert "obs_up 0.0\n" in get(f"{url}/metrics")[1]
+
+
+@pytest.mark.parametrize("server", [{"latency": 2}], indirect=True)
+def test_obs_not_answering(exporter, server):
+    # The sample times out instead of waiting for OBS forever
+    url = exporter(server.host, server.port, "--timeout", "200ms")
+    deadline = time.monotonic() + 10
+    while json.loads(get(f"{url}/healthz")[1])["error"] == "not sampled yet":
+        assert time.monotonic() < deadline, "never sampled"
+        time.sleep(0.05)
+    assert get(f"{url}/healthz")[0] == 503
+    assert "obs_up 0.0\n" in get(f"{url}/metrics")[1]
@@ -0,0 +1,83 @@
+import json
+import socket
+
+import pytest
+
+import obs_cli
+from mock_obs import MockObsServer, ObsState
+
+
+@pytest.fixture
+def other_server():
+    state = ObsState.default()
+    state.current_scene = "Scene 2"
+    server = MockObsServer(state, latency=1)
+    server.start_in_thread()
+    yield server
+    server.stop_thread()
+
+
+def address(server):
+    return f"{server.host}:{server.port}"
+
+
+def closed_address():
+    # A port nobody listens on
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"127.0.0.1:{sock.getsockname()[1]}"
+
+
+def fanout(capsys, *argv):
+    rc = obs_cli.main(["--no-daemon", "--json", *argv])
+    results = [
+        json.loads(line) for line in capsys.readouterr().out.splitlines()
+    ]
+    return rc, {result["host"]: result for result in results}
+
+
+def test_fanout(server, capsys):
+    # The same server under two names
+    hosts = ["-H", address(server), "-H", f"localhost:{server.port}"]
+    rc, results = fanout(capsys, *hosts, "scene", "current")
+    assert rc == 0
+    assert len(results) == 2
+    for result in results.values():
+        assert result["status"] == "ok"
+        assert result["output"] == "Live"
+    assert server.connections == 2
+
+
+def test_duplicate_host(server, capsys):
+    hosts = ["-H", address(server), "-H", address(server)]
+    assert obs_cli.main(["--no-daemon", *hosts, "scene", "current"]) == 0
+    assert capsys.readouterr().out == "Live\n"
+    assert server.connections == 1
+
+
+def test_fanout_status(server, other_server, capsys):
+    down = closed_address()
+    hosts = ["-H", address(server), "-H", address(other_server), "-H", down]
+    argv = [*hosts, "--timeout", "200ms", "scene", "current"]
+    rc, results = fanout(capsys, *argv)
+    assert rc == 1
+    assert results[address(server)]["status"] == "ok"
+    assert results[address(other_server)]["status"] == "timeout"
+    assert results[down]["status"] == "error"
+    assert results[down]["rc"] == 1
+
+
+def test_fanout_unexpected_error(server, capsys):
+    # Reported as the host's status rather than a traceback
+    hosts = ["-H", address(server), "-H", closed_address()]
+    rc, results = fanout(capsys, *hosts, "input", "mute", "Nope")
+    assert rc == 1
+    result = results[address(server)]
+    assert result["status"] == "error"
+    assert "Nope" in result["error"]
+
+
+def test_host_console_without_exception():
+    console = obs_cli.HostConsole()
+    console.print_exception(show_locals=True)
+    assert console.exception is None
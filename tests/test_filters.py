@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+
+def rows(out):
+    return [json.loads(line) for line in out.splitlines()]
+
+
+def test_list_all(run, capsys):
+    assert run("--json", "filter", "list", "--all") == 0
+    filters = {
+        (row["sourceName"], row["filterName"]): row["filterEnabled"]
+        for row in rows(capsys.readouterr().out)
+    }
+    assert filters == {
+        ("Camera", "Color Correction"): True,
+        ("Mic/Aux", "Noise Suppression"): True,
+        ("Mic/Aux", "Gain"): False,
+        ("Live", "Sharpen"): True,
+    }
+
+
+def test_list_glob(run, capsys):
+    assert run("--json", "filter", "list", "Cam*") == 0
+    assert [row["sourceName"] for row in rows(capsys.readouterr().out)] == [
+        "Camera"
+    ]
+
+
+@pytest.mark.parametrize("server", [{"latency": 0.02}], indirect=True)
+def test_one_sweep(run, server, state):
+    for i in range(50):
+        state.add_input(f"Input {i}", "ffmpeg_source")
+    assert run("--json", "filter", "list", "--all") == 0
+    # The sources, then all their filters at once
+    assert server.request_types["GetSourceFilterList"] == 61
+    assert server.round_trips == 3
+
+
+def test_table(run, capsys):
+    assert run("filter", "list", "-a") == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].split() == ["SOURCE", "KIND", "NAME", "ENABLED"]
+    assert len(lines) == 5
@@ -0,0 +1,43 @@
+import json
+import time
+
+import pytest
+
+
+def samples(out):
+    return [json.loads(line) for line in out.splitlines()]
+
+
+def test_bitrate(run, capsys):
+    assert run("stream", "start") == 0
+    start = time.monotonic()
+    argv = ["--json", "stream", "status", "-w", "-i", "200ms", "-n", "3"]
+    assert run(*argv) == 0
+    # Two intervals, no sleep after the last sample
+    assert time.monotonic() - start < 0.55
+    first, *rest = samples(capsys.readouterr().out)
+    # The first sample only starts the byte counter
+    assert first["values"]["bitrate_kbps"] is None
+    for sample in rest:
+        assert sample["active"]
+        # The mock sends 750 kB/s
+        assert sample["values"]["bitrate_kbps"] == pytest.approx(6000, 0.1)
+        assert sample["alerts"] == []
+
+
+def test_min_bitrate(run, capsys):
+    # Recording is not active, which is an alert
+    argv = ["--json", "record", "status", "-w", "-i", "50ms"]
+    assert run(*argv, "--min-bitrate", "20000") == 1
+    (sample,) = samples(capsys.readouterr().out)
+    assert not sample["active"]
+    assert sample["alerts"]
+
+
+def test_min_bitrate_crossed(run, capsys):
+    assert run("record", "start") == 0
+    argv = ["--json", "record", "status", "-w", "-i", "50ms"]
+    assert run(*argv, "--min-bitrate", "20000", "-n", "10") == 1
+    *_, last = samples(capsys.readouterr().out)
+    assert last["values"]["bitrate_kbps"] < 20000
+    assert last["alerts"]
@@ -0,0 +1,61 @@
+# The daemon keeps the listings it looked up, kept current by OBS events
+import time
+
+
+def item(state, container, name):
+    return next(
+        it for it in state.items[container] if it["sourceName"] == name
+    )
+
+
+def request(server, request_type, data):
+    # Changed by another client, the daemon only learns of it by events
+    server.call(getattr(server, f"_req_{request_type}"), data)
+    time.sleep(0.2)
+
+
+def test_listing_is_kept(run_daemon, server, state):
+    assert run_daemon("item", "-s", "Live", "toggle", "Camera") == 0
+    server.reset_counters()
+    assert run_daemon("item", "-s", "Live", "toggle", "Camera") == 0
+    assert item(state, "Live", "Camera")["sceneItemEnabled"]
+    assert server.request_types == {"SetSceneItemEnabled": 1}
+
+
+def test_changed_item(run_daemon, server, state):
+    assert run_daemon("item", "-s", "Live", "toggle", "Camera") == 0
+    camera = item(state, "Live", "Camera")
+    assert not camera["sceneItemEnabled"]
+    request(
+        server,
+        "SetSceneItemEnabled",
+        {
+            "sceneName": "Live",
+            "sceneItemId": camera["sceneItemId"],
+            "sceneItemEnabled": True,
+        },
+    )
+    assert run_daemon("item", "-s", "Live", "toggle", "Camera") == 0
+    assert not camera["sceneItemEnabled"]
+
+
+def test_created_item(run_daemon, server, state):
+    assert run_daemon("item", "-s", "Live", "hide", "Camera") == 0
+    request(
+        server,
+        "CreateSceneItem",
+        {"sceneName": "Live", "sourceName": "Screen"},
+    )
+    assert run_daemon("item", "-s", "Live", "hide", "Screen") == 0
+    assert not item(state, "Live", "Screen")["sceneItemEnabled"]
+
+
+def test_renamed_input(run_daemon, server, capsys):
+    assert run_daemon("input", "mute", "Mic/Aux") == 0
+    request(
+        server, "SetInputName", {"inputName": "Mic/Aux", "newInputName": "Mic"}
+    )
+    assert run_daemon("--json", "input", "list") == 0
+    names = capsys.readouterr().out
+    assert '"Mic"' in names
+    assert "Mic/Aux" not in names
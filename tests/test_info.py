@@ -0,0 +1,22 @@
+import json
+
+import pytest
+
+
+# With latency, requests sent one after the other would take a round trip
+# each
+@pytest.mark.parametrize("server", [{"latency": 0.05}], indirect=True)
+def test_info(run, server, capsys):
+    assert not run("--json", "info")
+    data = json.loads(capsys.readouterr().out)
+    assert data["obs"]["rpc_version"] == 1
+    assert data["video"]["base_resolution"] == "1920x1080"
+    assert data["stats"]["active_fps"] is not None
+    # Four requests, sent at once
+    assert server.requests == 4
+    assert server.round_trips == 1
+
+
+def test_info_table(run, capsys):
+    assert run("info") == 0
+    assert "1920x1080" in capsys.readouterr().out
@@ -0,0 +1,68 @@
+import re
+
+import pytest
+
+import obs_cli
+from mock_obs import RequestError
+
+
+@pytest.fixture(autouse=True)
+def audio_kinds(monkeypatch):
+    # Nothing known about the input kinds from earlier tests
+    monkeypatch.setattr(obs_cli, "_AUDIO_INPUT_KINDS", {})
+
+
+@pytest.fixture
+def failing_mute(server, monkeypatch):
+    # GetInputMute fails for the given names, as many times as listed
+    failures = []
+    get_input_mute = server._req_GetInputMute
+
+    def fail(data):
+        if data.get("inputName") in failures:
+            failures.remove(data.get("inputName"))
+            raise RequestError(702, "Failed")
+        return get_input_mute(data)
+
+    monkeypatch.setattr(server, "_req_GetInputMute", fail)
+    return failures
+
+
+def mute_column(out):
+    # {name: muted} from the table
+    rows = [re.split(r"\s{2,}", line.strip()) for line in out.splitlines()]
+    return {name: muted for _, name, muted in rows[1:]}
+
+
+def test_list(run, state, capsys):
+    state.add_input("Mic 2", "pulse_input_capture")
+    state.inputs["Mic 2"]["muted"] = True
+    assert run("input", "list") == 0
+    muted = mute_column(capsys.readouterr().out)
+    assert muted["Mic/Aux"] == "false"
+    assert muted["Mic 2"] == "true"
+    assert muted["Camera"] == "N/A"
+
+
+def test_list_fetches_by_kind(run, server, state):
+    for i in range(5):
+        state.add_input(f"Webcam {i}", "v4l2_input")
+    assert run("input", "list") == 0
+    # One probe per kind, the other webcams without audio are not asked
+    assert server.request_types["GetInputMute"] == 7
+
+
+def test_list_after_failed_probe(run, state, failing_mute, capsys):
+    # The probe of the kind fails, every input of that kind is asked then
+    state.add_input("Mic 2", "pulse_input_capture")
+    state.inputs["Mic/Aux"]["muted"] = True
+    failing_mute.append("Mic 2")
+    assert run("input", "list") == 0
+    muted = mute_column(capsys.readouterr().out)
+    assert muted["Mic/Aux"] == "true"
+    assert muted["Mic 2"] == "false"
+
+
+def test_list_fails(run, failing_mute):
+    failing_mute.extend(["Mic/Aux", "Mic/Aux"])
+    assert run("input", "list") == 1
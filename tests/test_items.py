@@ -0,0 +1,84 @@
+import pytest
+
+
+def enabled(state, container, name):
+    return next(
+        it["sceneItemEnabled"]
+        for it in state.items[container]
+        if it["sourceName"] == name
+    )
+
+
+def test_toggle_lists_the_scene_once(run, server, state):
+    assert run("item", "-s", "Live", "toggle", "Camera") == 0
+    assert not enabled(state, "Live", "Camera")
+    assert server.request_types.get("GetSceneItemList") == 1
+    assert "GetSceneItemId" not in server.request_types
+
+
+def test_show_hide(run, state):
+    assert run("item", "-s", "Live", "hide", "Camera") == 0
+    assert not enabled(state, "Live", "Camera")
+    assert run("item", "-s", "Live", "show", "Camera") == 0
+    assert enabled(state, "Live", "Camera")
+
+
+def test_item_in_group(run, state):
+    assert run("item", "-s", "Live", "hide", "Logo") == 0
+    assert not enabled(state, "Overlay", "Logo")
+
+
+def test_group(run, state):
+    assert run("group", "-s", "Live", "hide", "Overlay") == 0
+    assert not enabled(state, "Live", "Overlay")
+
+
+def test_several_items_in_one_batch(run, server, state):
+    assert run("item", "-s", "Live", "hide", "Camera*") == 0
+    assert not enabled(state, "Live", "Camera")
+    assert not enabled(state, "Live", "Camera 2")
+    # SerialFrame: both change on the same frame
+    assert server.batches == [
+        (1, ["SetSceneItemEnabled", "SetSceneItemEnabled"])
+    ]
+    assert server.connections == 1
+
+
+def test_regex(run, state):
+    # Every match, in groups too, not just the best ranked one
+    assert run("item", "-s", "Live", "hide", "/^cam|^logo$/") == 0
+    assert not enabled(state, "Live", "Camera")
+    assert not enabled(state, "Live", "Camera 2")
+    assert not enabled(state, "Overlay", "Logo")
+    assert enabled(state, "Overlay", "Clock")
+    assert enabled(state, "Live", "Mic/Aux")
+
+
+def test_regex_without_match(run, state, capsys):
+    assert run("item", "-s", "Live", "hide", "/^Nope/", "Camera") == 1
+    assert "No item matches '/^Nope/'" in capsys.readouterr().err
+    assert enabled(state, "Live", "Camera")
+
+
+def test_invalid_regex(run, capsys):
+    assert run("item", "-s", "Live", "hide", "/(/") == 1
+    assert "Invalid regex '/(/'" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("server", [{"batch_support": False}], indirect=True)
+def test_several_items_without_batches(run, server, state):
+    # The server closes the connection on RequestBatch, obs-cli reconnects
+    # and sends the changes separately
+    assert run("item", "-s", "Live", "hide", "Camera", "Camera 2") == 0
+    assert not enabled(state, "Live", "Camera")
+    assert not enabled(state, "Live", "Camera 2")
+    assert server.connections == 2
+
+
+def test_missing_item(run, capsys):
+    assert run("item", "-s", "Live", "hide", "Nope") == 1
+    assert "Item not found: 'Nope'" in capsys.readouterr().err
+
+
+def test_missing_item_name(run):
+    assert run("item", "-s", "Live", "hide") == 2
@@ -0,0 +1,46 @@
+import obs_cli
+
+
+def levels(name, *channels):
+    return {"inputs": [{"inputName": name, "inputLevelsMul": channels}]}
+
+
+def test_decibels():
+    meter = obs_cli.LevelMeter()
+    meter.trigger(
+        "InputVolumeMeters", levels("Mic", [0.1, 1.0, 1.0], [0, 0, 0])
+    )
+    (sample,) = meter.sample()
+    assert sample["inputName"] == "Mic"
+    assert sample["magnitude"] == [-20.0, -100.0]
+    assert sample["peak"] == [0.0, -100.0]
+    assert sample["clips"] == 1
+
+
+def test_peak_hold():
+    meter = obs_cli.LevelMeter(hold=60)
+    meter.trigger("InputVolumeMeters", levels("Mic", [0.1, 0.5, 0.5]))
+    meter.trigger("InputVolumeMeters", levels("Mic", [0.01, 0.1, 0.1]))
+    (sample,) = meter.sample()
+    assert sample["peak"] == [-20.0]
+    assert sample["peakHold"] == [-6.0]
+    assert sample["clips"] == 0
+
+
+def test_peak_hold_expires(monkeypatch):
+    clock = iter([0.0, 3.0])
+    monkeypatch.setattr(obs_cli.time, "monotonic", lambda: next(clock))
+    meter = obs_cli.LevelMeter(hold=2)
+    meter.trigger("InputVolumeMeters", levels("Mic", [0.1, 0.5, 0.5]))
+    meter.trigger("InputVolumeMeters", levels("Mic", [0.01, 0.1, 0.1]))
+    assert meter.sample()[0]["peakHold"] == [-20.0]
+
+
+def test_names():
+    meter = obs_cli.LevelMeter(["Mic", "Music"])
+    meter.trigger("InputVolumeMeters", levels("Camera", [0.1, 0.1, 0.1]))
+    meter.trigger("InputVolumeMeters", levels("Mic", [0.1, 0.1, 0.1]))
+    samples = meter.sample()
+    assert [sample["inputName"] for sample in samples] == ["Mic", "Music"]
+    # Inputs without an event yet have no channels
+    assert samples[1]["peak"] == []
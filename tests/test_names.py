@@ -0,0 +1,80 @@
+import pytest
+
+import obs_cli
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        # Exact, then in another case
+        ("Cam", ["Cam"]),
+        ("cam", ["Cam"]),
+        ("CAMERA", ["Camera"]),
+        # Prefix: the shortest name
+        ("came", ["Camera"]),
+        # Substring: the earliest, then the shortest
+        ("era", ["Camera"]),
+        ("third", ["Lower third"]),
+        # Regex
+        ("^Cam.*2$", ["Camera 2"]),
+        # A typo
+        ("Camrea 2", ["Camera 2"]),
+        ("Nothing like it", []),
+    ],
+)
+def test_ranking(query, expected):
+    names = ["Camera", "Camera 2", "Cam", "Lower third", "Slides"]
+    assert obs_cli.NameMatcher(names).match(query) == expected
+
+
+def test_ties():
+    matcher = obs_cli.NameMatcher(["Scene 1", "Scene 2", "Scenery"])
+    assert sorted(matcher.match("Scene ")) == ["Scene 1", "Scene 2"]
+
+
+def test_exact():
+    matcher = obs_cli.NameMatcher(["Camera", "Camera 2"])
+    assert matcher.match("camera", exact=True) == ["Camera"]
+    assert matcher.match("cam", exact=True) == []
+
+
+def test_case_sensitive():
+    matcher = obs_cli.NameMatcher(["Camera", "camera"], ignorecase=False)
+    assert matcher.match("camera") == ["camera"]
+    assert matcher.match("cam") == ["camera"]
+
+
+def test_fuzzy_in_a_large_collection():
+    names = [f"Source {i:05d}" for i in range(20000)] + ["Webcam Left"]
+    assert obs_cli.NameMatcher(names).match("Wbcam Left") == ["Webcam Left"]
+
+
+def test_find_scene_ambiguous():
+    with pytest.raises(obs_cli.ObsAmbiguousNameException) as exc:
+        obs_cli.find_scene(["Scene 1", "Scene 2"], "Scene")
+    assert "'Scene 1', 'Scene 2'" in str(exc.value)
+
+
+def test_find_scene_not_found():
+    with pytest.raises(obs_cli.ObsSceneNotFoundException):
+        obs_cli.find_scene(["Scene 1"], "Live")
+
+
+def test_scene_switch(run, state):
+    assert run("scene", "switch", "liv") == 0
+    assert state.current_scene == "Live"
+
+
+def test_scene_switch_ambiguous(run, state, capsys):
+    assert run("scene", "switch", "Scene") == 1
+    assert "ambiguous" in capsys.readouterr().err
+    assert state.current_scene == "Live"
+
+
+def test_item_ambiguous(run, state, capsys):
+    for name in ("Slides A", "Slides B"):
+        state.add_input(name, "image_source")
+        state.add_item("Live", name)
+    assert run("item", "-s", "Live", "hide", "slides") == 1
+    assert "'Slides A', 'Slides B'" in capsys.readouterr().err
+    assert run("item", "-s", "Live", "hide", "slides b") == 0
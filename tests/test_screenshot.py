@@ -0,0 +1,63 @@
+import base64
+import json
+
+import pytest
+
+
+def files(path):
+    return sorted(p.name for p in path.iterdir())
+
+
+def test_several_sources(run, server, tmp_path):
+    assert (
+        run("source", "screenshot", "Cam*", "Logo", "-o", str(tmp_path)) == 0
+    )
+    assert files(tmp_path) == ["Camera 2.png", "Camera.png", "Logo.png"]
+    assert server.request_types["GetSourceScreenshot"] == 3
+
+
+# With latency, the responses to the requests in flight arrive together
+@pytest.mark.parametrize("server", [{"latency": 0.05}], indirect=True)
+def test_all_sources(run, server, tmp_path):
+    assert run("source", "screenshot", "--all", "-o", str(tmp_path)) == 0
+    inputs = server.call(server._req_GetInputList, {})["inputs"]
+    assert files(tmp_path) == sorted(
+        f"{input['inputName'].replace('/', '_')}.png" for input in inputs
+    )
+
+
+def test_missing_source(run, tmp_path):
+    argv = ["source", "screenshot", "Camera", "Nope", "-o", str(tmp_path)]
+    assert run(*argv) == 1
+    assert files(tmp_path) == ["Camera.png"]
+
+
+def image(server, width=320, height=180, fmt="png"):
+    # What the mock sends for a screenshot, decoded
+    data = server.call(server.state.screenshot, width, height, fmt)
+    return base64.b64decode(data.split(",", 1)[1])
+
+
+def test_file(run, server, tmp_path):
+    path = tmp_path / "camera.png"
+    argv = ["item", "-s", "Live", "screenshot", "Camera", "-o", str(path)]
+    assert run(*argv) == 0
+    assert path.read_bytes() == image(server)
+
+
+def test_format_and_size(run, server, tmp_path):
+    path = tmp_path / "camera"
+    argv = ["source", "screenshot", "Camera", "-f", "jpg", "-o", str(path)]
+    assert run(*argv, "--width", "64", "--height", "36") == 0
+    assert path.read_bytes() == image(server, 64, 36, "jpg")
+
+
+def test_raw(run, server, capsysbinary):
+    assert run("scene", "screenshot", "Live", "--raw") == 0
+    assert capsysbinary.readouterr().out == image(server)
+
+
+def test_json(run, server, capsys):
+    assert run("--json", "scene", "screenshot", "Live") == 0
+    data = json.loads(capsys.readouterr().out)
+    assert base64.b64decode(data["data"]) == image(server)
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+
+def by_name(records, key):
+    return {record[key]: record for record in records}
+
+
+def test_snapshot(run, tmp_path, capsys):
+    path = tmp_path / "show.json"
+    assert run("snapshot", "-o", str(path)) == 0
+    assert "3 scenes, 8 inputs" in capsys.readouterr().err
+    snapshot = json.loads(path.read_text())
+    assert snapshot["currentProgramSceneName"] == "Live"
+    scenes = by_name(snapshot["scenes"], "sceneName")
+    assert list(scenes) == ["Live", "Scene 2", "Scene 1"]
+    live = by_name(scenes["Live"]["items"], "sourceName")
+    # Group items nested in their group
+    overlay = by_name(live["Overlay"]["items"], "sourceName")
+    assert list(overlay) == ["Logo", "Clock"]
+    assert "Logo" not in live
+    assert "sceneItemTransform" in live["Camera"]
+    assert [f["filterName"] for f in scenes["Live"]["filters"]] == ["Sharpen"]
+    inputs = by_name(snapshot["inputs"], "inputName")
+    assert inputs["Mic/Aux"]["inputMuted"] is False
+    assert inputs["Camera"]["inputMuted"] is None
+    assert "Noise Suppression" in [
+        f["filterName"] for f in inputs["Mic/Aux"]["filters"]
+    ]
+
+
+@pytest.mark.parametrize("server", [{"latency": 0.02}], indirect=True)
+def test_round_trips_do_not_grow(run, server, state):
+    for i in range(100):
+        state.add_input(f"Input {i}", "ffmpeg_source")
+    assert run("snapshot", "-o", "/dev/null") == 0
+    # Fifty sources at a time
+    assert server.round_trips <= 8
+
+
+def test_ndjson(run, capsys):
+    assert run("snapshot", "--ndjson") == 0
+    records = [
+        json.loads(line) for line in capsys.readouterr().out.split("\n")[:-1]
+    ]
+    types = [record["type"] for record in records]
+    assert types.count("scene") == 3
+    assert types.count("input") == 8
@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+import obs_cli
+
+
+def test_ring_buffer():
+    buffer = obs_cli.RingBuffer(3)
+    for value in (5, 1, 4, 2):
+        buffer.append(value)
+    assert len(buffer) == 3
+    assert buffer.latest() == 2
+    assert buffer.values() == [1, 4, 2]
+    assert buffer.summary() == {
+        "min": 1,
+        "avg": pytest.approx(7 / 3),
+        "p95": 4,
+        "max": 4,
+    }
+
+
+def test_sampler_rates():
+    sampler = obs_cli.StatsSampler(10)
+    # The first sample is only the baseline of the counters
+    assert not sampler.add({"renderTotalFrames": 100, "cpuUsage": 5}, 0.0)
+    assert sampler.add({"renderTotalFrames": 160, "cpuUsage": 7}, 2.0)
+    values = sampler.to_dict()["values"]
+    assert values["render_frames_per_s"] == 30
+    assert values["cpu_percent"] == 7
+
+
+def test_sampler_counter_reset():
+    sampler = obs_cli.StatsSampler(10)
+    sampler.add({"outputTotalFrames": 1000}, 0.0)
+    sampler.add({"outputTotalFrames": 10}, 1.0)
+    assert sampler.to_dict()["values"]["output_frames_per_s"] == 0
+
+
+def test_stats(run, capsys):
+    assert run("--json", "stats", "-n", "2", "-i", "10ms") == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 2
+    assert "fps" in json.loads(lines[-1])["values"]
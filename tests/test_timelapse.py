@@ -0,0 +1,66 @@
+import json
+import socket
+import time
+
+import obs_cli
+
+
+def frames(path):
+    return sorted(p.name for p in path.iterdir())
+
+
+def test_count(run, tmp_path):
+    pattern = str(tmp_path / "frame-%04d.png")
+    argv = ["scene", "screenshot", "Live", "--every", "10ms"]
+    assert run(*argv, "--count", "3", "-o", pattern) == 0
+    assert frames(tmp_path) == [
+        "frame-0001.png",
+        "frame-0002.png",
+        "frame-0003.png",
+    ]
+
+
+def test_count_without_pattern(run, tmp_path):
+    path = str(tmp_path / "shot.png")
+    argv = ["source", "screenshot", "Camera", "--count", "2", "-o", path]
+    assert run(*argv) == 0
+    assert frames(tmp_path) == ["shot-000001.png", "shot-000002.png"]
+
+
+def test_unbounded_is_local():
+    argv = ["scene", "screenshot", "--every", "1s", "-o", "x.png"]
+    assert obs_cli.local_command(obs_cli.parse_args(argv))
+    argv += ["--count", "3"]
+    assert obs_cli.local_command(obs_cli.parse_args(argv)) is None
+
+
+def test_unbounded_in_batch(run, tmp_path, capsys):
+    commands = tmp_path / "commands.txt"
+    commands.write_text("item screenshot Camera --every 1s -o x.png\n")
+    assert run("batch", str(commands)) == 1
+    err = capsys.readouterr().err
+    assert "--every without --count" in err
+    assert "1\t2\titem screenshot" in err
+
+
+def test_unbounded_on_several_hosts(run, server, capsys):
+    other = f"localhost:{server.port}"
+    argv = ["scene", "screenshot", "--every", "1s", "-o", "x.png"]
+    assert run("-H", other, *argv) == 2
+    assert "cannot run on several hosts" in capsys.readouterr().err
+
+
+def test_daemon_stops_when_client_hangs_up(run_daemon, daemon, tmp_path):
+    pattern = str(tmp_path / "frame-%04d.png")
+    argv = ["scene", "screenshot", "Live", "--every", "20ms", "-o", pattern]
+    request = {"argv": [*argv, "--count", "100000"], "cwd": str(tmp_path)}
+    with socket.socket(socket.AF_UNIX) as sock:
+        sock.connect(daemon)
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        time.sleep(0.3)
+    # The daemon is free for the next command, and wrote no more frames
+    assert run_daemon("scene", "current") == 0
+    written = frames(tmp_path)
+    assert written
+    time.sleep(0.2)
+    assert frames(tmp_path) == written
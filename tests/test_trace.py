@@ -0,0 +1,36 @@
+import json
+
+import pytest
+
+import obs_cli
+
+
+@pytest.fixture(autouse=True)
+def tracer(monkeypatch):
+    # main() sets the global tracer, later tests must not trace
+    monkeypatch.setattr(obs_cli, "TRACER", None)
+
+
+def test_report(run, capsys):
+    assert run("--trace", "item", "-s", "Live", "hide", "Camera") == 0
+    err = capsys.readouterr().err
+    # The scene, the group in it, the change
+    assert "trace: 3 requests in 3 round trips" in err
+    assert "1 connection" in err
+    for request_type in (
+        "GetSceneItemList",
+        "GetGroupSceneItemList",
+        "SetSceneItemEnabled",
+    ):
+        assert f"  {request_type} " in err
+
+
+def test_chrome_trace(run, tmp_path, capsys):
+    path = tmp_path / "trace.json"
+    assert run("--trace-file", str(path), "scene", "current") == 0
+    assert "trace: 1 request in 1 round trip" in capsys.readouterr().err
+    events = json.loads(path.read_text())["traceEvents"]
+    spans = {(event["cat"], event["name"]) for event in events}
+    assert ("command", "scene") in spans
+    assert ("request", "GetCurrentProgramScene") in spans
+    assert all(event["ph"] == "X" and event["dur"] >= 0 for event in events)
@@ -0,0 +1,47 @@
+import json
+import threading
+
+import pytest
+
+
+def later(server, *requests):
+    # Sends the requests to the mock once watch is waiting for events
+    def send():
+        for request_type, data in requests:
+            server.call(getattr(server, f"_req_{request_type}"), data)
+
+    timer = threading.Timer(0.3, send)
+    timer.start()
+    return timer
+
+
+def events(out):
+    return [json.loads(line) for line in out.splitlines()]
+
+
+def test_categories(run, server, capsys):
+    # The scene switch is not an input event
+    timer = later(
+        server,
+        ("SetCurrentProgramScene", {"sceneName": "Scene 1"}),
+        ("SetInputMute", {"inputName": "Mic/Aux", "inputMuted": True}),
+        ("SetInputMute", {"inputName": "Mic/Aux", "inputMuted": False}),
+    )
+    assert run("watch", "inputs", "-n", "2") == 0
+    timer.join()
+    lines = events(capsys.readouterr().out)
+    assert [event["type"] for event in lines] == ["InputMuteStateChanged"] * 2
+    assert [event["data"]["inputMuted"] for event in lines] == [True, False]
+    assert all(isinstance(event["time"], float) for event in lines)
+
+
+@pytest.mark.parametrize("server", [{"meter_interval": 0.05}], indirect=True)
+def test_high_volume(run, capsys):
+    assert run("watch", "inputvolumemeters", "-n", "1") == 0
+    (event,) = events(capsys.readouterr().out)
+    assert event["type"] == "InputVolumeMeters"
+
+
+def test_unknown_category(run, capsys):
+    assert run("watch", "nope") == 2
+    assert "Unknown event category: 'nope'" in capsys.readouterr().err